@@ -15,6 +15,7 @@ __version__ = '0.0.6'
 
 import os
 from pdg.api import PdgApi
+from pdg.federation import PdgApiFederation
 from pdg.errors import PdgApiError
 
 
@@ -29,7 +30,10 @@ def connect(database_url=None, pedantic=False):
         api = PdgApi('sqlite:///%s' % os.path.join(os.path.dirname(__file__), SQLITE_FILENAME), pedantic)
     else:
         api = PdgApi(database_url, pedantic)
-    schema_version = float(api.info('schema_version'))
-    if schema_version < MIN_SCHEMA_VERSION:
-        raise PdgApiError('database schema v%s too old - need at least v%s' % (schema_version, MIN_SCHEMA_VERSION))
+    api.release.check_schema_version()
     return api
+
+
+def connect_many(database_urls, pedantic=False):
+    """Connect to several PDG databases and return a PdgApiFederation routing requests by edition."""
+    return PdgApiFederation([connect(database_url, pedantic) for database_url in database_urls])
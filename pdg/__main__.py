@@ -0,0 +1,108 @@
+"""
+Command line tools for PDG databases.
+
+Usage: python -m pdg <command> [options], where command is one of
+
+validate    Check the consistency of a PDG database and write a report in JSON format
+snapshot    Write a read-only snapshot of a PDG database (see pdg.snapshot)
+serve       Run a local lookup server keeping the PDG data in memory (see pdg.server)
+
+Run python -m pdg <command> --help for the options of each command.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+
+def validate(args):
+    """Run consistency checks and write report."""
+    from pdg.validate import validate
+    report = validate(args.database, args.edition, args.processes, args.chunk_size)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    if args.strict and any(mode['errors'] for mode in report['modes'].values()):
+        return 1
+    return 0
+
+
+def snapshot(args):
+    """Write snapshot of database."""
+    import pdg
+    from pdg.snapshot import write_snapshot
+    api = pdg.connect(args.database)
+    write_snapshot(api.database_url, args.filename)
+    return 0
+
+
+def serve(args):
+    """Run lookup server until interrupted."""
+    import pdg
+    from pdg.server import make_server
+    api = pdg.connect(args.database, args.pedantic)
+    if args.batch:
+        api.enable_batching()
+    server = make_server(api, args.host, args.port, args.socket, args.verbose)
+    if not args.no_warm:
+        server.service.warm()
+    if args.socket:
+        sys.stderr.write('Serving PDG data on unix socket %s\n' % args.socket)
+    else:
+        sys.stderr.write('Serving PDG data on http://%s:%s\n' % server.server_address[:2])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m pdg', description='Command line tools for PDG databases.')
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+    subparsers.required = True
+
+    validate_parser = subparsers.add_parser('validate', help='check consistency of a PDG database')
+    validate_parser.add_argument('--database', default=None,
+                                 help='database URL (default: database distributed with the package)')
+    validate_parser.add_argument('--edition', default=None, help='edition to check (default: default edition)')
+    validate_parser.add_argument('--processes', type=int, default=None,
+                                 help='number of worker processes (default: number of CPUs)')
+    validate_parser.add_argument('--chunk-size', type=int, default=100,
+                                 help='number of items checked by a worker at a time (default: 100)')
+    validate_parser.add_argument('--output', default=None, help='file for report (default: standard output)')
+    validate_parser.add_argument('--strict', action='store_true', help='exit with status 1 if any check failed')
+    validate_parser.set_defaults(function=validate)
+
+    snapshot_parser = subparsers.add_parser('snapshot', help='write read-only snapshot of a PDG database')
+    snapshot_parser.add_argument('--database', default=None,
+                                 help='database URL (default: database distributed with the package)')
+    snapshot_parser.add_argument('filename', help='snapshot file to be written')
+    snapshot_parser.set_defaults(function=snapshot)
+
+    serve_parser = subparsers.add_parser('serve', help='run local lookup server')
+    serve_parser.add_argument('--database', default=None,
+                              help='database URL (default: database distributed with the package)')
+    serve_parser.add_argument('--host', default='127.0.0.1', help='host name or address (default: 127.0.0.1)')
+    serve_parser.add_argument('--port', type=int, default=8765, help='TCP port (default: 8765)')
+    serve_parser.add_argument('--socket', default=None, help='listen on this unix socket instead of a TCP port')
+    serve_parser.add_argument('--pedantic', action='store_true', help='use pedantic mode')
+    serve_parser.add_argument('--batch', action='store_true', help='coalesce concurrent lookups (see pdg.batch)')
+    serve_parser.add_argument('--no-warm', action='store_true', help='do not build the particle table at startup')
+    serve_parser.add_argument('--verbose', action='store_true', help='log every request')
+    serve_parser.set_defaults(function=serve)
+
+    args = parser.parse_args(argv)
+    return args.function(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
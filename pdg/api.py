@@ -2,14 +2,31 @@
 PDG API top-level class.
 """
 
+import collections
+import copy
+import gc
+import os
+import threading
+import weakref
 import sqlalchemy
 from sqlalchemy import func, select, bindparam, distinct, desc
+from sqlalchemy.pool import NullPool
 import pdg
-from pdg.errors import PdgInvalidPdgIdError, PdgNoDataError
-from pdg.utils import base_id
+from pdg.errors import PdgApiError, PdgInvalidPdgIdError, PdgNoDataError, PdgAmbiguousValueError, PdgBatcherClosedError
+from pdg.utils import base_id, parse_id, MAX_IN_CLAUSE_SIZE
+from pdg.batch import PdgBatcher, MAX_BATCH_SIZE, MAX_WAIT
 from pdg.data import PdgProperty, PdgMass, PdgWidth, PdgLifetime
-from pdg.decay import PdgBranchingFraction
-from pdg.particle import PdgParticle
+from pdg.decay import PdgBranchingFraction, PdgBranchingFractionMatrix
+from pdg.particle import PdgParticle, select_particle_data
+from pdg.search import PdgSearchIndex
+from pdg.index import PdgHierarchyIndex, PdgMassIndex, PdgDecayIndex, PdgParticleIndex
+from pdg.memory import memory_report
+from pdg.diff import diff_editions
+from pdg.query import PdgSummaryQuery
+from pdg.snapshot import create_engine
+from pdg.trace import PdgTraceRecorder, PdgPrefetcher, DEFAULT_WINDOW, DEFAULT_MIN_SUPPORT, DEFAULT_MIN_COUNT
+from pdg.table import build_particle_table, read_particle_table, write_particle_table
+from pdg.warm import PdgCacheWarmer
 
 
 # Map PDG data type codes to corresponding classes
@@ -33,6 +50,51 @@ DATA_TYPE_MAP = {
 }
 
 
+# All PdgApi objects, whose database connections are reset in child processes after os.fork()
+_apis = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+    """Reset the database connections and batchers of all PdgApi objects in a newly forked child process."""
+    for api in list(_apis):
+        api._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+class PdgRelease(object):
+    """Database engine, reflected schema, metadata and caches for a single PDG data release.
+
+    PdgApi keeps everything that depends on the contents of the database in a PdgRelease object,
+    so that a new data release can be swapped in with a single assignment (see PdgApi.reload()).
+    """
+
+    def __init__(self, database_url):
+        """Connect to database_url, reflect its schema and read its metadata."""
+        self.engine = create_engine(database_url)
+        self.db = sqlalchemy.MetaData()
+        self.db.reflect(self.engine)
+        pdginfo_table = self.db.tables['pdginfo']
+        query = select(pdginfo_table.c.name, pdginfo_table.c.value).order_by(pdginfo_table.c.id)
+        with self.engine.connect() as conn:
+            self.info = dict((item.name, item.value) for item in conn.execute(query))
+        self.cache = dict()
+
+    @property
+    def data_release(self):
+        """Data release (as stored in the database metadata) identifying this release."""
+        return self.info.get('data_release')
+
+    def check_schema_version(self):
+        """Raise PdgApiError if the database schema is too old for this version of the API."""
+        schema_version = float(self.info.get('schema_version'))
+        if schema_version < pdg.MIN_SCHEMA_VERSION:
+            raise PdgApiError('database schema v%s too old - need at least v%s' % (schema_version,
+                                                                                  pdg.MIN_SCHEMA_VERSION))
+
+
 class PdgApi:
 
     def __init__(self, database_url, pedantic=False):
@@ -45,11 +107,16 @@ class PdgApi:
         be ambiguous, no assumptions are made and instead a PdgAmbiguousValue exception is raised.
         """
         self.database_url = database_url
-        self.engine = sqlalchemy.create_engine(self.database_url)
-        self.db = sqlalchemy.MetaData()
-        self.db.reflect(self.engine)
-        self.edition = self.info('edition')
+        self.release = PdgRelease(self.database_url)
         self.pedantic = pedantic
+        self.federation = None
+        self.batcher = None
+        self.tracer = None
+        self.prefetcher = None
+        self._reload_lock = threading.Lock()
+        self._statistics = collections.Counter()
+        self._statistics_lock = threading.Lock()
+        _apis.add(self)
 
     def __str__(self):
         s = ['WARNING: THIS VERSION OF THE PDG PACKAGE IS UNDER DEVELOPMENT - DO NOT USE FOR PUBLICATIONS',
@@ -63,26 +130,247 @@ class PdgApi:
              ]
         return '\n'.join(s)
 
+    @property
+    def engine(self):
+        """SQLAlchemy engine for the current data release."""
+        return self.release.engine
+
+    @property
+    def db(self):
+        """Reflected database schema (SQLAlchemy MetaData) for the current data release."""
+        return self.release.db
+
+    @property
+    def edition(self):
+        """Edition of the Review of Particle Physics from which the data is taken."""
+        return self.release.info.get('edition')
+
+    @property
+    def data_release(self):
+        """Data release of the database currently in use."""
+        return self.release.data_release
+
     def info(self, key):
         """Return metadata info specified by key."""
-        pdginfo_table = self.db.tables['pdginfo']
-        query = select(pdginfo_table.c.value).where(pdginfo_table.c.name == bindparam('key'))
-        with self.engine.connect() as conn:
-            return conn.execute(query, {'key': key}).scalar()
+        return self.release.info.get(key)
 
     def info_keys(self):
         """Return list of all metadata keys."""
+        return list(self.release.info.keys())
+
+    def _available_data_release(self):
+        """Return data release of the database at database_url, bypassing any pooled connections."""
         pdginfo_table = self.db.tables['pdginfo']
-        query = select(pdginfo_table.c.name)
-        with self.engine.connect() as conn:
-            return [k[0] for k in conn.execute(query).fetchall()]
+        query = select(pdginfo_table.c.value).where(pdginfo_table.c.name == 'data_release')
+        engine = create_engine(self.database_url, poolclass=NullPool)
+        try:
+            with engine.connect() as conn:
+                return conn.execute(query).scalar()
+        finally:
+            engine.dispose()
+
+    def reload(self, force=False, prewarm=None):
+        """Switch to a new data release of the database, if one is available.
+
+        reload compares the data release stored in the database at database_url with the one currently in use.
+        If it differs (or if force is True), a new engine is created, the schema and metadata are read, and the
+        new release is swapped in with a single assignment, replacing all caches held by the API. Returns True
+        if a new release was swapped in and False otherwise. Since only the database metadata is queried when
+        there is no new release, reload can be called periodically by long-running services.
+
+        Queries already running complete on the connections of the old release. PdgData objects remember the
+        data release they were loaded from, and PdgData.is_stale can be used to detect objects from a previous
+        release. Such objects can be updated with PdgData.refresh().
+
+        prewarm can be set to an iterable of PdgData objects (e.g. those held by a service), whose caches are
+        loaded from the new release before it is swapped in, so that switching releases does not cause a burst
+        of queries on cold caches.
+        """
+        with self._reload_lock:
+            if not force and self._available_data_release() == self.data_release:
+                return False
+            release = PdgRelease(self.database_url)
+            try:
+                release.check_schema_version()
+            except PdgApiError:
+                release.engine.dispose()
+                raise
+            staged = []
+            if prewarm is not None:
+                staging_api = copy.copy(self)
+                staging_api.release = release
+                staging_api.batcher = None
+                staging_api.tracer = None
+                staging_api.prefetcher = None
+                for item in prewarm:
+                    staged.append((item, item._load_cache(staging_api)))
+            old_release, self.release = self.release, release
+            for item, cache in staged:
+                item.cache = cache
+                item.data_release = release.data_release
+            old_release.engine.dispose()
+            return True
+
+    def _after_fork(self):
+        """Discard the database connections and dispatcher thread inherited from the parent process.
+
+        Pooled connections must not be shared between processes. They are dropped without being closed, so that
+        the parent can continue to use them, and new connections are opened by the child when needed.
+        """
+        try:
+            self.release.engine.dispose(close=False)
+        except TypeError:
+            self.release.engine.dispose()
+        self._reload_lock = threading.Lock()
+        self._statistics_lock = threading.Lock()
+        if self.batcher is not None:
+            self.batcher._after_fork()
+
+    def preload(self, edition=None, freeze=True):
+        """Build caches and indexes before forking worker processes (e.g. in a gunicorn or multiprocessing parent).
+
+        The hierarchy index, the particle table and the mass index of the given (or the default) edition are built,
+        and all database connections are closed, so that no connections are inherited by the workers. If freeze is
+        True, gc.freeze() (Python 3.7 and later) moves all objects into the permanent generation of the garbage
+        collector, so that garbage collections in the workers do not touch (and thereby copy) the memory pages
+        holding the preloaded data, which then remains shared between all workers.
+
+        The caches and indexes keep their usual layout of Python objects; they are not converted into a compact
+        immutable form. Reference counting in the workers still writes to the memory pages of the objects they
+        use, so that these pages are copied, and freezing only avoids the copies caused by garbage collection.
+
+        Connections are also reset automatically in child processes after os.fork() (Python 3.7 and later, which
+        provide os.register_at_fork()), so that an API created in the parent can be used in the children.
+        """
+        self.hierarchy_index()
+        self.particle_table(edition, on_error='record')
+        self.mass_index(edition)
+        self.engine.dispose()
+        if freeze and hasattr(gc, 'freeze'):
+            gc.collect()
+            gc.freeze()
+
+    def _count(self, name, n=1):
+        """Add n to the counter name in the statistics of this API."""
+        with self._statistics_lock:
+            self._statistics[name] += n
+
+    def statistics(self):
+        """Return dict with the counters of this API.
+
+        Counters 'shared.<key>' give the number of times data was taken from the shared caches of the release
+        (see warm()) instead of being queried from the database, and 'query.<key>' the number of times it was
+        queried, where key is 'pdgid', 'summary', 'pdgparticle' or 'ids_with_data'. 'warm.chunks' is the number of
+        chunks loaded by warm(), 'trace.events' the number of events recorded (see record_trace()), and
+        'prefetch.queries' and 'prefetch.values' the number of queries made and summary values loaded by prefetching
+        (see enable_prefetch()).
+        """
+        with self._statistics_lock:
+            return dict(self._statistics)
+
+    def memory_report(self):
+        """Return dict with estimates of the memory (in bytes) held by the caches and objects of this API.
+
+        The dict has the keys 'categories' (dict of bytes per category in pdg.memory.MEMORY_CATEGORIES,
+        in particular 'pdgid', 'summary', 'pdgparticle' and 'converted' for the cached pdgid rows, summary values,
+        particle rows and values converted into other units), 'classes' (dict of class name: dict with 'count' and
+        'bytes' of the live objects of the class, without their caches), 'live_pdgdata' (number of live PdgData
+        objects) and 'total'. Estimates are obtained by traversing the objects (see module pdg.memory), which may
+        take a moment for large caches.
+        """
+        return memory_report(self)
+
+    def _access(self, method, identifier, edition=None, mcid=None):
+        """Record an access to the data for identifier and prefetch data predicted to be accessed with it.
+
+        mcid is the MC ID of the charge state whose particle data is accessed, if any.
+        """
+        edition = str(edition or self.edition)
+        tracer = self.tracer
+        if tracer is not None:
+            tracer.record(method, identifier, edition, mcid)
+            self._count('trace.events')
+        prefetcher = self.prefetcher
+        if prefetcher is not None:
+            prefetcher.on_access(method, identifier, edition)
+
+    def record_trace(self, filename):
+        """Start recording the data accesses made through this API to filename and return the PdgTraceRecorder.
+
+        Events are appended to the file in JSON lines format (see pdg.trace) until stop_trace() is called.
+        """
+        self.stop_trace()
+        self.tracer = PdgTraceRecorder(filename)
+        return self.tracer
+
+    def stop_trace(self):
+        """Stop recording data accesses."""
+        tracer, self.tracer = self.tracer, None
+        if tracer is not None:
+            tracer.close()
+
+    def enable_prefetch(self, traces=(), window=DEFAULT_WINDOW, min_support=DEFAULT_MIN_SUPPORT,
+                        min_count=DEFAULT_MIN_COUNT):
+        """Prefetch the summary values usually loaded after an access, as learned from traces, and return the prefetcher.
+
+        traces is a list of trace files written by record_trace() (or of lists of events). When an access
+        occurs after which the traces show summary values to be loaded in at least a fraction min_support of the
+        cases (and at least min_count times), all of these values are loaded with a single query into the shared
+        caches of the data release. See PdgPrefetcher for details.
+        """
+        prefetcher = PdgPrefetcher(self, window, min_support, min_count)
+        for trace in traces:
+            if isinstance(trace, str):
+                prefetcher.learn_file(trace)
+            else:
+                prefetcher.learn(trace)
+        self.prefetcher = prefetcher
+        return prefetcher
+
+    def disable_prefetch(self):
+        """Stop prefetching."""
+        self.prefetcher = None
+
+    def warm(self, scope='particles', edition=None, background=True):
+        """Load data into the caches shared by all PdgData objects of the current data release.
+
+        scope is 'particles' for the particle data and the summary values of the masses, widths and lifetimes of
+        all particles, 'all' for the particle data and the summary values of all PDG Identifiers, or a list of PDG
+        Identifiers, for which the summary values of these identifiers and all their descendants (and any particle
+        data) are loaded. Summary values are loaded for the given (or the default) edition.
+
+        The data is loaded in bulk on a background thread, unless background is False. Returns a PdgCacheWarmer
+        handle with the progress of warming and a method wait() to wait for its completion. Lookups made while
+        warming are served correctly, from the shared caches where the data has already been loaded and from the
+        database otherwise. See pdg.warm for details.
+        """
+        return PdgCacheWarmer(self, scope, edition).start(background)
+
+    def enable_batching(self, max_batch_size=MAX_BATCH_SIZE, max_wait=MAX_WAIT):
+        """Coalesce concurrent lookups into batched queries and return the PdgBatcher used.
+
+        Once enabled, get(), get_particle_by_mcid() and the loading of PDG Identifier information by PdgData
+        objects are answered by queries for all lookups submitted within max_wait seconds (up to max_batch_size
+        lookups per query). This reduces the number of database queries when many threads or asyncio tasks use
+        the same API. See pdg.batch for details.
+        """
+        self.disable_batching()
+        self.batcher = PdgBatcher(self, max_batch_size, max_wait)
+        return self.batcher
+
+    def disable_batching(self):
+        """Stop coalescing lookups, after answering all pending ones."""
+        batcher, self.batcher = self.batcher, None
+        if batcher is not None:
+            batcher.close()
 
     @property
     def editions(self):
         """List of all editions of the Review for which the database has data."""
-        pdgdata_table = self.db.tables['pdgdata']
+        release = self.release
+        pdgdata_table = release.db.tables['pdgdata']
         query = select(distinct(pdgdata_table.c.edition)).order_by(desc(pdgdata_table.c.edition))
-        with self.engine.connect() as conn:
+        with release.engine.connect() as conn:
             return [e[0] for e in conn.execute(query).fetchall()]
 
     @property
@@ -90,6 +378,10 @@ class PdgApi:
         """Return the default edition for this database."""
         return self.info('edition')
 
+    def make(self, pdgid, data_type, edition=None):
+        """Return PdgData object of the class appropriate for data_type, without querying the database."""
+        return DATA_TYPE_MAP.get(data_type, PdgProperty)(self, pdgid, edition)
+
     def get(self, pdgid, edition=None):
         """Return PdgData object for given PDG Identifier.
 
@@ -101,10 +393,21 @@ class PdgApi:
 
         edition can be set to a specific edition, from which the data should later be retrieved.
         """
-        pdgid_table = self.db.tables['pdgid']
+        release = self.release
+        if self.tracer is not None or self.prefetcher is not None:
+            baseid, pdgid_edition = parse_id(pdgid)
+            self._access('get', baseid, pdgid_edition or edition)
+        # Batching may be disabled concurrently, in which case the lookup is done directly
+        batcher = self.batcher
+        if batcher is not None:
+            try:
+                return batcher.get(pdgid, edition)
+            except PdgBatcherClosedError:
+                pass
+        pdgid_table = release.db.tables['pdgid']
         try:
             query = select(pdgid_table.c.data_type).where(pdgid_table.c.pdgid == bindparam('pdgid'))
-            with self.engine.connect() as conn:
+            with release.engine.connect() as conn:
                 data_type = conn.execute(query, {'pdgid': base_id(pdgid)}).fetchone()[0]
         except Exception:
             raise PdgInvalidPdgIdError('PDG Identifier %s not found' % pdgid)
@@ -122,12 +425,13 @@ class PdgApi:
 
         edition can be set to a specific edition, from which data should later be retrieved.
         """
-        pdgid_table = self.db.tables['pdgid']
+        release = self.release
+        pdgid_table = release.db.tables['pdgid']
         query = select(pdgid_table.c.pdgid, pdgid_table.c.data_type)
         if data_type_key is not None:
             query = query.where(pdgid_table.c.data_type == bindparam('data_type_key'))
         query = query.order_by(pdgid_table.c.sort)
-        with self.engine.connect() as conn:
+        with release.engine.connect() as conn:
             for item in conn.execute(query, {'data_type_key': data_type_key}):
                 try:
                     cls = DATA_TYPE_MAP[item.data_type]
@@ -135,6 +439,68 @@ class PdgApi:
                     cls = PdgProperty
                 yield cls(self, item.pdgid, edition)
 
+    def summary_values(self):
+        """Return query for the summary values of all PDG Identifiers in the default edition.
+
+        The query can be restricted by calling its methods where() and edition(), iterated over to obtain the
+        matching PdgSummaryValue objects, and aggregated with count(). For example,
+        api.summary_values().where(limit_type='U', confidence_level=0.9).count(group_by='data_type')
+        returns the number of upper limits at 90% CL for each data type. See PdgSummaryQuery for details.
+        """
+        return PdgSummaryQuery(self)
+
+    def to_arrays(self, edition=None, columns=None, canonical=False):
+        """Return dict of numpy arrays with the data of all summary values in the given edition(s).
+
+        edition can be set to an edition or a list of editions (default: the default edition). columns can be set to
+        a list of columns of the pdgdata and pdgid tables to be returned, and canonical to True to add the values
+        converted into canonical units. See PdgSummaryQuery.to_arrays() for details. This method requires numpy.
+        """
+        query = self.summary_values()
+        if edition is not None:
+            query = query.edition(*(edition if isinstance(edition, (list, tuple)) else [edition]))
+        if columns is None:
+            return query.to_arrays(canonical=canonical)
+        return query.to_arrays(columns, canonical)
+
+    def diff_editions(self, old, new, data_type_key=None, min_sigma=None):
+        """Return iterator over the summary values that were added, removed or changed from edition old to new.
+
+        The changes are returned as PdgEditionChange objects, which provide the old and new summary values as well
+        as the shift of the central value and of the errors. data_type_key can be set to select specific data types
+        (see doc_data_type_keys()), and min_sigma to select only values that changed by at least min_sigma
+        standard deviations. See pdg.diff for details.
+        """
+        return diff_editions(self, old, new, data_type_key, min_sigma)
+
+    def search_index(self, filename=None):
+        """Return the full-text search index used by search(), building it if necessary.
+
+        If filename is set, the index is stored in or read from the given SQLite (sidecar) file. Otherwise, it is
+        built in memory on first use. See PdgSearchIndex for details.
+        """
+        release = self.release
+        index = release.cache.get('search_index')
+        if index is None or (filename is not None and index.filename != filename):
+            index = PdgSearchIndex(self, filename)
+            release.cache['search_index'] = index
+        return index
+
+    def search(self, text, data_type_key=None, limit=20, edition=None):
+        """Return list of PdgData objects whose description or particle names best match text.
+
+        All words in text must match, and each word may be the beginning of a word in the description or particle
+        names (e.g. 'pi+ mas' finds the mass of the charged pion). Results are ranked by relevance and at most
+        limit objects are returned.
+
+        data_type_key can be set to select specific data types (see doc_data_type_keys()). The SQL wildcard
+        character ('%') is allowed.
+
+        edition can be set to a specific edition, from which data should later be retrieved.
+        """
+        return [self.make(pdgid, data_type, edition)
+                for pdgid, data_type in self.search_index().search(text, data_type_key, limit)]
+
     def get_particle_by_name(self, name, case_sensitive=True, edition=None):
         """Get particle by its name.
 
@@ -143,14 +509,16 @@ class PdgApi:
 
         edition can be set to a specific edition, from which data should later be retrieved.
         """
-        pdgparticle_table = self.db.tables['pdgparticle']
+        release = self.release
+        self._access('get_particle_by_name', name, edition)
+        pdgparticle_table = release.db.tables['pdgparticle']
         query = select(pdgparticle_table.c.pdgid, pdgparticle_table.c.mcid)
         if case_sensitive:
             query = query.where(pdgparticle_table.c.name == bindparam('name'))
         else:
             name = name.lower()
             query = query.where(func.lower(pdgparticle_table.c.name) == bindparam('name'))
-        with self.engine.connect() as conn:
+        with release.engine.connect() as conn:
             matches = conn.execute(query, {'name': name}).fetchall()
         if len(matches) == 0:
             raise ValueError('No particle found with name %s' % name)
@@ -164,10 +532,18 @@ class PdgApi:
 
         edition can be set to a specific edition, from which data should later be retrieved.
         """
-        pdgparticle_table = self.db.tables['pdgparticle']
+        release = self.release
+        self._access('get_particle_by_mcid', mcid, edition)
+        batcher = self.batcher
+        if batcher is not None:
+            try:
+                return batcher.get_particle_by_mcid(mcid, edition)
+            except PdgBatcherClosedError:
+                pass
+        pdgparticle_table = release.db.tables['pdgparticle']
         query = select(distinct(pdgparticle_table.c.pdgid))
         query = query.where(pdgparticle_table.c.mcid == bindparam('mcid'))
-        with self.engine.connect() as conn:
+        with release.engine.connect() as conn:
             matches = [p.pdgid for p in conn.execute(query, {'mcid': mcid})]
         if len(matches) == 0:
             raise ValueError('No particle found with MC ID %s' % mcid)
@@ -176,28 +552,200 @@ class PdgApi:
         else:
             raise ValueError('MC number %s matches %i particles with PDG Identifiers %s' % (mcid, len(matches), matches))
 
+    def get_particles_by_mcids(self, mcids, edition=None):
+        """Get particles for a list of MC IDs.
+
+        Returns a list with one entry for each MC ID in mcids. Particles are resolved using the same rules as
+        get_particle_by_mcid(), but using a single query for the whole list, and the particle data of each returned
+        PdgParticle is already loaded. If no unique particle can be found for a given MC ID, the corresponding entry
+        is the exception (ValueError, PdgNoDataError or PdgAmbiguousValueError) describing the problem, so that
+        errors do not abort the processing of the remaining list.
+
+        edition can be set to a specific edition, from which data should later be retrieved.
+        """
+        release = self.release
+        mcids = list(mcids)
+        pdgparticle_table = release.db.tables['pdgparticle']
+        query = select(pdgparticle_table)
+        query = query.where(pdgparticle_table.c.mcid.in_(bindparam('mcids', expanding=True)))
+        rows = dict()
+        unique_mcids = list(set(mcids))
+        with release.engine.connect() as conn:
+            for i in range(0, len(unique_mcids), MAX_IN_CLAUSE_SIZE):
+                for row in conn.execute(query, {'mcids': unique_mcids[i:i+MAX_IN_CLAUSE_SIZE]}):
+                    rows.setdefault(row.mcid, []).append(row)
+        particles = []
+        for mcid in mcids:
+            matches = sorted(set(row.pdgid for row in rows.get(mcid, [])))
+            if len(matches) == 0:
+                particles.append(ValueError('No particle found with MC ID %s' % mcid))
+            elif len(matches) > 1:
+                particles.append(ValueError('MC number %s matches %i particles with PDG Identifiers %s' %
+                                            (mcid, len(matches), matches)))
+            else:
+                particle = PdgParticle(self, matches[0], edition, set_mcid=mcid)
+                try:
+                    particle.cache['pdgparticle'] = select_particle_data([row for row in rows[mcid]
+                                                                          if row.entry_type == 'P'],
+                                                                         particle.pdgid, particle.cc_type_flag, mcid)
+                    particles.append(particle)
+                except (PdgNoDataError, PdgAmbiguousValueError) as e:
+                    particles.append(e)
+        return particles
+
+    def hierarchy_index(self, release=None):
+        """Return PdgHierarchyIndex of the parent/child relations of all PDG Identifiers, building it if necessary.
+
+        release can be set to the PdgRelease for which the index is needed (default: the current data release),
+        so that operations that also query the database use the index of the release they query.
+        """
+        release = release or self.release
+        index = release.cache.get('hierarchy_index')
+        if index is None:
+            index = PdgHierarchyIndex(self, release)
+            release.cache['hierarchy_index'] = index
+        return index
+
+    def mass_index(self, edition=None):
+        """Return PdgMassIndex of all particles for the given (or the default) edition, building it if necessary."""
+        release = self.release
+        key = ('mass_index', edition or self.edition, self.pedantic)
+        index = release.cache.get(key)
+        if index is None:
+            index = PdgMassIndex(self, edition)
+            release.cache[key] = index
+        return index
+
+    def particle_table(self, edition=None, on_error='skip', filename=None):
+        """Return table of basic data for all particle charge states with MC ID, as a list of PdgParticleRow tuples.
+
+        Each row gives the name, MC ID, charge, quantum numbers, PDG best mass, width and lifetime with errors,
+        and whether the particle is a generic charge state or stable. The table is built with bulk queries and kept
+        in the release cache. on_error determines how particles whose data cannot be determined are handled
+        ('skip', 'raise' or 'record', see pdg.table.build_particle_table()).
+
+        If filename is set, the table is read from this file if it was stored there for the same data release,
+        edition and options, and is otherwise built and stored in the file.
+        """
+        edition = edition or self.edition
+        release = self.release
+        key = ('particle_table', edition, self.pedantic, on_error)
+        table = release.cache.get(key)
+        if filename:
+            stored = read_particle_table(filename, self, edition, on_error)
+            if stored is None:
+                table = table or build_particle_table(self, edition, on_error)
+                write_particle_table(filename, table, self, edition, on_error)
+            else:
+                table = table or stored
+        if table is None:
+            table = build_particle_table(self, edition, on_error)
+        release.cache[key] = table
+        return table
+
+    def branching_fraction_matrix(self, edition=None, exclusive_only=True):
+        """Return PdgBranchingFractionMatrix with the branching fractions of all particles (requires numpy).
+
+        The matrix is built with a single query and kept in the release cache. If exclusive_only is False, inclusive
+        branching fractions are included as well.
+        """
+        release = self.release
+        key = ('branching_fraction_matrix', edition or self.edition, self.pedantic, exclusive_only)
+        index = release.cache.get(key)
+        if index is None:
+            index = PdgBranchingFractionMatrix(self, edition, exclusive_only)
+            release.cache[key] = index
+        return index
+
+    def decay_index(self, edition=None):
+        """Return PdgDecayIndex of the decay modes for the given (or the default) edition, building it if necessary."""
+        release = self.release
+        key = ('decay_index', edition or self.edition)
+        index = release.cache.get(key)
+        if index is None:
+            index = PdgDecayIndex(self, edition)
+            release.cache[key] = index
+        return index
+
+    def find_decays(self, final_state, parent=None, exact=False, edition=None):
+        """Return list of decay modes (PdgBranchingFraction objects) with the given final-state particles.
+
+        final_state is a list of particle names as used in the Summary Tables, e.g. ['K-', 'pi+', 'pi+']. Unless
+        exact is True, modes with additional final-state particles are included. parent can be set to the name or
+        the PDG Identifier of the decaying particle. The search uses an inverted index built from the decay mode
+        descriptions on first use (see PdgDecayIndex).
+        """
+        return self.decay_index(edition).find(final_state, parent, exact)
+
+    def particles_in_mass_range(self, lo, hi, units='GeV', n_widths=0, edition=None):
+        """Return list of particles (charge states with MC ID) whose PDG best mass is within [lo, hi].
+
+        lo and hi are given in units. If n_widths is larger than zero, particles are also returned if their mass is
+        within n_widths times their width from the window (e.g. for Breit-Wigner resonances).
+        Best masses and widths are the same as returned by PdgParticle.mass and PdgParticle.width and are
+        taken from a sorted index that is built on first use. The returned objects are shared by all queries.
+
+        edition can be set to a specific edition, from which data should be retrieved.
+        """
+        return self.mass_index(edition).find(lo, hi, units, n_widths)
+
+    def particles_in_mass_ranges(self, lo, hi, units='GeV', n_widths=0, edition=None):
+        """Vectorized version of particles_in_mass_range() for many windows [lo[i], hi[i]] (requires numpy).
+
+        Returns a list with the list of matching particles for each window.
+        """
+        return self.mass_index(edition).find_many(lo, hi, units, n_widths)
+
+    def particle_index(self, edition=None):
+        """Return PdgParticleIndex of all particles for the given (or the default) edition, building it if necessary."""
+        release = self.release
+        key = ('particle_index', edition or self.edition)
+        index = release.cache.get(key)
+        if index is None:
+            index = PdgParticleIndex(self, edition)
+            release.cache[key] = index
+        return index
+
+    def select_particles(self, edition=None, **criteria):
+        """Return list of particles (charge states with MC ID) satisfying all criteria (requires numpy).
+
+        Criteria are given as keyword arguments named after particle attributes, e.g.
+        select_particles(is_meson=True, quantum_J=1, quantum_P=-1, quantum_C=-1) or
+        select_particles(is_lepton=True, charge=lambda q: q != 0). Values can be single values, (lo, hi) ranges,
+        lists of values or functions evaluated on numpy arrays (see PdgParticleIndex.select()). The selection is
+        evaluated over columnar arrays of charges, quantum numbers and flags that are built on first use, and the
+        returned particles have their particle data already loaded. Particles are ordered by MC ID.
+        A charge of None is stored as NaN, so that particles with unknown charge are excluded by criteria such
+        as charge=(0.5, None) (but functions like lambda q: q != 0 are True for NaN).
+
+        edition can be set to a specific edition, from which data should later be retrieved.
+        """
+        return self.particle_index(edition).select(**criteria)
+
     def get_particles(self, edition=None):
         """Return iterator over all particles.
 
         edition can be set to a specific edition, from which data should later be retrieved.
         """
-        pdgid_table = self.db.tables['pdgid']
-        pdgparticle_table = self.db.tables['pdgparticle']
+        release = self.release
+        pdgid_table = release.db.tables['pdgid']
+        pdgparticle_table = release.db.tables['pdgparticle']
         query = select(distinct(pdgid_table.c.pdgid)).join(pdgparticle_table)
         query = query.where(pdgid_table.c.data_type == 'PART')
         query = query.order_by(pdgid_table.c.sort)
-        with self.engine.connect() as conn:
+        with release.engine.connect() as conn:
             for item in conn.execute(query):
                 yield PdgParticle(self, item.pdgid, edition)
 
     def doc_key_value(self, table_name, column_name, key):
         """Get documentation on the meaning of key values or flags used in the PDG API."""
-        pdgdoc_table = self.db.tables['pdgdoc']
+        release = self.release
+        pdgdoc_table = release.db.tables['pdgdoc']
         query = select(pdgdoc_table)
         query = query.where(pdgdoc_table.c.table_name == bindparam('table_name'))
         query = query.where(pdgdoc_table.c.column_name == bindparam('column_name'))
         query = query.where(pdgdoc_table.c.value == bindparam('value'))
-        with self.engine.connect() as conn:
+        with release.engine.connect() as conn:
             try:
                 return conn.execute(query, {'table_name': table_name, 'column_name': column_name, 'value': key}).\
                     fetchone()._mapping
@@ -215,16 +763,17 @@ class PdgApi:
         When as_text is True (default), the list is returned as a formatted string suitable for printing.
         Otherwise, a list of dict is returned, where each dict describes a possible key value.
         """
+        release = self.release
         keys = []
         if as_text:
             keys.append('Key value     Description')
             keys.append('-'*60)
-        pdgdoc_table = self.db.tables['pdgdoc']
+        pdgdoc_table = release.db.tables['pdgdoc']
         query = select(pdgdoc_table)
         query = query.where(pdgdoc_table.c.table_name == 'PDGID')
         query = query.where(pdgdoc_table.c.column_name == 'DATA_TYPE')
         query.order_by(pdgdoc_table.c.indicator, pdgdoc_table.c.value)
-        with self.engine.connect() as conn:
+        with release.engine.connect() as conn:
             for item in conn.execute(query):
                 if as_text:
                     keys.append('  %-8s    %s' % (item.value, item.description))
@@ -245,16 +794,17 @@ class PdgApi:
         When as_text is True (default), the list is returned as a formatted string suitable for printing.
         Otherwise, a list of dict is returned, where each dict describes a possible key value.
         """
+        release = self.release
         keys = []
         if as_text:
             keys.append('Key value   Indicator            Description')
             keys.append('-'*60)
-        pdgdoc_table = self.db.tables['pdgdoc']
+        pdgdoc_table = release.db.tables['pdgdoc']
         query = select(pdgdoc_table)
         query = query.where(pdgdoc_table.c.table_name == 'PDGDATA')
         query = query.where(pdgdoc_table.c.column_name == 'VALUE_TYPE')
         query.order_by(pdgdoc_table.c.indicator, pdgdoc_table.c.value)
-        with self.engine.connect() as conn:
+        with release.engine.connect() as conn:
             for item in conn.execute(query):
                 if as_text:
                     keys.append('  %-8s  %-20s  %s' % (item.value, item.indicator, item.description))
@@ -0,0 +1,231 @@
+"""
+Coalescing of concurrent lookups into batched queries.
+
+In threaded or asynchronous services, many requests for different PDG Identifiers or MC IDs may arrive at
+the same time, and each would normally be answered by a separate database query. A PdgBatcher collects the
+lookups submitted within a short time window (max_wait seconds after the first pending lookup, or until
+max_batch_size lookups are pending), answers all of them with a single set-based query, and hands each
+caller its own result.
+
+Batching is enabled for an API with PdgApi.enable_batching(), after which PdgApi.get(),
+PdgApi.get_particle_by_mcid() and the lazy loading of PDG Identifier information (PdgData._get_pdgid())
+are served through the batcher, returning the same objects and raising the same exceptions as without
+batching. Lookups are executed by a dispatcher thread, and the submit_*() methods return a
+concurrent.futures.Future, so that asyncio code can await lookups with asyncio.wrap_future() without
+blocking the event loop. Statistics on the achieved batch sizes are returned by PdgBatcher.statistics().
+On Python 2 without the futures backport, a minimal Future providing result() is returned instead.
+"""
+
+import collections
+import threading
+import time
+from sqlalchemy import select, bindparam
+from pdg.errors import PdgInvalidPdgIdError, PdgBatcherClosedError
+from pdg.utils import base_id
+try:
+    from concurrent.futures import Future
+except ImportError:
+    class Future(object):
+        """Minimal replacement of concurrent.futures.Future for Python 2."""
+
+        def __init__(self):
+            self._done = threading.Event()
+            self._result = None
+            self._exception = None
+
+        def done(self):
+            return self._done.is_set()
+
+        def set_result(self, result):
+            self._result = result
+            self._done.set()
+
+        def set_exception(self, exception):
+            self._exception = exception
+            self._done.set()
+
+        def result(self, timeout=None):
+            if not self._done.wait(timeout):
+                raise RuntimeError('timeout waiting for result')
+            if self._exception is not None:
+                raise self._exception
+            return self._result
+
+
+# Default maximum number of lookups answered by a single query
+MAX_BATCH_SIZE = 500
+
+# Default maximum time (in seconds) a lookup waits for other lookups to be batched with
+MAX_WAIT = 0.002
+
+
+class PdgBatcher(object):
+    """Collects concurrent lookups and answers them with batched queries."""
+
+    def __init__(self, api, max_batch_size=MAX_BATCH_SIZE, max_wait=MAX_WAIT):
+        """Create batcher for lookups in the database used by api.
+
+        A batch is executed when max_batch_size lookups of the same kind are pending, or max_wait seconds
+        after the oldest pending lookup was submitted.
+        """
+        self.api = api
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._loaders = {'pdgid': self._load_pdgids, 'mcid': self._load_mcids}
+        self._pending = dict((kind, []) for kind in self._loaders)
+        self._condition = threading.Condition()
+        self._thread = None
+        self._closed = False
+        self._requests = 0
+        self._queries = 0
+        self._batch_sizes = collections.Counter()
+
+    def __repr__(self):
+        return '%s(max_batch_size=%s, max_wait=%s)' % (self.__class__.__name__, self.max_batch_size, self.max_wait)
+
+    def _submit(self, kind, key, convert):
+        """Queue lookup of key and return Future for convert(result), where result is None if key was not found."""
+        future = Future()
+        with self._condition:
+            if self._closed:
+                raise PdgBatcherClosedError('%r is closed' % self)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='pdg-batcher')
+                self._thread.daemon = True
+                self._thread.start()
+            self._pending[kind].append((time.time(), key, future, convert))
+            self._requests += 1
+            self._condition.notify()
+        return future
+
+    def submit_pdgid(self, pdgid):
+        """Return Future for the PDG Identifier information (row of the pdgid table) of pdgid."""
+        def convert(row):
+            if row is None:
+                raise PdgInvalidPdgIdError('PDG Identifier %s not found' % pdgid)
+            return row
+        return self._submit('pdgid', base_id(pdgid), convert)
+
+    def submit_get(self, pdgid, edition=None):
+        """Return Future for the PdgData object returned by PdgApi.get(pdgid, edition)."""
+        def convert(row):
+            if row is None:
+                raise PdgInvalidPdgIdError('PDG Identifier %s not found' % pdgid)
+            item = self.api.make(pdgid, row['data_type'], edition)
+            item.cache['pdgid'] = row
+            return item
+        return self._submit('pdgid', base_id(pdgid), convert)
+
+    def submit_particle_by_mcid(self, mcid, edition=None):
+        """Return Future for the PdgParticle returned by PdgApi.get_particle_by_mcid(mcid, edition)."""
+        from pdg.particle import PdgParticle
+
+        def convert(matches):
+            matches = matches or []
+            if len(matches) == 0:
+                raise ValueError('No particle found with MC ID %s' % mcid)
+            elif len(matches) > 1:
+                raise ValueError('MC number %s matches %i particles with PDG Identifiers %s' %
+                                 (mcid, len(matches), matches))
+            return PdgParticle(self.api, matches[0], edition, set_mcid=mcid)
+        return self._submit('mcid', mcid, convert)
+
+    def get_pdgid(self, pdgid):
+        """Return PDG Identifier information for pdgid, waiting for the batch to complete."""
+        return self.submit_pdgid(pdgid).result()
+
+    def get(self, pdgid, edition=None):
+        """Batched version of PdgApi.get()."""
+        return self.submit_get(pdgid, edition).result()
+
+    def get_particle_by_mcid(self, mcid, edition=None):
+        """Batched version of PdgApi.get_particle_by_mcid()."""
+        return self.submit_particle_by_mcid(mcid, edition).result()
+
+    def _load_pdgids(self, release, conn, pdgids):
+        """Return dict with the pdgid table row for each of the given PDG Identifiers that exists."""
+        pdgid_table = release.db.tables['pdgid']
+        query = select(pdgid_table).where(pdgid_table.c.pdgid.in_(bindparam('pdgids', expanding=True)))
+        return dict((row.pdgid, row._mapping) for row in conn.execute(query, {'pdgids': pdgids}))
+
+    def _load_mcids(self, release, conn, mcids):
+        """Return dict with the sorted list of PDG Identifiers of the particles with each of the given MC IDs."""
+        pdgparticle_table = release.db.tables['pdgparticle']
+        query = select(pdgparticle_table.c.pdgid, pdgparticle_table.c.mcid).distinct()
+        query = query.where(pdgparticle_table.c.mcid.in_(bindparam('mcids', expanding=True)))
+        matches = dict()
+        for row in conn.execute(query, {'mcids': mcids}):
+            matches.setdefault(row.mcid, []).append(row.pdgid)
+        return dict((mcid, sorted(pdgids)) for mcid, pdgids in matches.items())
+
+    def _next_batch(self):
+        """Wait for and return the next batch as (kind, entries), or None once closed with no lookups pending."""
+        with self._condition:
+            while not self._closed and not any(self._pending.values()):
+                self._condition.wait()
+            while not self._closed:
+                pending = [entries for entries in self._pending.values() if entries]
+                if not pending or any(len(entries) >= self.max_batch_size for entries in pending):
+                    break
+                remaining = min(entries[0][0] for entries in pending) + self.max_wait - time.time()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            pending = [(entries[0][0], kind) for kind, entries in self._pending.items() if entries]
+            if not pending:
+                return None
+            kind = min(pending)[1]
+            entries = self._pending[kind][:self.max_batch_size]
+            del self._pending[kind][:self.max_batch_size]
+            self._queries += 1
+            self._batch_sizes[len(entries)] += 1
+            return kind, entries
+
+    def _run(self):
+        """Execute batches until the batcher is closed."""
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            kind, entries = batch
+            try:
+                release = self.api.release
+                with release.engine.connect() as conn:
+                    results = self._loaders[kind](release, conn, sorted(set(entry[1] for entry in entries)))
+            except Exception as e:
+                for _, _, future, _ in entries:
+                    future.set_exception(e)
+                continue
+            for _, key, future, convert in entries:
+                try:
+                    future.set_result(convert(results.get(key)))
+                except Exception as e:
+                    future.set_exception(e)
+
+    def _after_fork(self):
+        """Reset the batcher in a child process, where the dispatcher thread of the parent does not exist."""
+        self._condition = threading.Condition()
+        self._pending = dict((kind, []) for kind in self._loaders)
+        self._thread = None
+
+    def close(self):
+        """Execute all pending lookups and stop the dispatcher thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def statistics(self):
+        """Return dict with the number of lookups and queries, and the distribution of the achieved batch sizes."""
+        with self._condition:
+            batch_sizes = dict(self._batch_sizes)
+            queries = self._queries
+            requests = self._requests
+        batched = sum(size * count for size, count in batch_sizes.items())
+        return {'requests': requests,
+                'queries': queries,
+                'mean_batch_size': float(batched) / queries if queries else 0.0,
+                'max_batch_size': max(batch_sizes) if batch_sizes else 0,
+                'batch_sizes': batch_sizes}
@@ -0,0 +1,372 @@
+"""
+Benchmarks for PDG API deployments.
+
+Usage: python -m pdg.bench <command> [options], where command is one of
+
+memory      Measure the memory used by each worker process of a prefork server (Linux only)
+replay      Replay a recorded (see pdg.trace) or synthetic workload and measure throughput and latency
+
+Run python -m pdg.bench <command> --help for the options of each command.
+"""
+
+from __future__ import print_function
+
+import argparse
+import bisect
+import collections
+import gc
+import json
+import multiprocessing
+import random
+import sys
+import threading
+import time
+import pdg
+from pdg.errors import PdgApiError
+from pdg.particle import PdgParticle
+from pdg.trace import read_trace
+
+
+# File with the memory statistics of the current process (Linux only)
+SMAPS_ROLLUP = '/proc/self/smaps_rollup'
+
+# API used by the worker processes of the memory benchmark
+_api = None
+
+# Default fractions of the methods in synthetic workloads
+SYNTHETIC_MIX = {
+    'get': 0.15,
+    'get_particle_by_name': 0.1,
+    'get_particle_by_mcid': 0.2,
+    'properties': 0.1,
+    'mass': 0.15,
+    'width': 0.1,
+    'lifetime': 0.1,
+    'summary_values': 0.1,
+}
+
+# Functions executing a workload event with method name for identifier, edition and (for particle_data) mcid.
+# Summary values are also recorded for particles, which have no summary_values() method, and are therefore
+# loaded in the same way as when they were recorded.
+REPLAY_METHODS = {
+    'get': lambda api, identifier, edition, mcid: api.get(identifier, edition).description,
+    'get_particle_by_name': lambda api, identifier, edition, mcid: api.get_particle_by_name(identifier,
+                                                                                            edition=edition).mcid,
+    'get_particle_by_mcid': lambda api, identifier, edition, mcid: api.get_particle_by_mcid(int(identifier),
+                                                                                            edition).name,
+    'particle_data': lambda api, identifier, edition, mcid: PdgParticle(api, identifier, edition, set_mcid=mcid).name,
+    'properties': lambda api, identifier, edition, mcid: [p.best_summary()
+                                                          for p in api.get(identifier, edition).properties()],
+    'mass': lambda api, identifier, edition, mcid: api.get_particle_by_mcid(int(identifier), edition).mass,
+    'width': lambda api, identifier, edition, mcid: api.get_particle_by_mcid(int(identifier), edition).width,
+    'lifetime': lambda api, identifier, edition, mcid: api.get_particle_by_mcid(int(identifier), edition).lifetime,
+    'summary_values': lambda api, identifier, edition, mcid: api.get(identifier, edition)._get_summary_values(),
+}
+
+
+def process_memory():
+    """Return dict with the resident (rss), proportional (pss) and private memory of this process in bytes.
+
+    Memory shared with other processes (e.g. copy-on-write pages inherited from a parent process) counts
+    towards rss, and towards pss only in proportion to the number of processes sharing it. This requires
+    Linux (/proc/self/smaps_rollup).
+    """
+    try:
+        with open(SMAPS_ROLLUP) as f:
+            lines = f.readlines()
+    except (IOError, OSError):
+        raise PdgApiError('memory statistics not available (%s)' % SMAPS_ROLLUP)
+    values = dict()
+    for line in lines:
+        fields = line.split()
+        if len(fields) == 3 and fields[2] == 'kB':
+            values[fields[0].rstrip(':')] = int(fields[1]) * 1024
+    return {'rss': values.get('Rss', 0),
+            'pss': values.get('Pss', 0),
+            'private': values.get('Private_Clean', 0) + values.get('Private_Dirty', 0)}
+
+
+def _fork_context():
+    """Return multiprocessing context starting worker processes with os.fork()."""
+    # multiprocessing.get_context() is not available on Python 2, which always forks on POSIX systems
+    if not hasattr(multiprocessing, 'get_context'):
+        return multiprocessing
+    return multiprocessing.get_context('fork')
+
+
+def _workload(api):
+    """Look up the basic data of all particles, as a worker serving requests would."""
+    table = api.particle_table(on_error='record')
+    particles = api.mass_index().find(0, 1e6)
+    return len(table) + sum(1 for particle in particles if particle.mass is not None)
+
+
+def _memory_worker(args):
+    """Run workload in a worker process and return its memory statistics."""
+    global _api
+    database_url, preload = args
+    if not preload:
+        _api = pdg.connect(database_url)
+        _api.preload(freeze=False)
+    _workload(_api)
+    return process_memory()
+
+
+def memory_benchmark(database_url=None, workers=4, preload=True):
+    """Return dict with the memory used by each of workers forked worker processes.
+
+    If preload is True, the API is created and preloaded (see PdgApi.preload()) in the parent process before
+    forking. Otherwise, each worker connects and builds the caches itself. Each worker then runs the same workload,
+    and the reported memory includes the memory inherited from the parent.
+
+    The objects frozen by the preloading (see gc.freeze()) are unfrozen again once the workers have finished,
+    unless the calling process had already frozen objects itself.
+    """
+    global _api
+    process_memory()
+    _api = None
+    # gc.get_freeze_count() is only available on Python 3.7 and later
+    unfreeze = preload and hasattr(gc, 'freeze') and gc.get_freeze_count() == 0
+    if preload:
+        _api = pdg.connect(database_url)
+        _api.preload()
+    try:
+        pool = _fork_context().Pool(workers)
+        try:
+            results = pool.map(_memory_worker, [(database_url, preload)] * workers, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    finally:
+        _api = None
+        if unfreeze:
+            gc.unfreeze()
+    report = {'preload': preload, 'workers': workers, 'per_worker': results}
+    for key in ('rss', 'pss', 'private'):
+        report['mean_%s' % key] = sum(r[key] for r in results) / float(len(results))
+    return report
+
+
+def percentiles(latencies):
+    """Return dict with the p50, p95, p99, mean and maximum of a list of latencies."""
+    latencies = sorted(latencies)
+    if not latencies:
+        return {}
+    result = dict((name, latencies[min(len(latencies) - 1, int(fraction * len(latencies)))])
+                  for name, fraction in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99)))
+    result['mean'] = sum(latencies) / len(latencies)
+    result['max'] = latencies[-1]
+    return result
+
+
+def synthetic_trace(api, count=1000, seed=0, mix=None):
+    """Return list of count random workload events with methods chosen according to mix (see SYNTHETIC_MIX).
+
+    Identifiers are drawn from the particle table and the PDG Identifiers of the database used by api, so that
+    all events refer to existing data. Only particles whose values can all be determined (i.e. rows of the particle
+    table without error and with a lifetime, which PdgParticle.lifetime cannot derive from an unknown width) are
+    used, so that replaying the workload raises no errors. The same seed gives the same workload.
+    """
+    mix = mix or SYNTHETIC_MIX
+    rng = random.Random(seed)
+    particles = [row for row in api.particle_table(on_error='record') if row.error is None and row.lifetime is not None]
+    hierarchy = api.hierarchy_index()
+    properties = sorted(pdgid for pdgid, row in hierarchy.rows.items() if row['data_type'] != 'PART')
+    methods = sorted(mix)
+    # Cumulative weights for drawing methods (random.choices() is not available on Python 2)
+    cumulative_weights = []
+    for method in methods:
+        cumulative_weights.append((cumulative_weights[-1] if cumulative_weights else 0) + mix[method])
+    events = []
+    for _ in range(count):
+        method = methods[bisect.bisect(cumulative_weights, rng.random() * cumulative_weights[-1])]
+        particle = rng.choice(particles)
+        if method in ('get', 'summary_values'):
+            identifier = rng.choice(properties)
+        elif method == 'properties':
+            identifier = particle.pdgid
+        elif method == 'get_particle_by_name':
+            identifier = particle.name
+        else:
+            identifier = particle.mcid
+        events.append({'method': method, 'id': identifier, 'edition': None})
+    return events
+
+
+def make_api(config):
+    """Return PdgApi configured according to dict config (see replay_benchmark())."""
+    api = pdg.connect(config.get('database'), config.get('pedantic', False))
+    if config.get('warm'):
+        api.warm(config['warm'], background=False)
+    if config.get('prefetch'):
+        api.enable_prefetch(config['prefetch'])
+    if config.get('batch'):
+        api.enable_batching()
+    return api
+
+
+def _replay_thread(api, events, results):
+    """Execute events and append the latencies and errors by method to results."""
+    latencies = collections.defaultdict(list)
+    errors = collections.Counter()
+    results.append((latencies, errors))
+    for event in events:
+        start = time.time()
+        try:
+            REPLAY_METHODS[event['method']](api, event['id'], event.get('edition'), event.get('mcid'))
+        except Exception:
+            errors[event['method']] += 1
+        latencies[event['method']].append(time.time() - start)
+
+
+def _replay_process(args):
+    """Replay the events of one worker process with threads threads and return its latencies and errors."""
+    config, events, threads = args
+    api = _api if _api is not None else make_api(config)
+    results = []
+    workers = [threading.Thread(target=_replay_thread, args=(api, events[i::threads], results))
+               for i in range(threads)]
+    start = time.time()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    end = time.time()
+    latencies = collections.defaultdict(list)
+    errors = collections.Counter()
+    for thread_latencies, thread_errors in results:
+        for method, values in thread_latencies.items():
+            latencies[method].extend(values)
+        errors.update(thread_errors)
+    return dict(latencies), dict(errors), start, end
+
+
+def replay_benchmark(events, config=None, threads=1, processes=1, preload=False):
+    """Replay workload events and return dict with throughput (events per second) and latency percentiles.
+
+    events is a list of workload events (dicts with method, id, edition and optionally mcid, as written by
+    PdgTraceRecorder or returned by synthetic_trace()), which are distributed over processes worker processes with
+    threads threads each. Each process replays its events on its own PdgApi, configured by the dict config with the optional keys
+    database (URL), pedantic, warm (scope for PdgApi.warm()), prefetch (list of trace files for
+    PdgApi.enable_prefetch()) and batch (True to enable batching). If preload is True, the API is created and
+    preloaded in the parent process before forking the workers (see PdgApi.preload()).
+
+    Events with methods not in REPLAY_METHODS are ignored. Events that raise an exception are counted as errors.
+    """
+    global _api
+    config = config or {}
+    events = [event for event in events if event['method'] in REPLAY_METHODS]
+    _api = None
+    if processes > 1 and preload:
+        _api = make_api(config)
+        _api.preload(freeze=False)
+    if processes > 1:
+        pool = _fork_context().Pool(processes)
+        try:
+            results = pool.map(_replay_process, [(config, events[i::processes], threads) for i in range(processes)],
+                               chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+            _api = None
+    else:
+        results = [_replay_process((config, events, threads))]
+    latencies = collections.defaultdict(list)
+    errors = collections.Counter()
+    for process_latencies, process_errors, _, _ in results:
+        for method, values in process_latencies.items():
+            latencies[method].extend(values)
+        errors.update(process_errors)
+    elapsed = max(r[3] for r in results) - min(r[2] for r in results)
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {'events': len(all_latencies),
+            'errors': sum(errors.values()),
+            'threads': threads,
+            'processes': processes,
+            'elapsed': elapsed,
+            'throughput': len(all_latencies) / elapsed if elapsed > 0 else 0.0,
+            'latency': percentiles(all_latencies),
+            'methods': dict((method, dict(percentiles(values), events=len(values), errors=errors[method]))
+                            for method, values in latencies.items())}
+
+
+def replay(args):
+    """Replay workload and print report."""
+    config = {'database': args.database, 'pedantic': args.pedantic, 'warm': args.warm, 'prefetch': args.prefetch,
+              'batch': args.batch}
+    if args.trace:
+        events = list(read_trace(args.trace))
+    else:
+        events = synthetic_trace(pdg.connect(args.database, args.pedantic), args.synthetic, args.seed)
+    report = replay_benchmark(events * args.repeat, config, args.threads, args.processes, args.preload)
+    print('%d events (%d errors) in %.3f s with %d process(es) x %d thread(s): %.1f events/s' %
+          (report['events'], report['errors'], report['elapsed'], args.processes, args.threads,
+           report['throughput']), file=sys.stderr)
+    for method, stats in sorted(report['methods'].items()):
+        print('  %-22s %7d events  p50 %8.3f ms  p95 %8.3f ms  p99 %8.3f ms' %
+              (method, stats['events'], stats['p50'] * 1e3, stats['p95'] * 1e3, stats['p99'] * 1e3), file=sys.stderr)
+    latency = report['latency']
+    if latency:
+        print('  %-22s %7d events  p50 %8.3f ms  p95 %8.3f ms  p99 %8.3f ms' %
+              ('all', report['events'], latency['p50'] * 1e3, latency['p95'] * 1e3, latency['p99'] * 1e3),
+              file=sys.stderr)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+def memory(args):
+    """Run memory benchmark with and/or without preloading and print report."""
+    reports = []
+    for preload in ((True, False) if args.compare else (not args.no_preload,)):
+        report = memory_benchmark(args.database, args.workers, preload)
+        reports.append(report)
+        print('%-17s workers=%d  mean RSS %8.1f MB  mean PSS %8.1f MB  mean private %8.1f MB' %
+              ('preload' if preload else 'connect in worker', args.workers, report['mean_rss'] / 1e6,
+               report['mean_pss'] / 1e6, report['mean_private'] / 1e6), file=sys.stderr)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(reports, f, indent=2)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m pdg.bench', description='Benchmarks for PDG API deployments.')
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+    subparsers.required = True
+
+    memory_parser = subparsers.add_parser('memory', help='measure memory per worker process (Linux only)')
+    memory_parser.add_argument('--database', default=None,
+                               help='database URL (default: database distributed with the package)')
+    memory_parser.add_argument('--workers', type=int, default=4, help='number of worker processes (default: 4)')
+    memory_parser.add_argument('--no-preload', action='store_true', help='connect in each worker instead')
+    memory_parser.add_argument('--compare', action='store_true', help='run both with and without preloading')
+    memory_parser.add_argument('--output', default=None, help='file for report in JSON format')
+    memory_parser.set_defaults(function=memory)
+
+    replay_parser = subparsers.add_parser('replay', help='replay workload and measure throughput and latency')
+    replay_parser.add_argument('trace', nargs='?', default=None,
+                               help='trace file (JSON lines, see pdg.trace); default: synthetic workload')
+    replay_parser.add_argument('--synthetic', type=int, default=1000,
+                               help='number of events of synthetic workload (default: 1000)')
+    replay_parser.add_argument('--seed', type=int, default=0, help='random seed of synthetic workload (default: 0)')
+    replay_parser.add_argument('--repeat', type=int, default=1, help='number of times the workload is replayed')
+    replay_parser.add_argument('--threads', type=int, default=1, help='threads per process (default: 1)')
+    replay_parser.add_argument('--processes', type=int, default=1, help='worker processes (default: 1)')
+    replay_parser.add_argument('--database', default=None,
+                               help='database URL (default: database distributed with the package)')
+    replay_parser.add_argument('--pedantic', action='store_true', help='use pedantic mode')
+    replay_parser.add_argument('--warm', default=None, choices=('particles', 'all'), help='warm caches before replay')
+    replay_parser.add_argument('--prefetch', nargs='+', default=None, help='enable prefetching learned from traces')
+    replay_parser.add_argument('--batch', action='store_true', help='coalesce concurrent lookups (see pdg.batch)')
+    replay_parser.add_argument('--preload', action='store_true', help='preload API before forking processes')
+    replay_parser.add_argument('--output', default=None, help='file for report in JSON format')
+    replay_parser.set_defaults(function=replay)
+
+    args = parser.parse_args(argv)
+    return args.function(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
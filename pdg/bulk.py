@@ -0,0 +1,94 @@
+"""
+Bulk loading of PDG data.
+
+The functions in this module load the data for many PdgData objects with a small number of set-based
+queries and store it in the caches of these objects. Subsequent calls of methods such as
+PdgProperty.best_summary() or PdgParticle.mass are then served from the caches without further queries,
+while using exactly the same logic as for objects whose data is loaded lazily.
+"""
+
+from sqlalchemy import select, bindparam
+from pdg.data import PdgSummaryValue
+
+
+def load_properties(api, data_type_keys=None, edition=None):
+    """Return list of all properties of the given data types (or of all types) that have summary values in edition.
+
+    The PDG Identifier information and the summary values of the returned objects are loaded with a single query
+    joining the pdgid and pdgdata tables, which returns the PDG Identifier information with each summary value.
+    The properties are ordered as in the Summary Tables.
+    """
+    release = api.release
+    if edition is None:
+        edition = api.edition
+    pdgid_table = release.db.tables['pdgid']
+    pdgdata_table = release.db.tables['pdgdata']
+    # Columns of the pdgdata table are labeled with a prefix, since both tables have columns id, pdgid and sort
+    pdgid_columns = [column.name for column in pdgid_table.c]
+    pdgdata_columns = [column.name for column in pdgdata_table.c]
+    query = select(*([pdgid_table.c[name] for name in pdgid_columns] +
+                     [pdgdata_table.c[name].label('pdgdata_%s' % name) for name in pdgdata_columns]))
+    query = query.select_from(pdgdata_table.join(pdgid_table))
+    query = query.where(pdgdata_table.c.edition == bindparam('edition'))
+    if data_type_keys is not None:
+        query = query.where(pdgid_table.c.data_type.in_(bindparam('data_type_keys', expanding=True)))
+    query = query.order_by(pdgid_table.c.sort, pdgid_table.c.id, pdgdata_table.c.sort)
+    params = {'data_type_keys': list(data_type_keys or []), 'edition': edition}
+    properties = []
+    prop = None
+    with release.engine.connect() as conn:
+        for row in conn.execute(query, params):
+            row = row._mapping
+            if prop is None or row['id'] != prop.cache['pdgid']['id']:
+                prop = api.make(row['pdgid'], row['data_type'], edition)
+                prop.cache['pdgid'] = dict((name, row[name]) for name in pdgid_columns)
+                prop.cache['summary'] = []
+                properties.append(prop)
+            summary = PdgSummaryValue((name, row['pdgdata_%s' % name]) for name in pdgdata_columns)
+            summary['description'] = row['description']
+            prop.cache['summary'].append(summary)
+    return properties
+
+
+def load_particle_properties(api, particles, data_type_keys, properties=None):
+    """Load the properties of the given data types for all particles in particles.
+
+    After loading, methods such as PdgParticle.masses(), PdgParticle.mass or PdgParticle.width of these particles
+    are served without database queries. Properties are shared between different charge states of a particle.
+
+    properties can be set to a list of properties returned by load_properties() for the edition of the particles,
+    which is then used instead of querying the database.
+    """
+    particles = list(particles)
+    hierarchy = api.hierarchy_index()
+    for edition in set(p.edition for p in particles):
+        if properties is None:
+            edition_properties = load_properties(api, data_type_keys, edition)
+        else:
+            edition_properties = properties
+        by_id = dict((prop.baseid, prop) for prop in edition_properties)
+        for particle in particles:
+            if particle.edition != edition:
+                continue
+            # Same selection of descendant identifiers as PdgParticle.properties()
+            props = [by_id[pdgid] for pdgid in hierarchy.descendants(particle.baseid) if pdgid in by_id]
+            preloaded = particle.cache.setdefault('properties', dict())
+            for data_type_key in data_type_keys:
+                preloaded[data_type_key] = [prop for prop in props if prop.data_type == data_type_key]
+
+
+def load_particles(api, edition=None):
+    """Return list of PdgParticle objects for all particle charge states with MC IDs, with particle data loaded.
+
+    Particles are resolved in the same way as by PdgApi.get_particles_by_mcids(), and MC IDs that do not
+    resolve to a unique particle are omitted.
+    """
+    release = api.release
+    pdgparticle_table = release.db.tables['pdgparticle']
+    query = select(pdgparticle_table.c.mcid).distinct()
+    query = query.where(pdgparticle_table.c.entry_type == 'P')
+    query = query.where(pdgparticle_table.c.mcid.isnot(None))
+    query = query.order_by(pdgparticle_table.c.mcid)
+    with release.engine.connect() as conn:
+        mcids = [item[0] for item in conn.execute(query)]
+    return [p for p in api.get_particles_by_mcids(mcids, edition) if not isinstance(p, Exception)]
@@ -0,0 +1,132 @@
+"""
+Client for the local PDG lookup server (see pdg.server).
+
+This module only uses the Python standard library, so that programs using it start quickly. For example,
+
+from pdg.client import PdgClient
+client = PdgClient()
+print(client.particle(211)['mass'])
+print([s['pdg_values'][0]['value'] for s in client.summaries_many(['S008M', 'S009M'])])
+
+A PdgClient keeps a persistent connection to the server and must not be shared between threads without
+locking. Errors reported by the server are raised as PdgApiError, except that PdgInvalidPdgIdError is raised
+for PDG Identifiers that do not exist and PdgNoDataError for MC IDs without a unique particle.
+"""
+
+import json
+import socket
+try:
+    from http.client import HTTPConnection
+except ImportError:
+    from httplib import HTTPConnection
+from pdg.errors import PdgApiError, PdgInvalidPdgIdError, PdgNoDataError
+
+
+# Default address of the server
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+
+class UnixHTTPConnection(HTTPConnection):
+    """HTTP connection over a unix socket."""
+
+    def __init__(self, socket_path, timeout=None):
+        HTTPConnection.__init__(self, 'localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class PdgClient(object):
+    """Client for the local PDG lookup server."""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, timeout=None):
+        """Create client for the server at host and port or, if socket_path is set, at the given unix socket."""
+        self.host = host
+        self.port = port
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close the connection to the server."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _connect(self):
+        if self._connection is None:
+            if self.socket_path is not None:
+                self._connection = UnixHTTPConnection(self.socket_path, self.timeout)
+            else:
+                self._connection = HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return self._connection
+
+    def request(self, method, path, data=None, not_found=PdgNoDataError):
+        """Send request to the server and return the JSON document of the response.
+
+        The exception class not_found is raised if the server returns status 404, and PdgApiError for any other
+        error.
+        """
+        body = json.dumps(data) if data is not None else None
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        for attempt in (1, 2):
+            connection = self._connect()
+            try:
+                connection.request(method, path, body, headers)
+                response = connection.getresponse()
+                doc = json.loads(response.read().decode('utf-8'))
+                break
+            except (socket.error, IOError):
+                # Reconnect once if the server closed a persistent connection
+                self.close()
+                if attempt == 2:
+                    raise
+        if doc.get('status_code') == 404:
+            raise not_found(doc.get('status_message'))
+        if doc.get('status_code') != 200:
+            raise PdgApiError(doc.get('status_message'))
+        return doc
+
+    def info(self):
+        """Return metadata of the database used by the server."""
+        return self.request('GET', '/info')
+
+    def statistics(self):
+        """Return request counts, throughput and latency statistics of the server."""
+        return self.request('GET', '/statistics')
+
+    def summaries(self, pdgid, edition=None):
+        """Return summary data document (as in the PDG REST API) for PDG Identifier pdgid."""
+        path = '/summaries/%s' % pdgid
+        if edition is not None:
+            path = '%s/%s' % (path, edition)
+        return self.request('GET', path, not_found=PdgInvalidPdgIdError)
+
+    def summaries_many(self, pdgids, edition=None):
+        """Return list of summary data documents for a list of PDG Identifiers, using a single request."""
+        return self.request('POST', '/summaries', {'pdgids': list(pdgids), 'edition': edition})['results']
+
+    def particle(self, mcid, edition=None):
+        """Return dict with the basic data (see pdg.table) of the particle with MC ID mcid."""
+        path = '/particles/%s' % mcid
+        if edition is not None:
+            path = '%s/%s' % (path, edition)
+        return self.request('GET', path)
+
+    def particles(self, mcids, edition=None):
+        """Return list with the basic data of the particles with a list of MC IDs, using a single request.
+
+        Entries for MC IDs that cannot be resolved have a status_code other than 200 and a status_message.
+        """
+        return self.request('POST', '/particles', {'mcids': list(mcids), 'edition': edition})['results']
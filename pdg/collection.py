@@ -0,0 +1,172 @@
+"""
+Collections of particle properties with vectorized access to their PDG best values.
+
+A PdgPropertyCollection holds a list of PdgProperty objects (or objects of derived classes such as
+PdgBranchingFraction), whose PDG Identifier information and summary values are loaded with a small
+number of bulk queries when the collection is created. The best values, errors and limit flags of all
+properties can then be retrieved as numpy arrays, for example to sum all exclusive branching fractions
+of a particle with
+
+particle.exclusive_branching_fractions(collection=True).values().sum()
+
+Collections can be indexed like numpy arrays (e.g. with a boolean mask), sorted and filtered, which
+returns new collections. The array accessors require numpy.
+"""
+
+from sqlalchemy import select, bindparam
+from pdg.data import PdgSummaryValue
+from pdg.errors import PdgAmbiguousValueError, PdgNoDataError
+from pdg.utils import import_numpy, MAX_IN_CLAUSE_SIZE
+
+
+def load_summaries(api, properties):
+    """Load PDG Identifier information and summary values of all properties that do not have them in their caches.
+
+    For each edition, the data is loaded with two queries per MAX_IN_CLAUSE_SIZE properties.
+    """
+    release = api.release
+    pdgid_table = release.db.tables['pdgid']
+    pdgdata_table = release.db.tables['pdgdata']
+    query = select(pdgid_table).where(pdgid_table.c.pdgid.in_(bindparam('pdgids', expanding=True)))
+    summary_query = select(pdgdata_table, pdgid_table.c.description).join(pdgid_table)
+    summary_query = summary_query.where(pdgid_table.c.pdgid.in_(bindparam('pdgids', expanding=True)))
+    summary_query = summary_query.where(pdgdata_table.c.edition == bindparam('edition'))
+    summary_query = summary_query.order_by(pdgdata_table.c.sort)
+    by_edition = dict()
+    for prop in properties:
+        if 'pdgid' not in prop.cache or 'summary' not in prop.cache:
+            by_edition.setdefault(prop.edition, dict()).setdefault(prop.baseid, []).append(prop)
+    with release.engine.connect() as conn:
+        for edition, by_pdgid in by_edition.items():
+            pdgids = sorted(by_pdgid)
+            for i in range(0, len(pdgids), MAX_IN_CLAUSE_SIZE):
+                params = {'pdgids': pdgids[i:i+MAX_IN_CLAUSE_SIZE], 'edition': edition}
+                for pdgid in params['pdgids']:
+                    for prop in by_pdgid[pdgid]:
+                        prop.cache['summary'] = []
+                for row in conn.execute(query, params):
+                    for prop in by_pdgid[row.pdgid]:
+                        prop.cache['pdgid'] = row._mapping
+                for entry in conn.execute(summary_query, params):
+                    for prop in by_pdgid[entry.pdgid]:
+                        prop.cache['summary'].append(PdgSummaryValue(entry._mapping))
+
+
+class PdgPropertyCollection(object):
+    """List of particle properties with vectorized access to their PDG best values."""
+
+    def __init__(self, api, properties, load=True):
+        """Create collection of properties (an iterable of PdgProperty objects) from the database used by api.
+
+        Unless load is False, the data of the properties is loaded in bulk (see load_summaries()).
+        """
+        self.api = api
+        self.properties = list(properties)
+        if load:
+            load_summaries(api, self.properties)
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, [prop.pdgid for prop in self.properties])
+
+    def __len__(self):
+        return len(self.properties)
+
+    def __iter__(self):
+        return iter(self.properties)
+
+    def __getitem__(self, index):
+        """Return property for an integer index, or collection for a slice, list of indices or boolean mask."""
+        if isinstance(index, slice):
+            return self._subset(self.properties[index])
+        try:
+            return self.properties[index]
+        except TypeError:
+            pass
+        numpy = import_numpy()
+        index = numpy.asarray(index)
+        if index.dtype == bool:
+            index = numpy.flatnonzero(index)
+        return self._subset([self.properties[i] for i in index])
+
+    def _subset(self, properties):
+        """Return collection with the given properties, whose data is already loaded."""
+        return self.__class__(self.api, properties, load=False)
+
+    def filter(self, function):
+        """Return collection with the properties prop for which function(prop) is True."""
+        return self._subset([prop for prop in self.properties if function(prop)])
+
+    def sorted(self, key=None, reverse=False):
+        """Return collection sorted by key (a function of a property; default: best value)."""
+        if key is None:
+            values = self.values()
+            order = sorted(range(len(self)), key=lambda i: values[i], reverse=reverse)
+            return self._subset([self.properties[i] for i in order])
+        return self._subset(sorted(self.properties, key=key, reverse=reverse))
+
+    def best_summaries(self):
+        """Return list with the PDG best summary value of each property.
+
+        The list has None for properties without summary value and, in pedantic mode, for properties whose best
+        summary value is ambiguous, so that the array accessors give NaN for them.
+        """
+        summaries = []
+        for prop in self.properties:
+            try:
+                summaries.append(prop.best_summary())
+            except (PdgAmbiguousValueError, PdgNoDataError):
+                summaries.append(None)
+        return summaries
+
+    def _array(self, function, dtype=float, missing=float('nan')):
+        """Return array of function(summary) for the best summary of each property, or missing if not available."""
+        numpy = import_numpy()
+        values = []
+        for summary in self.best_summaries():
+            value = function(summary) if summary is not None else None
+            values.append(missing if value is None else value)
+        return numpy.array(values, dtype=dtype)
+
+    def pdgids(self):
+        """Return array of the PDG Identifiers of all properties."""
+        numpy = import_numpy()
+        pdgids = numpy.empty(len(self), dtype=object)
+        pdgids[:] = [prop.pdgid for prop in self.properties]
+        return pdgids
+
+    def descriptions(self):
+        """Return array of the descriptions of all properties."""
+        numpy = import_numpy()
+        descriptions = numpy.empty(len(self), dtype=object)
+        descriptions[:] = [prop.description for prop in self.properties]
+        return descriptions
+
+    def values(self, units=None):
+        """Return array of best values in units (default: units of each property), with NaN if not available."""
+        return self._array(lambda summary: summary.get_value(units))
+
+    def errors(self, units=None):
+        """Return array of symmetric errors of the best values (see PdgSummaryValue.get_error()), NaN if none."""
+        return self._array(lambda summary: summary.get_error(units))
+
+    def errors_positive(self, units=None):
+        """Return array of positive errors of the best values, with NaN if not available."""
+        return self._array(lambda summary: summary.get_error_positive(units)
+                           if summary.error_positive is not None else None)
+
+    def errors_negative(self, units=None):
+        """Return array of negative errors of the best values, with NaN if not available."""
+        return self._array(lambda summary: summary.get_error_negative(units)
+                           if summary.error_negative is not None else None)
+
+    def is_limit(self):
+        """Return boolean array, True where the best value is a limit."""
+        return self._array(lambda summary: summary.is_limit, bool, False)
+
+    def is_upper_limit(self):
+        """Return boolean array, True where the best value is an upper limit."""
+        return self._array(lambda summary: summary.is_upper_limit, bool, False)
+
+    def is_lower_limit(self):
+        """Return boolean array, True where the best value is a lower limit."""
+        return self._array(lambda summary: summary.is_lower_limit, bool, False)
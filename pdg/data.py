@@ -10,11 +10,12 @@ data, etc., that is shared by all classes supporting the retrieval of different
 particle physics properties such as branching fractions or particle masses.
 """
 
+import copy
 import pprint
 from sqlalchemy import select, bindparam, func
 from pdg.utils import parse_id, make_id
 from pdg.units import UNIT_CONVERSION_FACTORS, convert
-from pdg.errors import PdgApiError, PdgInvalidPdgIdError, PdgAmbiguousValueError
+from pdg.errors import PdgApiError, PdgInvalidPdgIdError, PdgNoDataError, PdgAmbiguousValueError, PdgBatcherClosedError
 
 
 class PdgSummaryValue(dict):
@@ -232,6 +233,12 @@ class PdgData(object):
     and is the base class for all PDG data container classes.
     """
 
+    # Map cache keys to the methods loading the corresponding data
+    cache_loaders = {
+        'pdgid': '_get_pdgid',
+        'summary': '_get_summary_values',
+    }
+
     def __init__(self, api, pdgid, edition=None):
         """Instantiate a PdgData object for the given PDG Identifier pdgid.
 
@@ -253,6 +260,7 @@ class PdgData(object):
             self._edition = self.api.edition
         self.pdgid = make_id(self.baseid, self._edition)
         self.cache = dict()
+        self.data_release = self.api.data_release
 
     def __str__(self):
         return 'Data for PDG Identifier %s: %s' % (self.pdgid, self.description)
@@ -262,10 +270,23 @@ class PdgData(object):
 
     def _get_pdgid(self):
         """Get PDG Identifier information."""
+        release = self.api.release
+        if 'pdgid' not in self.cache:
+            hierarchy = release.cache.get('hierarchy_index')
+            if hierarchy is not None and self.baseid in hierarchy.rows:
+                self.cache['pdgid'] = hierarchy.rows[self.baseid]
+                self.api._count('shared.pdgid')
+        batcher = self.api.batcher
+        if 'pdgid' not in self.cache and batcher is not None:
+            try:
+                self.cache['pdgid'] = batcher.get_pdgid(self.pdgid)
+            except PdgBatcherClosedError:
+                pass
         if 'pdgid' not in self.cache:
-            pdgid_table = self.api.db.tables['pdgid']
+            self.api._count('query.pdgid')
+            pdgid_table = release.db.tables['pdgid']
             query = select(pdgid_table).where(pdgid_table.c.pdgid == bindparam('pdgid'))
-            with self.api.engine.connect() as conn:
+            with release.engine.connect() as conn:
                 try:
                     self.cache['pdgid'] = conn.execute(query, {'pdgid': self.baseid}).fetchone()._mapping
                 except AttributeError:
@@ -275,25 +296,46 @@ class PdgData(object):
     def _get_summary_values(self):
         """Get all summary data values."""
         if 'summary' not in self.cache:
-            pdgid_table = self.api.db.tables['pdgid']
-            pdgdata_table = self.api.db.tables['pdgdata']
+            self.api._access('summary_values', self.baseid, self.edition)
+            release = self.api.release
+            shared = release.cache.get(('summary', str(self.edition)), {})
+            if self.baseid in shared:
+                self.cache['summary'] = list(shared[self.baseid])
+                self.api._count('shared.summary')
+                return self.cache['summary']
+            self.api._count('query.summary')
+            pdgid_table = release.db.tables['pdgid']
+            pdgdata_table = release.db.tables['pdgdata']
             query = select(pdgdata_table, pdgid_table.c.description).join(pdgid_table)
             query = query.where(pdgid_table.c.pdgid == bindparam('pdgid'))
             query = query.where(pdgdata_table.c.edition == bindparam('edition'))
             query = query.order_by(pdgdata_table.c.sort)
             self.cache['summary'] = []
-            with self.api.engine.connect() as conn:
+            with release.engine.connect() as conn:
                 for entry in conn.execute(query, {'pdgid': self.baseid, 'edition': self.edition}):
                     self.cache['summary'].append(PdgSummaryValue(entry._mapping))
         return self.cache['summary']
 
+    def _load_cache(self, api):
+        """Return a new cache with the same kinds of data as the current one, loaded through api."""
+        item = copy.copy(self)
+        item.api = api
+        item.cache = dict()
+        for key in self.cache:
+            try:
+                getattr(item, self.cache_loaders[key])()
+            except (KeyError, PdgInvalidPdgIdError, PdgNoDataError, PdgAmbiguousValueError):
+                pass
+        return item.cache
+
     def _count_data_entries(self, pdgid, edition):
         """Count number of data entries for a given PDG identifier and edition."""
-        pdgdata_table = self.api.db.tables['pdgdata']
+        release = self.api.release
+        pdgdata_table = release.db.tables['pdgdata']
         query = select(func.count("*")).select_from(pdgdata_table)
         query = query.where(pdgdata_table.c.pdgid == bindparam('pdgid'))
         query = query.where(pdgdata_table.c.edition == bindparam('edition'))
-        with self.api.engine.connect() as conn:
+        with release.engine.connect() as conn:
             return conn.execute(query, {'pdgid': pdgid.upper(), 'edition': edition}).scalar()
 
     def get_parent_pdgid(self, include_edition=True):
@@ -303,12 +345,41 @@ class PdgData(object):
         else:
             return self._get_pdgid()['parent_pdgid']
 
+    def _make_related(self, pdgid):
+        """Return PdgData object for another PDG Identifier, for the same edition, with PDG Identifier info loaded."""
+        row = self.api.hierarchy_index().rows[pdgid]
+        item = self.api.make(make_id(pdgid, self.edition), row['data_type'], self.edition)
+        item.cache['pdgid'] = row
+        return item
+
+    def children(self):
+        """Return list of PdgData objects for the PDG Identifiers whose parent is this one."""
+        return [self._make_related(pdgid) for pdgid in self.api.hierarchy_index().children(self.baseid)]
+
+    def descendants(self):
+        """Return list of PdgData objects for all PDG Identifiers below this one, ordered as in the Summary Tables."""
+        return [self._make_related(pdgid) for pdgid in self.api.hierarchy_index().descendants(self.baseid)]
+
+    def ancestors(self):
+        """Return list of PdgData objects for the PDG Identifiers above this one, starting with its parent."""
+        return [self._make_related(pdgid) for pdgid in self.api.hierarchy_index().ancestors(self.baseid)]
+
     def get_particle(self):
         """Return PdgParticle for this property's particle."""
-        p = self
-        while p.baseid != p.get_parent_pdgid(False) and p.get_parent_pdgid(False):
-            p = self.api.get(p.get_parent_pdgid())
-        return p
+        ancestors = self.api.hierarchy_index().ancestors(self.baseid)
+        if not ancestors:
+            return self
+        return self._make_related(ancestors[-1])
+
+    def refresh(self):
+        """Invalidate cache, so that data is reloaded from the data release currently used by the API."""
+        self.cache = dict()
+        self.data_release = self.api.data_release
+
+    @property
+    def is_stale(self):
+        """True if this object was loaded from a data release other than the one currently used by the API."""
+        return self.data_release != self.api.data_release
 
     @property
     def edition(self):
@@ -318,9 +389,11 @@ class PdgData(object):
     @edition.setter
     def edition(self, edition):
         """Set year of edition used for retrieving data (invalidates cache)."""
+        if self.api.federation is not None:
+            self.api = self.api.federation.api_for_edition(edition)
         self._edition = edition
         self.pdgid = make_id(self.baseid, self._edition)
-        self.cache = dict()
+        self.refresh()
 
     @property
     def description(self):
@@ -2,7 +2,17 @@
 Classes supporting decays and branching fractions/ratios.
 """
 
-from pdg.data import PdgProperty
+import collections
+from sqlalchemy import select, bindparam
+from pdg.data import PdgProperty, PdgSummaryValue
+from pdg.bulk import load_properties
+from pdg.errors import PdgAmbiguousValueError
+from pdg.utils import import_numpy, make_id, matches_data_type_key, MAX_IN_CLAUSE_SIZE
+
+
+# Data type codes of exclusive and of all branching fractions, including subdecay modes
+EXCLUSIVE_BRANCHING_FRACTION_KEYS = ('BFX', 'BFX1', 'BFX2', 'BFX3', 'BFX4', 'BFX5')
+BRANCHING_FRACTION_KEYS = EXCLUSIVE_BRANCHING_FRACTION_KEYS + ('BFI', 'BFI1', 'BFI2', 'BFI3', 'BFI4', 'BFI5')
 
 
 class PdgBranchingFraction(PdgProperty):
@@ -31,3 +41,198 @@ class PdgBranchingFraction(PdgProperty):
             return int(self.data_type[3])
         else:
             return 0
+
+
+class PdgBranchingFractionMatrix(object):
+    """Branching fractions of all particles as a sparse particles x decay modes matrix.
+
+    The matrix is stored in compressed sparse row (CSR) format: the decay modes of the particle in row i are
+    those with indices indptr[i] to indptr[i+1] in the per-mode arrays modes, descriptions, values,
+    errors_positive, errors_negative, is_limit, is_upper_limit, subdecay_level and mode_number. Each decay mode
+    is a separate column, so that the column index of a mode is its index in these arrays. Values are the PDG
+    best values (see PdgProperty.best_summary()), with NaN where no best value can be determined, and errors
+    are NaN where not available. This class requires numpy.
+
+    The branching fractions and their summary values are loaded with a single query (see load_properties()).
+    Decay modes (including subdecay modes) are assigned to the closest particle above them in the hierarchy of
+    PDG Identifiers (see PdgApi.hierarchy_index(), which is built with one more query on first use). Modes that
+    are not below a particle (e.g. the modes of the B+-/B0 admixture, S049) are not included.
+    """
+
+    def __init__(self, api, edition=None, exclusive_only=True):
+        """Build matrix from the branching fractions with summary values in the given (or the default) edition.
+
+        If exclusive_only is True, only exclusive branching fractions (including subdecay modes) are included.
+        """
+        numpy = import_numpy()
+        keys = EXCLUSIVE_BRANCHING_FRACTION_KEYS if exclusive_only else BRANCHING_FRACTION_KEYS
+        properties = load_properties(api, keys, edition)
+        hierarchy = api.hierarchy_index()
+        by_particle = collections.OrderedDict()
+        for prop in properties:
+            # Subdecay modes have their parent mode (or a mode not included here) as parent
+            particle = hierarchy.particle_ancestor(prop.baseid)
+            if particle is not None:
+                by_particle.setdefault(particle, []).append(prop)
+        self.particles = numpy.empty(len(by_particle), dtype=object)
+        self.particles[:] = list(by_particle)
+        self.properties = [prop for props in by_particle.values() for prop in props]
+        self.indptr = numpy.cumsum([0] + [len(props) for props in by_particle.values()])
+        self.indices = numpy.arange(len(self.properties))
+        summaries = []
+        for prop in self.properties:
+            try:
+                summaries.append(prop.best_summary())
+            except PdgAmbiguousValueError:
+                summaries.append(None)
+        self.modes = numpy.empty(len(self.properties), dtype=object)
+        self.modes[:] = [prop.baseid for prop in self.properties]
+        self.descriptions = numpy.empty(len(self.properties), dtype=object)
+        self.descriptions[:] = [prop.description for prop in self.properties]
+        self.values = self._array(summaries, 'value')
+        self.errors_positive = self._array(summaries, 'error_positive')
+        self.errors_negative = self._array(summaries, 'error_negative')
+        self.is_limit = numpy.array([s is not None and s.is_limit for s in summaries], dtype=bool)
+        self.is_upper_limit = numpy.array([s is not None and s.is_upper_limit for s in summaries], dtype=bool)
+        self.subdecay_level = numpy.array([prop.subdecay_level for prop in self.properties], dtype=int)
+        self.mode_number = numpy.array([prop.mode_number if prop.mode_number is not None else -1
+                                        for prop in self.properties], dtype=int)
+        self.row = numpy.repeat(numpy.arange(len(self.particles)), numpy.diff(self.indptr))
+
+    @staticmethod
+    def _array(summaries, key):
+        """Return float array of the given item of summaries, with NaN for missing values."""
+        numpy = import_numpy()
+        return numpy.array([s[key] if s is not None and s[key] is not None else numpy.nan for s in summaries],
+                           dtype=float)
+
+    @property
+    def shape(self):
+        """Number of particles and number of decay modes."""
+        return len(self.particles), len(self.modes)
+
+    def row_index(self, pdgid):
+        """Return row index of the particle with the given PDG Identifier."""
+        numpy = import_numpy()
+        matches = numpy.flatnonzero(self.particles == pdgid)
+        if len(matches) == 0:
+            raise KeyError(pdgid)
+        return int(matches[0])
+
+    def row_slice(self, pdgid):
+        """Return slice selecting the decay modes of the particle with the given PDG Identifier."""
+        i = self.row_index(pdgid)
+        return slice(self.indptr[i], self.indptr[i+1])
+
+    def _mode_mask(self, max_level, include_limits):
+        """Return mask of modes up to subdecay level max_level with a value, optionally excluding limits."""
+        numpy = import_numpy()
+        mask = (self.subdecay_level <= max_level) & ~numpy.isnan(self.values)
+        if not include_limits:
+            mask &= ~self.is_limit
+        return mask
+
+    def row_sums(self, max_level=0, include_limits=False):
+        """Return array with the sum of the branching fractions of each particle.
+
+        By default, only modes that are not subdecay modes and values that are not limits are summed. max_level
+        can be set to include subdecay modes up to this level, and include_limits to True to include limits.
+        """
+        numpy = import_numpy()
+        mask = self._mode_mask(max_level, include_limits)
+        return numpy.bincount(self.row[mask], self.values[mask], minlength=len(self.particles))
+
+    def row_sum_errors(self, max_level=0, include_limits=False):
+        """Return array with the errors of row_sums(), adding the average errors of the modes in quadrature."""
+        numpy = import_numpy()
+        mask = self._mode_mask(max_level, include_limits) & ~self.is_limit
+        errors = numpy.nan_to_num((self.errors_positive + self.errors_negative) / 2.0)
+        return numpy.sqrt(numpy.bincount(self.row[mask], errors[mask]**2, minlength=len(self.particles)))
+
+    def is_overnormalized(self, n_sigma=3.0, max_level=0):
+        """Return boolean array, True for particles whose branching fractions add up to more than one.
+
+        The sum of the branching fractions (excluding limits) of a particle must exceed one by more than n_sigma
+        times its error (see row_sum_errors()). Since the Summary Tables list only some of the decay modes
+        of most particles, sums smaller than one are not flagged.
+        """
+        return self.row_sums(max_level) - n_sigma * self.row_sum_errors(max_level) > 1.0
+
+
+class PdgDecayModeNode(object):
+    """Node of the tree of decay modes of a particle, as shown (indented) in the Summary Tables.
+
+    Each node holds a PdgBranchingFraction (None for the root node of the tree), whose PDG Identifier information
+    and summary values are already loaded, and the list of its subdecay modes as child nodes.
+    """
+
+    def __init__(self, branching_fraction=None, parent=None):
+        self.branching_fraction = branching_fraction
+        self.parent = parent
+        self.children = []
+
+    def __repr__(self):
+        pdgid = self.branching_fraction.pdgid if self.branching_fraction is not None else None
+        return '%s(%r, %i children)' % (self.__class__.__name__, pdgid, len(self.children))
+
+    def __str__(self):
+        lines = []
+        for node in self.walk():
+            summary = node.branching_fraction.best_summary()
+            value = summary.display_value_text if summary is not None else ''
+            lines.append('%-12s %-60s %s' % (node.branching_fraction.baseid,
+                                             '  ' * node.level + node.branching_fraction.description, value))
+        return '\n'.join(lines)
+
+    @property
+    def level(self):
+        """Subdecay level of the decay mode of this node (-1 for the root node)."""
+        if self.branching_fraction is None:
+            return -1
+        return self.branching_fraction.subdecay_level
+
+    def walk(self):
+        """Return iterator over all nodes below this node, in the order of the Summary Tables (depth first)."""
+        for child in self.children:
+            yield child
+            for node in child.walk():
+                yield node
+
+
+def load_decay_mode_tree(particle, data_type_key='BF%', require_summary_data=True):
+    """Return root PdgDecayModeNode of the tree of decay modes of particle (see PdgParticle.decay_mode_tree())."""
+    api = particle.api
+    release = api.release
+    pdgid_table = release.db.tables['pdgid']
+    pdgdata_table = release.db.tables['pdgdata']
+    data_columns = [c.label('pdgdata_%s' % c.name) for c in pdgdata_table.c]
+    on_clause = (pdgdata_table.c.pdgid_id == pdgid_table.c.id) & (pdgdata_table.c.edition == bindparam('edition'))
+    query = select(pdgid_table.c.pdgid, pdgid_table.c.description, *data_columns)
+    query = query.select_from(pdgid_table.join(pdgdata_table, on_clause, isouter=not require_summary_data))
+    query = query.where(pdgid_table.c.pdgid.in_(bindparam('pdgids', expanding=True)))
+    query = query.order_by(pdgid_table.c.sort, pdgid_table.c.id, pdgdata_table.c.sort)
+    root = PdgDecayModeNode()
+    stack = [root]
+    with release.engine.connect() as conn:
+        # Decay modes are selected from the PDG Identifier hierarchy and read in chunks in Summary Table order
+        hierarchy = api.hierarchy_index(release)
+        pdgids = [pdgid for pdgid in hierarchy.descendants(particle.baseid)
+                  if matches_data_type_key(hierarchy.rows[pdgid]['data_type'], data_type_key)]
+        chunks = [pdgids[i:i+MAX_IN_CLAUSE_SIZE] for i in range(0, len(pdgids), MAX_IN_CLAUSE_SIZE)]
+        rows = (row for chunk in chunks for row in conn.execute(query, {'pdgids': chunk, 'edition': particle.edition}))
+        for row in rows:
+            node = stack[-1]
+            if node.branching_fraction is None or node.branching_fraction.baseid != row.pdgid:
+                branching_fraction = PdgBranchingFraction(api, make_id(row.pdgid, particle.edition), particle.edition)
+                branching_fraction.cache['pdgid'] = hierarchy.rows[row.pdgid]
+                branching_fraction.cache['summary'] = []
+                while stack[-1].level >= branching_fraction.subdecay_level:
+                    stack.pop()
+                node = PdgDecayModeNode(branching_fraction, stack[-1])
+                stack[-1].children.append(node)
+                stack.append(node)
+            if row.pdgdata_id is not None:
+                summary = dict((c.name, row._mapping['pdgdata_%s' % c.name]) for c in pdgdata_table.c)
+                summary['description'] = row.description
+                node.branching_fraction.cache['summary'].append(PdgSummaryValue(summary))
+    return root
@@ -0,0 +1,144 @@
+"""
+Differences between editions of the Review of Particle Physics.
+
+The summary values of two editions are read with a single query ordered by PDG Identifier, and the values
+for each PDG Identifier are compared as soon as all of them have been read. Changes are therefore
+returned as a stream, and memory use does not grow with the size of the database.
+
+Within a PDG Identifier, values of the same value type are paired in the order in which they are listed
+in the Summary Tables. Values without a partner in the other edition are reported as added or removed.
+"""
+
+import itertools
+import math
+try:
+    from itertools import zip_longest
+except ImportError:
+    from itertools import izip_longest as zip_longest
+from sqlalchemy import select, bindparam
+from pdg.data import PdgSummaryValue
+
+
+# Columns compared to decide whether a summary value has changed
+COMPARED_COLUMNS = ('value', 'error_positive', 'error_negative', 'unit_text', 'limit_type', 'confidence_level',
+                    'display_value_text', 'in_summary_table')
+
+
+class PdgEditionChange(object):
+    """A summary value that was added, removed or changed between two editions."""
+
+    def __init__(self, status, pdgid, data_type, description, old, new):
+        self.status = status
+        self.pdgid = pdgid
+        self.data_type = data_type
+        self.description = description
+        self.old = old
+        self.new = new
+
+    def __repr__(self):
+        return '%s(%r, %r)' % (self.__class__.__name__, self.status, self.pdgid)
+
+    def __str__(self):
+        old = self.old.display_value_text if self.old is not None else '-'
+        new = self.new.display_value_text if self.new is not None else '-'
+        return '%-8s %-12s %-40s %s -> %s' % (self.status, self.pdgid, self.description, old, new)
+
+    @property
+    def shift(self):
+        """Change of the central value in the units of the old value, or None."""
+        try:
+            return self.new.get_value(self.old['unit_text'] or None) - self.old.get_value()
+        except TypeError:
+            return None
+
+    @property
+    def relative_shift(self):
+        """Change of the central value relative to the old value, or None."""
+        shift = self.shift
+        if shift is None or not self.old.get_value():
+            return None
+        return shift / abs(self.old.get_value())
+
+    @property
+    def shift_sigma(self):
+        """Change of the central value in units of the old and new errors added in quadrature, or None.
+
+        The errors are the averages of the positive and negative errors. None is returned if either value
+        is a limit or if both errors are zero or missing.
+        """
+        shift = self.shift
+        if shift is None or self.old.is_limit or self.new.is_limit:
+            return None
+        sigma = math.hypot(self._average_error(self.old, self.old['unit_text']),
+                           self._average_error(self.new, self.old['unit_text']))
+        if sigma == 0:
+            return None
+        return abs(shift) / sigma
+
+    @property
+    def relative_error_shift(self):
+        """Change of the (average) error relative to the old error, or None."""
+        if self.status != 'changed' or self.old.is_limit or self.new.is_limit:
+            return None
+        old_error = self._average_error(self.old, self.old['unit_text'])
+        if old_error == 0:
+            return None
+        return self._average_error(self.new, self.old['unit_text']) / old_error - 1
+
+    @staticmethod
+    def _average_error(summary, units):
+        """Return average of positive and negative errors of summary in units, with missing errors as zero."""
+        try:
+            return (summary.get_error_positive(units or None) + summary.get_error_negative(units or None)) / 2.0
+        except TypeError:
+            return 0.0
+
+
+def _compare(old_values, new_values):
+    """Yield (status, old, new) tuples for the summary values of a single PDG Identifier in two editions."""
+    for value_type in sorted(set(v['value_type'] or '' for v in old_values + new_values)):
+        old = [v for v in old_values if (v['value_type'] or '') == value_type]
+        new = [v for v in new_values if (v['value_type'] or '') == value_type]
+        for old_value, new_value in zip_longest(old, new):
+            if old_value is None:
+                yield 'added', None, new_value
+            elif new_value is None:
+                yield 'removed', old_value, None
+            elif any(old_value[c] != new_value[c] for c in COMPARED_COLUMNS):
+                yield 'changed', old_value, new_value
+
+
+def diff_editions(api, old, new, data_type_key=None, min_sigma=None):
+    """Return iterator over PdgEditionChange objects for the summary values that differ between editions old and new.
+
+    data_type_key can be set to select specific data types (see PdgApi.doc_data_type_keys()). The SQL
+    wildcard character ('%') is allowed. If min_sigma is set, only changed values whose central value shifted
+    by at least min_sigma (see PdgEditionChange.shift_sigma) are returned. Changes are ordered as in the
+    Summary Tables.
+    """
+    release = api.release
+    pdgid_table = release.db.tables['pdgid']
+    pdgdata_table = release.db.tables['pdgdata']
+    query = select(pdgdata_table, pdgid_table.c.description, pdgid_table.c.data_type).join(pdgid_table)
+    query = query.where(pdgdata_table.c.edition.in_([bindparam('old'), bindparam('new')]))
+    if data_type_key is not None:
+        if '%' in data_type_key:
+            query = query.where(pdgid_table.c.data_type.like(bindparam('data_type_key')))
+        else:
+            query = query.where(pdgid_table.c.data_type == bindparam('data_type_key'))
+    query = query.order_by(pdgid_table.c.sort, pdgid_table.c.id, pdgdata_table.c.sort)
+    params = {'old': str(old), 'new': str(new), 'data_type_key': data_type_key}
+    with release.engine.connect() as conn:
+        rows = conn.execution_options(yield_per=1000).execute(query, params)
+        for pdgid_id, group in itertools.groupby(rows, lambda row: row.pdgid_id):
+            values = {str(old): [], str(new): []}
+            for row in group:
+                values[row.edition].append(PdgSummaryValue(row._mapping))
+            first = (values[str(old)] or values[str(new)])[0]
+            for status, old_value, new_value in _compare(values[str(old)], values[str(new)]):
+                change = PdgEditionChange(status, first.pdgid, first['data_type'], first.description,
+                                          old_value, new_value)
+                if min_sigma is not None:
+                    if change.status != 'changed' or change.shift_sigma is None or change.shift_sigma < min_sigma:
+                        continue
+                yield change
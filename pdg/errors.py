@@ -26,3 +26,8 @@ class PdgAmbiguousValueError(Exception):
 class PdgRoundingError(Exception):
     """Exception raised in cases where PDG rounding is undefined."""
     pass
+
+
+class PdgBatcherClosedError(RuntimeError):
+    """Exception raised when submitting a lookup to a PdgBatcher that has been closed."""
+    pass
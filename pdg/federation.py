@@ -0,0 +1,152 @@
+"""
+Access to PDG data distributed over several databases.
+
+Data from different editions of the Review of Particle Physics may be distributed as separate database
+files. PdgApiFederation combines several PdgApi objects and routes each request to the database holding
+the requested edition, so that data from all editions can be accessed as if it came from a single database.
+"""
+
+from pdg.errors import PdgNoDataError
+from pdg.utils import parse_id
+
+
+class PdgApiFederation(object):
+    """PDG API routing requests to one of several PdgApi objects depending on the requested edition."""
+
+    def __init__(self, apis):
+        """Initialize federation from a list of PdgApi objects.
+
+        If an edition is available from more than one database, data is taken from the database whose
+        default edition it is or, if there is no such database, from the first one in apis providing the edition.
+        """
+        self.apis = list(apis)
+        if len(self.apis) == 0:
+            raise PdgNoDataError('No databases given')
+        for api in self.apis:
+            api.federation = self
+        self._update_routes()
+
+    def __str__(self):
+        return '\n\n'.join(str(api) for api in self.apis)
+
+    def _fan_out(self, function):
+        """Call function for each database in parallel and return list of results."""
+        try:
+            from concurrent.futures import ThreadPoolExecutor
+        except ImportError:
+            # Python 2 without the futures backport: call function for one database after the other
+            return [function(api) for api in self.apis]
+        with ThreadPoolExecutor(max_workers=len(self.apis)) as executor:
+            return list(executor.map(function, self.apis))
+
+    def _update_routes(self):
+        """Determine the database providing each edition from the editions currently in the databases."""
+        routes = dict()
+        for api, editions in zip(self.apis, self._fan_out(lambda api: api.editions)):
+            for edition in editions:
+                routes.setdefault(edition, api)
+            if api.default_edition in editions and routes[api.default_edition] is not api:
+                # The default edition of a database takes precedence over other databases providing it
+                if routes[api.default_edition].default_edition != api.default_edition:
+                    routes[api.default_edition] = api
+        self._routes = routes
+
+    def _editions_of(self, api):
+        """Return list of the editions for which requests are routed to api, most recent first."""
+        return sorted((edition for edition, routed in self._routes.items() if routed is api), reverse=True)
+
+    def api_for_edition(self, edition=None):
+        """Return the PdgApi object providing data for the given edition (or for the default edition)."""
+        if edition is None:
+            edition = self.default_edition
+        try:
+            return self._routes[str(edition)]
+        except KeyError:
+            raise PdgNoDataError('No database with data for edition %s' % edition)
+
+    def _api_for_id(self, pdgid, edition=None):
+        """Return the PdgApi object for a PDG Identifier that may include the edition."""
+        return self.api_for_edition(parse_id(pdgid)[1] or edition)
+
+    @property
+    def pedantic(self):
+        """Pedantic mode of the databases in this federation."""
+        return self.apis[0].pedantic
+
+    @pedantic.setter
+    def pedantic(self, pedantic):
+        for api in self.apis:
+            api.pedantic = pedantic
+
+    @property
+    def editions(self):
+        """List of all editions of the Review for which any of the databases has data."""
+        return sorted(self._routes.keys(), reverse=True)
+
+    @property
+    def default_edition(self):
+        """Return the most recent default edition of any of the databases."""
+        return max(api.default_edition for api in self.apis)
+
+    @property
+    def edition(self):
+        """Edition of the Review of Particle Physics used by default."""
+        return self.default_edition
+
+    def info(self, key, edition=None):
+        """Return metadata info specified by key from the database for the given (or the default) edition."""
+        return self.api_for_edition(edition).info(key)
+
+    def reload(self, force=False):
+        """Switch each database to a new data release, if available (see PdgApi.reload()).
+
+        The routing of editions to databases is updated if any database switched to a new release.
+        """
+        reloaded = any(self._fan_out(lambda api: api.reload(force)))
+        if reloaded:
+            self._update_routes()
+        return reloaded
+
+    def get(self, pdgid, edition=None):
+        """Return PdgData object for given PDG Identifier from the database holding the requested edition.
+
+        See PdgApi.get() for details.
+        """
+        return self._api_for_id(pdgid, edition).get(pdgid, edition)
+
+    def get_all(self, data_type_key=None, edition=None):
+        """Return iterator over all PDG Identifiers / quantities.
+
+        If edition is set, the request is routed to the database holding this edition. Otherwise, the
+        PDG Identifiers are retrieved from all databases in parallel, and for each database objects
+        for its default edition are returned, or for the most recent edition routed to it if its default
+        edition is provided by another database or not at all. Databases to which no edition is routed are skipped.
+        See PdgApi.get_all() for details.
+        """
+        if edition is not None:
+            return self.api_for_edition(edition).get_all(data_type_key, edition)
+
+        def get_all(api):
+            editions = self._editions_of(api)
+            if not editions:
+                return []
+            api_edition = api.default_edition if api.default_edition in editions else editions[0]
+            return list(api.get_all(data_type_key, api_edition))
+        results = self._fan_out(get_all)
+        return (item for items in results for item in items)
+
+    def get_particle_by_name(self, name, case_sensitive=True, edition=None):
+        """Get particle by its name from the database holding the requested edition."""
+        return self.api_for_edition(edition).get_particle_by_name(name, case_sensitive, edition)
+
+    def get_particle_by_mcid(self, mcid, edition=None):
+        """Get particle by its MC ID from the database holding the requested edition."""
+        return self.api_for_edition(edition).get_particle_by_mcid(mcid, edition)
+
+    def get_particles_by_mcids(self, mcids, edition=None):
+        """Get particles for a list of MC IDs from the database holding the requested edition."""
+        return self.api_for_edition(edition).get_particles_by_mcids(mcids, edition)
+
+    def get_particles(self, edition=None):
+        """Return iterator over all particles from the database holding the requested edition."""
+        return self.api_for_edition(edition).get_particles(edition)
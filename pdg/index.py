@@ -0,0 +1,414 @@
+"""
+In-memory indexes over PDG data.
+
+Indexes are built once using bulk queries (see module pdg.bulk) and are kept in the release cache
+of the API, so that they are discarded when switching to a new data release (see PdgApi.reload()).
+"""
+
+import bisect
+import collections
+import copy
+import re
+from sqlalchemy import select
+from pdg.bulk import load_particles, load_particle_properties, load_properties
+from pdg.decay import BRANCHING_FRACTION_KEYS
+from pdg.errors import PdgApiError, PdgNoDataError, PdgAmbiguousValueError
+from pdg.units import convert
+from pdg.utils import import_numpy
+
+
+class PdgHierarchyIndex(object):
+    """Parent/child hierarchy of all PDG Identifiers.
+
+    The index is built from a single query over the pdgid table and holds the PDG Identifier information of all
+    identifiers, so that children, descendants and ancestors of an identifier are found without database queries.
+    Identifiers are always given without edition.
+    """
+
+    def __init__(self, api, release=None):
+        """Build hierarchy index of all PDG Identifiers in the database used by api (or of the given PdgRelease)."""
+        release = release or api.release
+        pdgid_table = release.db.tables['pdgid']
+        query = select(pdgid_table).order_by(pdgid_table.c.sort, pdgid_table.c.id)
+        self.rows = dict()
+        self.order = dict()
+        self._children = dict()
+        with release.engine.connect() as conn:
+            for i, row in enumerate(conn.execute(query)):
+                self.rows[row.pdgid] = row._mapping
+                self.order[row.pdgid] = i
+                if row.parent_pdgid is not None and row.parent_pdgid != row.pdgid:
+                    self._children.setdefault(row.parent_pdgid, []).append(row.pdgid)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, pdgid):
+        return pdgid in self.rows
+
+    def children(self, pdgid):
+        """Return list of the PDG Identifiers whose parent is pdgid, ordered as in the Summary Tables."""
+        return list(self._children.get(pdgid, []))
+
+    def descendants(self, pdgid):
+        """Return list of all PDG Identifiers below pdgid in the hierarchy, ordered as in the Summary Tables."""
+        result = []
+        stack = [pdgid]
+        while stack:
+            children = self._children.get(stack.pop(), [])
+            result.extend(children)
+            stack.extend(children)
+        return sorted(result, key=self.order.__getitem__)
+
+    def ancestors(self, pdgid):
+        """Return list of the PDG Identifiers above pdgid in the hierarchy, starting with its parent."""
+        result = []
+        row = self.rows.get(pdgid)
+        while row is not None and row['parent_pdgid'] is not None and row['parent_pdgid'] != row['pdgid']:
+            if row['parent_pdgid'] in result:
+                break
+            result.append(row['parent_pdgid'])
+            row = self.rows.get(row['parent_pdgid'])
+        return result
+
+    def particle_ancestor(self, pdgid):
+        """Return the PDG Identifier of the closest particle (data type 'PART') above pdgid, or None if there is none."""
+        for ancestor in self.ancestors(pdgid):
+            if self.rows[ancestor]['data_type'] == 'PART':
+                return ancestor
+        return None
+
+
+class PdgMassIndex(object):
+    """Particles sorted by their PDG best mass, for fast mass window queries.
+
+    The index contains all particle charge states with an MC ID and a best mass, where best masses
+    and widths are determined in exactly the same way as by PdgParticle.mass and PdgParticle.width.
+    """
+
+    def __init__(self, api, edition=None):
+        """Build mass index for the given (or the default) edition."""
+        particles = load_particles(api, edition)
+        load_particle_properties(api, particles, ('M', 'G', 'T'))
+        entries = []
+        for particle in particles:
+            try:
+                mass = particle.mass
+            except (PdgNoDataError, PdgAmbiguousValueError):
+                continue
+            if mass is None:
+                continue
+            try:
+                width = particle.width or 0.
+            except (PdgNoDataError, PdgAmbiguousValueError):
+                width = 0.
+            entries.append((mass, width, particle))
+        entries.sort(key=lambda entry: entry[0])
+        self.masses = [entry[0] for entry in entries]
+        self.widths = [entry[1] for entry in entries]
+        self.particles = [entry[2] for entry in entries]
+        self.max_width = max(self.widths) if self.widths else 0.
+
+    def __len__(self):
+        return len(self.particles)
+
+    def _matches(self, i, lo, hi, n_widths):
+        """True if particle i has a mass within n_widths widths of the window [lo, hi]."""
+        return self.masses[i] + n_widths*self.widths[i] >= lo and self.masses[i] - n_widths*self.widths[i] <= hi
+
+    def find(self, lo, hi, units='GeV', n_widths=0):
+        """Return list of particles whose best mass is in the window [lo, hi] given in units.
+
+        If n_widths is larger than zero, each particle's mass is considered to extend over the range
+        mass +- n_widths * width (e.g. for selecting Breit-Wigner resonances), and all particles where this
+        range overlaps with the window are returned. Particles are ordered by mass.
+        """
+        lo = convert(lo, units, 'GeV')
+        hi = convert(hi, units, 'GeV')
+        margin = n_widths*self.max_width
+        first = bisect.bisect_left(self.masses, lo - margin)
+        last = bisect.bisect_right(self.masses, hi + margin)
+        if n_widths == 0:
+            return self.particles[first:last]
+        return [self.particles[i] for i in range(first, last) if self._matches(i, lo, hi, n_widths)]
+
+    def find_many(self, lo, hi, units='GeV', n_widths=0):
+        """Return a list of particle lists, one for each of the windows [lo[i], hi[i]] given in units.
+
+        lo and hi are sequences (or numpy arrays) of equal length. The windows are located in the index with a
+        single vectorized search (requires numpy). See find() for the meaning of n_widths.
+        """
+        numpy = import_numpy()
+        factor = convert(1., units, 'GeV')
+        lo = numpy.asarray(lo, dtype=float) * factor
+        hi = numpy.asarray(hi, dtype=float) * factor
+        masses = numpy.asarray(self.masses)
+        margin = n_widths*self.max_width
+        first = numpy.searchsorted(masses, lo - margin, side='left')
+        last = numpy.searchsorted(masses, hi + margin, side='right')
+        if n_widths == 0:
+            return [self.particles[i:j] for i, j in zip(first.tolist(), last.tolist())]
+        return [[self.particles[i] for i in range(i_first, i_last) if self._matches(i, l, h, n_widths)]
+                for i_first, i_last, l, h in zip(first.tolist(), last.tolist(), lo.tolist(), hi.tolist())]
+
+
+class PdgDecayIndex(object):
+    """Inverted index from final-state particle names to the decay modes containing them.
+
+    The final state of each decay mode is obtained by parsing its description (e.g. 'D+ --> K- pi+ pi+'). For
+    modes with intermediate states (e.g. 'D+ --> anti-K*(892)0 pi+ pi0, anti-K*(892)0 --> K- pi+'), the
+    intermediate particles are replaced by their decay products, so that the mode is found both by its
+    listed and by its final particles. Multiplicities written as a prefix (e.g. '2gamma') are expanded.
+    Decay modes are matched as listed in the Summary Tables, i.e. charge-conjugate modes are not included.
+    Only decay modes below a particle in the hierarchy of PDG Identifiers are included (e.g. not the modes
+    of the B+-/B0 admixture, S049).
+    """
+
+    # Arrow separating parent and decay products in decay mode descriptions
+    ARROW = '-->'
+
+    def __init__(self, api, edition=None):
+        """Build decay index from all branching fractions with summary values in the given (or the default) edition."""
+        hierarchy = api.hierarchy_index()
+        self.modes = []
+        self.particles = []
+        for mode in load_properties(api, BRANCHING_FRACTION_KEYS, edition):
+            particle = hierarchy.particle_ancestor(mode.baseid)
+            if particle is not None:
+                self.modes.append(mode)
+                self.particles.append(particle)
+        self.parents = []
+        self.final_states = []
+        self.index = dict()
+        for i, mode in enumerate(self.modes):
+            parent, final_states = self.parse(mode.description)
+            self.parents.append(parent)
+            self.final_states.append(final_states)
+            for final_state in final_states:
+                for name in final_state:
+                    self.index.setdefault(name, set()).add(i)
+
+    def __len__(self):
+        return len(self.modes)
+
+    @staticmethod
+    def normalize(names):
+        """Return Counter of the particle names in the list or string names, with multiplicities expanded."""
+        if hasattr(names, 'split'):
+            names = names.split()
+        counts = collections.Counter()
+        for name in names:
+            match = re.match(r'^(\d+)([A-Za-z].*)$', name)
+            if match:
+                counts[match.group(2)] += int(match.group(1))
+            else:
+                counts[name] += 1
+        return counts
+
+    @classmethod
+    def parse(cls, description):
+        """Return parent name and list of final states (as Counters) of the decay mode with the given description.
+
+        The list contains the final state as listed and, if the description includes the decays of intermediate
+        states, the final state with these particles replaced by their decay products. Returns (None, [])
+        if description is not a decay mode.
+        """
+        description = re.sub(r'\s\([^)]*\)', '', description or '')
+        steps = [step.split(cls.ARROW) for step in description.split(',')]
+        if len(steps[0]) != 2:
+            return None, []
+        parent = steps[0][0].strip()
+        final_state = cls.normalize(steps[0][1])
+        final_states = [final_state]
+        for step in steps[1:]:
+            if len(step) != 2:
+                continue
+            intermediate = step[0].strip()
+            if final_state[intermediate] > 0:
+                final_state = final_state - collections.Counter([intermediate]) + cls.normalize(step[1])
+        if final_state != final_states[0]:
+            final_states.append(final_state)
+        return parent, final_states
+
+    def find(self, final_state, parent=None, exact=False):
+        """Return list of decay modes (PdgBranchingFraction objects) with the given final-state particles.
+
+        final_state is a list (or space-separated string) of particle names as used in the Summary Tables
+        (e.g. ['K-', 'pi+', 'pi+']). If exact is False, modes with additional particles in the final state are
+        included. parent can be set to the name of the decaying particle (e.g. 'D+') or to the PDG Identifier of its
+        particle entry (e.g. 'S031'). The returned objects have their data loaded and are ordered as in the
+        Summary Tables.
+        """
+        wanted = self.normalize(final_state)
+        candidates = None
+        for name in wanted:
+            matches = self.index.get(name, set())
+            candidates = matches if candidates is None else candidates & matches
+        if candidates is None:
+            candidates = range(len(self.modes))
+        results = []
+        for i in sorted(candidates):
+            if parent is not None and parent != self.parents[i] and parent.upper() != self.particles[i]:
+                continue
+            if exact:
+                matched = any(fs == wanted for fs in self.final_states[i])
+            else:
+                matched = any(all(fs[name] >= n for name, n in wanted.items()) for fs in self.final_states[i])
+            if matched:
+                mode = copy.copy(self.modes[i])
+                mode.cache = dict(mode.cache)
+                results.append(mode)
+        return results
+
+
+class PdgParticleIndex(object):
+    """Columnar arrays of the charges, quantum numbers and flags of all particles, for fast selections.
+
+    The index contains all particle charge states with an MC ID (with their particle data loaded in the same
+    way as by PdgApi.get_particles_by_mcids()) and holds one numpy array per column, so that selections are
+    evaluated with vectorized operations instead of looking at each particle (requires numpy). The columns are
+
+    pdgid, name                 PDG Identifier (without edition) and name (object arrays)
+    mcid                        MC ID
+    charge                      charge in units of e, NaN if not known (None)
+    quantum_I, quantum_J        isospin and spin as numbers (e.g. 0.5 for '1/2'), NaN if not known
+    quantum_G, quantum_P,       G parity, parity and C parity as +1 or -1, 0 if not known
+    quantum_C
+    is_generic                  True for generic charge states
+    flags                       flags of the PDG Identifier (see PdgData.data_flags) as a bitmask
+
+    Quantum numbers given in parentheses (i.e. not established) are included with their value. Unknown charges,
+    isospins and spins (NaN) match no value, range or list, so that such particles are excluded by these criteria.
+    """
+
+    # Columns holding quantum numbers
+    QUANTUM_NUMBERS = ('quantum_I', 'quantum_J')
+    PARITIES = ('quantum_G', 'quantum_P', 'quantum_C')
+
+    # Absolute tolerance for matching charges and quantum numbers
+    TOLERANCE = 1e-6
+
+    # Flag criteria of select() and the corresponding flag characters (see PdgParticle.is_meson etc.)
+    FLAG_CRITERIA = {'is_boson': 'G', 'is_quark': 'Q', 'is_lepton': 'L', 'is_meson': 'M', 'is_baryon': 'B'}
+
+    def __init__(self, api, edition=None):
+        """Build particle index for the given (or the default) edition."""
+        numpy = import_numpy()
+        hierarchy = api.hierarchy_index()
+        self.particles = load_particles(api, edition)
+        rows = []
+        for particle in self.particles:
+            if particle.baseid in hierarchy:
+                particle.cache['pdgid'] = hierarchy.rows[particle.baseid]
+            rows.append((particle.cache['pdgparticle'], particle.data_flags or ''))
+        self.flag_bits = dict((flag, 1 << i) for i, flag in enumerate(sorted(set(''.join(f for _, f in rows)))))
+        self.columns = {
+            'pdgid': numpy.array([p.baseid for p in self.particles], dtype=object),
+            'name': numpy.array([r['name'] for r, _ in rows], dtype=object),
+            'mcid': numpy.array([r['mcid'] for r, _ in rows], dtype=numpy.int64),
+            'charge': numpy.array([r['charge'] if r['charge'] is not None else numpy.nan for r, _ in rows],
+                                  dtype=float),
+            'is_generic': numpy.array([r['charge_type'] == 'G' for r, _ in rows], dtype=bool),
+            'flags': numpy.array([self.flag_mask(f) for _, f in rows], dtype=numpy.int64),
+        }
+        for column in self.QUANTUM_NUMBERS:
+            self.columns[column] = numpy.array([self.quantum_number(r[column.lower()]) for r, _ in rows], dtype=float)
+        for column in self.PARITIES:
+            self.columns[column] = numpy.array([self.parity(r[column.lower()]) for r, _ in rows], dtype=numpy.int8)
+
+    def __len__(self):
+        return len(self.particles)
+
+    @staticmethod
+    def quantum_number(value):
+        """Return quantum number value (e.g. 1, '1/2' or '(3/2)') as a float, or NaN if it is not a number."""
+        if isinstance(value, (int, float)):
+            return float(value)
+        match = re.match(r'^\(?\s*(\d+)\s*(?:/\s*(\d+))?\s*\)?$', (value or '').strip())
+        if not match:
+            return float('nan')
+        return float(match.group(1)) / float(match.group(2) or 1)
+
+    @staticmethod
+    def parity(value):
+        """Return parity value (e.g. '+', '-', '(-)', 1 or -1) as +1 or -1, or 0 if it is not known."""
+        if isinstance(value, (int, float)):
+            return (value > 0) - (value < 0)
+        value = (value or '').strip().strip('()')
+        return {'+': 1, '-': -1}.get(value, 0)
+
+    def flag_mask(self, flags):
+        """Return bitmask for the flag characters in string flags (characters not in the index are ignored)."""
+        mask = 0
+        for flag in flags:
+            mask |= self.flag_bits.get(flag, 0)
+        return mask
+
+    def _encode(self, column, value):
+        """Return value of a criterion for column in the representation of the column."""
+        if column in self.QUANTUM_NUMBERS:
+            return self.quantum_number(value)
+        if column in self.PARITIES:
+            return self.parity(value)
+        return value
+
+    def mask(self, criterion, value):
+        """Return boolean array selecting the particles that satisfy a criterion of select()."""
+        numpy = import_numpy()
+        if criterion in self.FLAG_CRITERIA:
+            bit = self.flag_bits.get(self.FLAG_CRITERIA[criterion], 0)
+            selected = (self.columns['flags'] & bit) != 0 if bit else numpy.zeros(len(self), dtype=bool)
+            return selected if value else ~selected
+        if criterion == 'data_flags':
+            if any(flag not in self.flag_bits for flag in value):
+                return numpy.zeros(len(self), dtype=bool)
+            bits = self.flag_mask(value)
+            return (self.columns['flags'] & bits) == bits
+        if criterion not in self.columns:
+            raise PdgApiError('unknown particle selection criterion %s' % criterion)
+        column = self.columns[criterion]
+        if callable(value):
+            return numpy.asarray(value(column), dtype=bool)
+        if isinstance(value, tuple):
+            if len(value) != 2:
+                raise PdgApiError('range for %s must be given as (lo, hi)' % criterion)
+            lo, hi = value
+            selected = numpy.ones(len(self), dtype=bool)
+            if lo is not None:
+                selected &= column >= self._encode(criterion, lo)
+            if hi is not None:
+                selected &= column <= self._encode(criterion, hi)
+            return selected
+        values = value if isinstance(value, (list, set, frozenset)) else [value]
+        values = [self._encode(criterion, v) for v in values]
+        if column.dtype == object:
+            return numpy.array([v in values for v in column], dtype=bool)
+        if column.dtype.kind == 'f':
+            # Compare charges and quantum numbers with a tolerance, so that e.g. charge=2/3 matches
+            selected = numpy.zeros(len(self), dtype=bool)
+            for v in values:
+                selected |= numpy.isclose(column, v, rtol=0., atol=self.TOLERANCE)
+            return selected
+        return numpy.isin(column, values)
+
+    def select(self, **criteria):
+        """Return list of the particles satisfying all criteria, ordered by MC ID.
+
+        Each criterion is given as column=value (see the class documentation for the columns), where value is
+        a single value (particles with this value are selected), a tuple (lo, hi) (values in the inclusive range,
+        either limit may be None), a list or set (any of the values), or a function that is called with the numpy
+        array of the column and returns a boolean array (e.g. charge=lambda q: q != 0). In addition, is_boson,
+        is_quark, is_lepton, is_meson and is_baryon select particles by their flags, and data_flags='...' selects
+        particles having all of the given flag characters. The returned objects have their particle data and
+        PDG Identifier information loaded.
+        """
+        numpy = import_numpy()
+        selected = numpy.ones(len(self), dtype=bool)
+        for criterion, value in criteria.items():
+            selected &= self.mask(criterion, value)
+        results = []
+        for i in numpy.flatnonzero(selected).tolist():
+            particle = copy.copy(self.particles[i])
+            particle.cache = dict(particle.cache)
+            results.append(particle)
+        return results
@@ -0,0 +1,128 @@
+"""
+Memory accounting for the caches and objects of a PdgApi.
+
+memory_report() estimates the memory held by the reflected database schema, by the caches of the data
+release (see pdg.warm and the indexes in pdg.index), and by the caches of the PdgData objects that are
+currently alive. Sizes are estimated by following the references between objects and adding up their sizes
+as given by sys.getsizeof(). Each object is counted once, in the first category in which it is found, in the
+order of MEMORY_CATEGORIES. Objects shared with other parts of a program (e.g. interned strings) are included,
+so that the estimates are upper limits of the memory that would be freed by dropping the caches.
+"""
+
+import gc
+import sys
+import types
+import sqlalchemy
+from sqlalchemy.sql import ClauseElement
+from pdg.data import PdgData, PdgConvertedValue
+
+
+# Memory categories reported by memory_report(), in the order in which they are evaluated
+MEMORY_CATEGORIES = (
+    'schema',           # Reflected database schema (SQLAlchemy MetaData)
+    'pdgid',            # PDG Identifier information (pdgid rows) in the hierarchy index and object caches
+    'summary',          # Summary values in the shared summary caches and object caches
+    'pdgparticle',      # Particle data (pdgparticle rows) in the shared particle cache and object caches
+    'converted',        # Summary values converted into other units (PdgConvertedValue objects)
+    'object_caches',    # Other data in the caches of PdgData objects (e.g. preloaded lists of properties)
+    'indexes',          # Other data in the release cache (search, mass and decay indexes, particle tables etc.)
+    'statements',       # Compiled SQL statements cached by the database engine
+    'objects',          # PdgData objects themselves, without their caches
+)
+
+# Types of objects that are never counted nor followed (code, and the database engine with its connection pool)
+_CODE_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+               sqlalchemy.engine.Engine)
+
+# Types of objects that belong to the reflected schema, which are only counted in category 'schema'
+_SCHEMA_TYPES = (sqlalchemy.MetaData, sqlalchemy.Table, ClauseElement)
+
+
+def deep_sizeof(roots, seen, excluded=()):
+    """Return the total size of the objects in roots and all objects reachable from them, in bytes.
+
+    Objects whose id is in the set seen are skipped, and the ids of all objects counted are added to seen.
+    Objects of the types in excluded (in addition to classes, modules, functions and SQLAlchemy engines)
+    are not counted and not followed.
+    """
+    size = 0
+    stack = list(roots)
+    excluded = _CODE_TYPES + tuple(excluded)
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, excluded):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+    return size
+
+
+def live_objects(api):
+    """Return list of the PdgData and PdgConvertedValue objects that are alive and belong to api.
+
+    Objects are found among the objects tracked by the garbage collector and, since objects frozen with
+    gc.freeze() (see PdgApi.preload()) are not tracked, among the objects referenced by the release cache.
+    """
+    from pdg.api import PdgApi
+    found = dict()
+    candidates = gc.get_objects()
+    seen = set()
+    stack = list(api.release.cache.values())
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _CODE_TYPES + _SCHEMA_TYPES + (PdgApi,)):
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, (PdgData, PdgConvertedValue)):
+            candidates.append(obj)
+        if not isinstance(obj, PdgData):
+            stack.extend(gc.get_referents(obj))
+    for obj in candidates:
+        if isinstance(obj, PdgConvertedValue) or (isinstance(obj, PdgData) and obj.api is api):
+            found[id(obj)] = obj
+    return list(found.values())
+
+
+def memory_report(api):
+    """Return dict with estimates of the memory held by the schema, caches and objects of api (see PdgApi.memory_report())."""
+    from pdg.api import PdgApi
+    objects = live_objects(api)
+    pdgdata = [obj for obj in objects if isinstance(obj, PdgData)]
+    converted = [obj for obj in objects if isinstance(obj, PdgConvertedValue)]
+    release_cache = dict(api.release.cache)
+    shared_keys = set(key for key in release_cache if key in ('hierarchy_index', 'pdgparticle') or
+                      (isinstance(key, tuple) and key[0] == 'summary'))
+    hierarchy = release_cache.get('hierarchy_index')
+    excluded = (PdgApi, PdgData) + _SCHEMA_TYPES
+    roots = {
+        'statements': [getattr(api.engine, '_compiled_cache', None) or {}],
+        'pdgid': ([hierarchy.rows] if hierarchy is not None else []) +
+                 [obj.cache['pdgid'] for obj in pdgdata if 'pdgid' in obj.cache],
+        'summary': [value for key, value in release_cache.items() if isinstance(key, tuple) and key[0] == 'summary'] +
+                   [obj.cache['summary'] for obj in pdgdata if 'summary' in obj.cache],
+        'pdgparticle': ([release_cache['pdgparticle']] if 'pdgparticle' in release_cache else []) +
+                       [obj.cache['pdgparticle'] for obj in pdgdata if 'pdgparticle' in obj.cache],
+        'converted': converted,
+        'object_caches': [obj.cache for obj in pdgdata],
+        'indexes': [value for key, value in release_cache.items() if key not in shared_keys] +
+                   ([hierarchy] if hierarchy is not None else []),
+    }
+    seen = set()
+    categories = dict()
+    categories['schema'] = deep_sizeof([api.db], seen, (PdgApi, PdgData))
+    for category in MEMORY_CATEGORIES[1:-1]:
+        categories[category] = deep_sizeof(roots[category], seen, excluded)
+    classes = dict()
+    for obj in pdgdata:
+        size = sys.getsizeof(obj) + deep_sizeof([obj.__dict__], seen, excluded)
+        entry = classes.setdefault(obj.__class__.__name__, {'count': 0, 'bytes': 0})
+        entry['count'] += 1
+        entry['bytes'] += size
+    categories['objects'] = sum(entry['bytes'] for entry in classes.values())
+    if converted:
+        classes[PdgConvertedValue.__name__] = {'count': len(converted), 'bytes': categories['converted']}
+    return {'categories': categories,
+            'classes': classes,
+            'live_pdgdata': len(pdgdata),
+            'total': sum(categories.values())}
@@ -2,14 +2,41 @@
 Definition of top-level particle container class.
 """
 
-from sqlalchemy import select, bindparam, distinct
-from sqlalchemy import and_, or_
+from sqlalchemy import select, bindparam
 from pdg.errors import PdgApiError, PdgNoDataError, PdgAmbiguousValueError
-from pdg.utils import make_id, best
+from pdg.utils import base_id, make_id, best, matches_data_type_key, MAX_IN_CLAUSE_SIZE
 from pdg.data import PdgData
+from pdg.collection import PdgPropertyCollection, load_summaries
+from pdg.decay import load_decay_mode_tree
 from pdg.units import HBAR_IN_GEV_S
 
 
+def select_particle_data(rows, pdgid, cc_type_flag='P', mcid=None):
+    """Select the particle data for a given charge state from a list of pdgparticle rows.
+
+    rows must be the pdgparticle entries with entry_type 'P' for a single PDG Identifier (and MC ID, if mcid is set).
+    The charge-specific state matching cc_type_flag is chosen if it is unique. Otherwise, the entry for the generic
+    charge state (CHARGE_TYPE='G') is returned. PdgNoDataError or PdgAmbiguousValueError is raised if there is no
+    or no unique such entry.
+    """
+    matches = [p for p in rows if (p.charge_type == 'S' and p.cc_type in (cc_type_flag, 'S')) or
+                                  (p.charge_type == 'E' and p.cc_type is None)]
+    if len(matches) == 1:
+        return matches[0]._mapping
+    # Charge-specific state either not found or ambiguous - try looking for entry with CHARGE_TYPE='G'
+    matches_g = [p for p in rows if p.charge_type == 'G' and p.cc_type is None and
+                 p.name is not None and 'bar' not in p.name.lower()]   # Exclude generic "*bar" states
+    if len(matches_g) == 0:
+        mcid_string = ', MC ID = %s' % mcid if mcid else ''
+        raise PdgNoDataError('Particle data for %s%s not found' % (pdgid, mcid_string))
+    elif len(matches_g) == 1:
+        return matches_g[0]._mapping
+    else:
+        names = [p.name for p in matches_g]
+        mcids = list(set([p.mcid for p in matches]))
+        raise PdgAmbiguousValueError('Multiple particles for %s: MCID %s, names %s' % (base_id(pdgid), mcids, names))
+
+
 class PdgParticle(PdgData):
     """Container class for all information about a given particle.
 
@@ -18,6 +45,8 @@ class PdgParticle(PdgData):
     in Particle Listings and Summary Tables, including branching fractions, masses, life-times, etc.
     """
 
+    cache_loaders = dict(PdgData.cache_loaders, pdgparticle='_get_particle_data')
+
     def __init__(self, api, pdgid, edition=None, set_mcid=None):
         """Constructor for a PdgParticle given its PDG Identifier and possibly its MC ID."""
         super(PdgParticle, self).__init__(api, pdgid, edition)
@@ -35,49 +64,33 @@ class PdgParticle(PdgData):
     def _get_particle_data(self):
         """Get particle data."""
         if 'pdgparticle' not in self.cache:
-            pdgparticle_table = self.api.db.tables['pdgparticle']
+            self.api._access('particle_data', self.baseid, self.edition, self.set_mcid)
+            release = self.api.release
+            shared = release.cache.get('pdgparticle', {})
+            if self.baseid in shared:
+                rows = [row for row in shared[self.baseid] if self.set_mcid is None or row.mcid == self.set_mcid]
+                self.api._count('shared.pdgparticle')
+                self.cache['pdgparticle'] = select_particle_data(rows, self.pdgid, self.cc_type_flag, self.set_mcid)
+                return self.cache['pdgparticle']
+            self.api._count('query.pdgparticle')
+            pdgparticle_table = release.db.tables['pdgparticle']
             query = select(pdgparticle_table)
             query = query.where(pdgparticle_table.c.pdgid == bindparam('pdgid'))
             if self.set_mcid is not None:
                 query = query.where(pdgparticle_table.c.mcid == bindparam('mcid'))
             query = query.where(pdgparticle_table.c.entry_type == 'P')
-            query = query.where(or_(and_(pdgparticle_table.c.charge_type == 'S', pdgparticle_table.c.cc_type == bindparam('cc_type')),
-                                    and_(pdgparticle_table.c.charge_type == 'S', pdgparticle_table.c.cc_type == 'S'),
-                                    and_(pdgparticle_table.c.charge_type == 'E', pdgparticle_table.c.cc_type.is_(None))))
-            with self.api.engine.connect() as conn:
-                params = {'pdgid': self.baseid, 'cc_type': self.cc_type_flag, 'mcid': self.set_mcid}
-                matches = conn.execute(query, params).fetchall()
-            if len(matches) == 1:
-                self.cache['pdgparticle'] = matches[0]._mapping
-            else:
-                # Charge-specific state either not found or ambiguous - try looking for entry with CHARGE_TYPE='G'
-                query = select(pdgparticle_table)
-                query = query.where(pdgparticle_table.c.pdgid == bindparam('pdgid'))
-                if self.set_mcid is not None:
-                    query = query.where(pdgparticle_table.c.mcid == bindparam('mcid'))
-                query = query.where(pdgparticle_table.c.entry_type == 'P')
-                query = query.where(pdgparticle_table.c.charge_type == 'G')
-                query = query.where(pdgparticle_table.c.cc_type.is_(None))
-                query = query.where(pdgparticle_table.c.name.notlike('%bar%'))   # Exclude generic "*bar" states
-                with self.api.engine.connect() as conn:
-                    params = {'pdgid': self.baseid, 'mcid': self.set_mcid}
-                    matches_g = conn.execute(query, params).fetchall()
-                if len(matches_g) == 0:
-                    mcid_string = ', MC ID = %s' % self.set_mcid if self.set_mcid else ''
-                    raise PdgNoDataError('Particle data for %s%s not found' % (self.pdgid, mcid_string))
-                elif len(matches_g) == 1:
-                    self.cache['pdgparticle'] = matches_g[0]._mapping
-                else:
-                    names = [p.name for p in matches_g]
-                    mcids = list(set([p.mcid for p in matches]))
-                    raise PdgAmbiguousValueError('Multiple particles for %s: MCID %s, names %s' % (self.baseid, mcids, names))
+            with release.engine.connect() as conn:
+                params = {'pdgid': self.baseid, 'mcid': self.set_mcid}
+                rows = conn.execute(query, params).fetchall()
+            self.cache['pdgparticle'] = select_particle_data(rows, self.pdgid, self.cc_type_flag, self.set_mcid)
         return self.cache['pdgparticle']
 
     def properties(self,
                    data_type_key=None,
                    require_summary_data=True,
                    in_summary_table=None,
-                   omit_branching_ratios=False):
+                   omit_branching_ratios=False,
+                   collection=False):
         """Return iterator over specified particle property data.
 
         By default, all properties excluding branching fractions and branching fraction ratios are returned.
@@ -96,60 +109,89 @@ class PdgParticle(PdgData):
 
         omit_branching_ratios can be set to True to exclude any branching fraction ratio properties that would
         be selected otherwise.
+
+        collection can be set to True to return a PdgPropertyCollection, for which the data of all properties
+        is loaded in bulk and which provides the best values of all properties as arrays.
         """
-        pdgid_table = self.api.db.tables['pdgid']
-        query = select(distinct(pdgid_table.c.pdgid))
+        preloaded = self.cache.get('properties', {})
+        if require_summary_data and in_summary_table is None and data_type_key in preloaded:
+            props = iter(preloaded[data_type_key])
+        else:
+            props = self._query_properties(data_type_key, require_summary_data, in_summary_table,
+                                           omit_branching_ratios)
+        if collection:
+            props = list(props)
+            load_summaries(self.api, props)
+            return PdgPropertyCollection(self.api, [prop for prop in props if self._matches_charge(prop)], False)
+        return (prop for prop in props if self._matches_charge(prop))
+
+    def _query_properties(self, data_type_key, require_summary_data, in_summary_table, omit_branching_ratios):
+        """Return iterator over specified particle property data for all charge states (see properties())."""
+        # Identifiers and their pdgid table ids must be taken from the release that is queried for data
+        release = self.api.release
+        hierarchy = self.api.hierarchy_index(release)
+        rows = [hierarchy.rows[pdgid] for pdgid in hierarchy.descendants(self.baseid)]
+        rows = [row for row in rows if matches_data_type_key(row['data_type'], data_type_key, omit_branching_ratios)]
         if require_summary_data or in_summary_table is not None:
-            pdgdata_table = self.api.db.tables['pdgdata']
-            query = query.join(pdgdata_table)
-            query = query.where(pdgdata_table.c.edition == bindparam('edition'))
-            if in_summary_table is not None:
-                query = query.where(pdgdata_table.c.in_summary_table == bindparam('in_summary_table'))
-        query = query.where(pdgid_table.c.parent_pdgid.like(bindparam('parent_id')))
-        if data_type_key is None:
-            # NOTE: like/notlike SQL operators never match null values
-            query = query.where((pdgid_table.c.data_type.notlike('BF%')) | (pdgid_table.c.data_type.is_(None)))
-            query = query.where((pdgid_table.c.data_type.notlike('BR%')) | (pdgid_table.c.data_type.is_(None)))
+            with_data = self._ids_with_data([row['id'] for row in rows], in_summary_table, release)
+            rows = [row for row in rows if row['id'] in with_data]
+        for row in rows:
+            prop = self.api.make(make_id(row['pdgid'], self.edition), row['data_type'], self.edition)
+            prop.cache['pdgid'] = row
+            yield prop
+
+    def _ids_with_data(self, ids, in_summary_table=None, release=None):
+        """Return set of the given pdgid table ids that have summary values in the selected edition.
+
+        in_summary_table can be set to only consider summary values that are (True) or are not (False) included
+        in the Summary Table. release is the PdgRelease to be queried (default: the current data release).
+        Unless in_summary_table is set, the set of ids with summary values loaded by PdgApi.warm() is used
+        if available.
+        """
+        release = release or self.api.release
+        if in_summary_table is None:
+            with_data = release.cache.get(('ids_with_data', str(self.edition)))
+            if with_data is not None:
+                self.api._count('shared.ids_with_data')
+                return with_data.intersection(ids)
+        self.api._count('query.ids_with_data')
+        pdgdata_table = release.db.tables['pdgdata']
+        query = select(pdgdata_table.c.pdgid_id).distinct()
+        query = query.where(pdgdata_table.c.edition == bindparam('edition'))
+        query = query.where(pdgdata_table.c.pdgid_id.in_(bindparam('ids', expanding=True)))
+        if in_summary_table is not None:
+            query = query.where(pdgdata_table.c.in_summary_table == bindparam('in_summary_table'))
+        result = set()
+        with release.engine.connect() as conn:
+            for i in range(0, len(ids), MAX_IN_CLAUSE_SIZE):
+                params = {'edition': self.edition, 'ids': ids[i:i+MAX_IN_CLAUSE_SIZE],
+                          'in_summary_table': in_summary_table}
+                result.update(item.pdgid_id for item in conn.execute(query, params))
+        return result
+
+    def _matches_charge(self, prop):
+        """Return True if property prop applies to the charge state of this particle."""
+        # For masses, widths, and lifetimes, we must take care to choose
+        # the appropriate entry according to the particle's charge.
+        # Other types of properties don't require further checks.
+        if prop.data_type not in 'MGT':
+            return True
+
+        # NOTE: Now that 's' properties are sorted last, we can safely
+        # include them without breaking best() etc.
+
+        # If this property is not charge-specific, include it.
+        elif not any(flag in prop.data_flags for flag in '012'):
+            return True
+
+        # If this particle isn't a specific charge state, include
+        # everything.
+        elif self.charge is None:
+            return True
+
+        # Finally check whether the charges match
         else:
-            # NOTE: like may or may not be case-sensitive, depending on database, so use it only for BR* and BF*
-            # NOTE: like will not match null values, so data_type='%' must be treated separately
-            if '%' in data_type_key:
-                if data_type_key != '%':
-                    query = query.where(pdgid_table.c.data_type.like(bindparam('data_type_key')))
-            else:
-                query = query.where(pdgid_table.c.data_type == bindparam('data_type_key'))
-            if omit_branching_ratios:
-                query = query.where((pdgid_table.c.data_type.notlike('BR%')) | (pdgid_table.c.data_type.is_(None)))
-        query = query.order_by(pdgid_table.c.sort)
-        with self.api.engine.connect() as conn:
-            for entry in conn.execute(query, {'parent_id': self.baseid+'%',
-                                              'edition': self.edition,
-                                              'data_type_key': data_type_key,
-                                              'in_summary_table': in_summary_table}):
-                prop = self.api.get(make_id(entry.pdgid, self.edition))
-
-                # For masses, widths, and lifetimes, we must take care to choose
-                # the appropriate entry according to the particle's charge.
-                # Other types of properties don't require further checks.
-                if prop.data_type not in 'MGT':
-                    yield prop
-
-                # NOTE: Now that 's' properties are sorted last, we can safely
-                # include them without breaking best() etc.
-
-                # If this property is not charge-specific, yield it.
-                elif not any(flag in prop.data_flags for flag in '012'):
-                    yield prop
-
-                # If this particle isn't a specific charge state, yield
-                # everything.
-                elif self.charge is None:
-                    yield prop
-
-                # Finally check whether the charges match
-                elif str(int(abs(self.charge))) in prop.data_flags:
-                    yield prop
-
+            return str(int(abs(self.charge))) in prop.data_flags
 
     def masses(self, require_summary_data=True):
         """Return iterator over mass data.
@@ -172,19 +214,21 @@ class PdgParticle(PdgData):
         """Return iterator over lifetime data."""
         return self.properties('T', require_summary_data)
 
-    def branching_fractions(self, data_type_key='BF%', require_summary_data=True):
+    def branching_fractions(self, data_type_key='BF%', require_summary_data=True, collection=False):
         """Return iterator over given type(s) of branching fraction data.
 
         With data_type_key='BF%' (default), all branching fractions, including subdecay modes, are returned.
 
         require_summary_data can be set False to include branching fractions where the current edition has no
         summary value(s) in the Particle Listings or Summary Table.
+
+        collection can be set to True to return a PdgPropertyCollection instead of an iterator.
         """
         if data_type_key[0:2] != 'BF':
             raise PdgApiError('illegal branching fraction data type key %s' % data_type_key)
-        return self.properties(data_type_key, require_summary_data)
+        return self.properties(data_type_key, require_summary_data, collection=collection)
 
-    def exclusive_branching_fractions(self, include_subdecays=False, require_summary_data=True):
+    def exclusive_branching_fractions(self, include_subdecays=False, require_summary_data=True, collection=False):
         """Return iterator over exclusive branching fraction data.
 
         Set include_subdecays to True (default is False) to also include
@@ -192,13 +236,15 @@ class PdgParticle(PdgData):
 
         require_summary_data can be set False to include branching fractions where the current edition has
         no summary value(s) in the Particle Listings or Summary Table.
+
+        collection can be set to True to return a PdgPropertyCollection instead of an iterator.
         """
         if include_subdecays:
-            return self.branching_fractions('BFX%', require_summary_data)
+            return self.branching_fractions('BFX%', require_summary_data, collection)
         else:
-            return self.branching_fractions('BFX', require_summary_data)
+            return self.branching_fractions('BFX', require_summary_data, collection)
 
-    def inclusive_branching_fractions(self, include_subdecays=False, require_summary_data=True):
+    def inclusive_branching_fractions(self, include_subdecays=False, require_summary_data=True, collection=False):
         """Return iterator over inclusive branching fraction data.
 
         Set include_subdecays to True (default is False) to also include
@@ -206,11 +252,25 @@ class PdgParticle(PdgData):
 
         require_summary_data can be set True to request only branching fractions where the current edition has
         summary value(s) in the Particle Listings or Summary Table.
+
+        collection can be set to True to return a PdgPropertyCollection instead of an iterator.
         """
         if include_subdecays:
-            return self.branching_fractions('BFI%', require_summary_data)
+            return self.branching_fractions('BFI%', require_summary_data, collection)
         else:
-            return self.branching_fractions('BFI', require_summary_data)
+            return self.branching_fractions('BFI', require_summary_data, collection)
+
+    def decay_mode_tree(self, data_type_key='BF%', require_summary_data=True):
+        """Return the decay modes of this particle as a tree of PdgDecayModeNode objects.
+
+        The returned root node has the decay modes that are not subdecay modes as its children, and the subdecay
+        modes of each mode are its children, as shown (indented) in the Summary Tables. The tree and the summary
+        values of all modes are loaded with a single query. data_type_key and require_summary_data select the
+        modes as for branching_fractions().
+        """
+        if data_type_key[0:2] != 'BF':
+            raise PdgApiError('illegal branching fraction data type key %s' % data_type_key)
+        return load_decay_mode_tree(self, data_type_key, require_summary_data)
 
     @property
     def name(self):
@@ -368,4 +428,4 @@ class PdgParticle(PdgData):
 
     @property
     def is_stable(self):
-        return not (self.has_width_entry() or self.has_lifetime_entry())
+        return not (self.has_width_entry or self.has_lifetime_entry)
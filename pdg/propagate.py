@@ -0,0 +1,145 @@
+"""
+Propagation of uncertainties to quantities derived from PDG data.
+
+The functions in this module evaluate expressions of PDG summary values together with their uncertainties,
+using either linear error propagation or Monte Carlo sampling. Expressions are Python functions that are
+called only once with a numpy array x of shape (number of inputs, number of points), where x[i] holds the
+values of the i-th input at which the expression is evaluated, and that return an array with one result per
+point. For example, the neutron-proton mass difference and its uncertainty are given by
+
+propagate(lambda x: x[0] - x[1], [n_mass, p_mass], units='MeV')
+
+where n_mass and p_mass are the PdgMass objects (or PdgSummaryValues) of the neutron and proton.
+
+Asymmetric errors are taken into account by shifting each input separately by its positive and its
+negative error (linear propagation), or by sampling each input from a split normal distribution with
+the positive and negative errors as widths above and below the central value (Monte Carlo).
+This module requires numpy.
+"""
+
+from pdg.data import PdgProperty
+from pdg.errors import PdgApiError, PdgNoDataError
+from pdg.utils import import_numpy
+
+
+class PdgDerivedValue(object):
+    """Value and uncertainties of a quantity derived from PDG data."""
+
+    def __init__(self, value, error_positive, error_negative, samples=None):
+        self.value = value
+        self.error_positive = error_positive
+        self.error_negative = error_negative
+        self.samples = samples
+
+    def __repr__(self):
+        return '%s(%r, +%r, -%r)' % (self.__class__.__name__, self.value, self.error_positive, self.error_negative)
+
+    @property
+    def error(self):
+        """Symmetric error or None.
+
+        Returns symmetric error as average of positive and negative errors if they differ by less than 10% of
+        their average. Otherwise, returns None."""
+        err_avg = (self.error_positive + self.error_negative) / 2.0
+        if abs(self.error_positive - self.error_negative) <= 0.1 * err_avg:
+            return err_avg
+        return None
+
+
+def _get_inputs(inputs, units, limits):
+    """Return arrays of values, positive errors, negative errors, and upper limit flags for inputs."""
+    numpy = import_numpy()
+    if units is None or isinstance(units, str):
+        units = [units]*len(inputs)
+    values = numpy.zeros(len(inputs))
+    errors_positive = numpy.zeros(len(inputs))
+    errors_negative = numpy.zeros(len(inputs))
+    upper_limits = numpy.zeros(len(inputs), dtype=bool)
+    for i, (item, item_units) in enumerate(zip(inputs, units)):
+        if isinstance(item, PdgProperty):
+            summary = item.best_summary()
+            if summary is None:
+                raise PdgNoDataError('No summary value for %s' % item.pdgid)
+            item = summary
+        if not hasattr(item, 'get_value'):
+            values[i] = item
+            continue
+        if item.get_value(item_units) is None:
+            raise PdgNoDataError('No value for %s' % item.pdgid)
+        values[i] = item.get_value(item_units)
+        if item.is_limit:
+            if limits != 'uniform' or not item.is_upper_limit:
+                raise PdgApiError('cannot propagate limit %s (%s)' % (item.pdgid, item.description))
+            upper_limits[i] = True
+            continue
+        if item.error_positive is not None:
+            errors_positive[i] = item.get_error_positive(item_units)
+        if item.error_negative is not None:
+            errors_negative[i] = item.get_error_negative(item_units)
+    return values, errors_positive, errors_negative, upper_limits
+
+
+def _evaluate(function, x):
+    """Evaluate function at points x, broadcasting constant results to one value per point."""
+    numpy = import_numpy()
+    return numpy.broadcast_to(numpy.asarray(function(x), dtype=float), (x.shape[1],))
+
+
+def propagate_many(functions, inputs, method='linear', units=None, n_samples=100000, seed=None, limits='raise'):
+    """Propagate the uncertainties of inputs to each function in functions and return list of PdgDerivedValue.
+
+    inputs is a list of PdgProperty objects (using their best summary value), PdgSummaryValue objects or plain
+    numbers (without uncertainty). units can be set to a single unit or a list with the units for each input,
+    in which the input values are passed to the functions. See the module documentation for how functions
+    are called.
+
+    method 'linear' uses linear error propagation, where each input is shifted by its positive and negative error
+    to determine the positive and negative error of the result. method 'mc' samples n_samples points from the
+    input distributions, using the random number generator seed seed, and returns the median and the central 68%
+    interval of the results. The same samples are used for all functions, so that correlations between the
+    results are preserved. The samples are available as attribute samples of each result.
+
+    By default, inputs that are limits raise PdgApiError. With method 'mc', limits can be set to 'uniform' to
+    sample upper limits uniformly between zero and the limit.
+    """
+    numpy = import_numpy()
+    values, errors_positive, errors_negative, upper_limits = _get_inputs(inputs, units, limits)
+    n = len(values)
+    results = []
+    if method == 'linear':
+        if numpy.any(upper_limits):
+            raise PdgApiError('cannot propagate limits linearly')
+        # Columns: central values, each input shifted up by its positive error, each input shifted down
+        x = numpy.repeat(values[:, numpy.newaxis], 2*n + 1, axis=1)
+        x[numpy.arange(n), 1 + numpy.arange(n)] += errors_positive
+        x[numpy.arange(n), 1 + n + numpy.arange(n)] -= errors_negative
+        for function in functions:
+            y = _evaluate(function, x)
+            shifts = numpy.stack((y[1:n+1] - y[0], y[n+1:] - y[0]))
+            error_positive = numpy.sqrt(numpy.sum(numpy.max(numpy.maximum(shifts, 0.), axis=0)**2))
+            error_negative = numpy.sqrt(numpy.sum(numpy.min(numpy.minimum(shifts, 0.), axis=0)**2))
+            results.append(PdgDerivedValue(float(y[0]), float(error_positive), float(error_negative)))
+    elif method == 'mc':
+        # numpy.random.default_rng() requires numpy >= 1.17, which is not available for Python 2
+        if hasattr(numpy.random, 'default_rng'):
+            rng = numpy.random.default_rng(seed)
+        else:
+            rng = numpy.random.RandomState(seed)
+        z = rng.standard_normal((n, n_samples))
+        x = values[:, numpy.newaxis] + numpy.where(z >= 0, z*errors_positive[:, numpy.newaxis],
+                                                   z*errors_negative[:, numpy.newaxis])
+        if numpy.any(upper_limits):
+            x[upper_limits] = rng.uniform(0., 1., (numpy.count_nonzero(upper_limits), n_samples)) * \
+                values[upper_limits][:, numpy.newaxis]
+        for function in functions:
+            y = _evaluate(function, x)
+            low, median, high = numpy.percentile(y, (15.865, 50., 84.135))
+            results.append(PdgDerivedValue(float(median), float(high - median), float(median - low), y))
+    else:
+        raise PdgApiError('illegal propagation method %s' % method)
+    return results
+
+
+def propagate(function, inputs, method='linear', units=None, n_samples=100000, seed=None, limits='raise'):
+    """Propagate the uncertainties of inputs to function and return PdgDerivedValue (see propagate_many())."""
+    return propagate_many([function], inputs, method, units, n_samples, seed, limits)[0]
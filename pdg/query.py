@@ -0,0 +1,201 @@
+"""
+Queries for summary values across all PDG Identifiers.
+
+PdgSummaryQuery selects summary values by conditions on the columns of the pdgdata and pdgid tables
+(see the database schema documentation). All conditions are compiled into a single SQL query, so that
+for example all upper limits at 90% CL in the 2024 edition are retrieved with
+
+api.summary_values().where(limit_type='U', confidence_level=0.9).edition(2024)
+
+instead of by iterating over all PDG Identifiers. A condition on a column other than equality is given
+by appending one of the operators in OPERATORS to the column name, separated by two underscores, as in
+where(scale_factor__gt=2). Queries are immutable: each method returns a new query with the added
+conditions, so that a query can be refined in different ways.
+"""
+
+import copy
+from sqlalchemy import select, func, Boolean, Float, Integer
+from pdg.data import PdgSummaryValue
+from pdg.errors import PdgApiError
+from pdg.units import convert, canonical_units
+from pdg.utils import import_numpy
+
+
+# Columns returned by PdgSummaryQuery.to_arrays() by default
+ARRAY_COLUMNS = ('pdgid', 'data_type', 'edition', 'value_type', 'in_summary_table', 'value', 'error_positive',
+                 'error_negative', 'scale_factor', 'limit_type', 'confidence_level', 'unit_text')
+
+
+# Operators for conditions in PdgSummaryQuery.where()
+OPERATORS = {
+    'eq': lambda column, value: column == value,
+    'ne': lambda column, value: column != value,
+    'lt': lambda column, value: column < value,
+    'le': lambda column, value: column <= value,
+    'gt': lambda column, value: column > value,
+    'ge': lambda column, value: column >= value,
+    'in': lambda column, value: column.in_(list(value)),
+    'like': lambda column, value: column.like(value),
+    'isnull': lambda column, value: column.is_(None) if value else column.isnot(None),
+}
+
+
+class PdgSummaryQuery(object):
+    """Query for summary values, filtered by conditions on the columns of the pdgdata and pdgid tables."""
+
+    def __init__(self, api):
+        """Create query for all summary values of the default edition of the database used by api."""
+        self.api = api
+        self.conditions = []
+        self.editions = [api.edition]
+        self.max_results = None
+
+    def __iter__(self):
+        """Return iterator over PdgSummaryValue objects matching the query, ordered as in the Summary Tables."""
+        release = self.api.release
+        pdgid_table = release.db.tables['pdgid']
+        pdgdata_table = release.db.tables['pdgdata']
+        query = self._where(select(pdgdata_table, pdgid_table.c.description, pdgid_table.c.data_type), release)
+        query = query.order_by(pdgid_table.c.sort, pdgdata_table.c.sort)
+        if self.max_results is not None:
+            query = query.limit(self.max_results)
+        with release.engine.connect() as conn:
+            for entry in conn.execution_options(yield_per=1000).execute(query):
+                yield PdgSummaryValue(entry._mapping)
+
+    def _copy(self):
+        """Return copy of this query, which can be modified without changing the query."""
+        query = copy.copy(self)
+        query.conditions = list(self.conditions)
+        return query
+
+    @staticmethod
+    def _column(name, release):
+        """Return column of the pdgdata table or, if there is no such column, of the pdgid table of release."""
+        for table_name in ('pdgdata', 'pdgid'):
+            table = release.db.tables[table_name]
+            if name in table.c:
+                return table.c[name]
+        raise PdgApiError('illegal column name %s' % name)
+
+    def _where(self, query, release):
+        """Return SQL query with the join and conditions of this query applied to the tables of release.
+
+        Conditions are stored as (column name, operator, value) and only turned into SQL here, so that all parts
+        of a statement refer to the tables of the release that executes it.
+        """
+        pdgid_table = release.db.tables['pdgid']
+        pdgdata_table = release.db.tables['pdgdata']
+        query = query.select_from(pdgdata_table.join(pdgid_table))
+        query = query.where(pdgdata_table.c.edition.in_(self.editions))
+        for name, operator, value in self.conditions:
+            column = self._column(name, release)
+            if value is None and operator in ('', 'eq'):
+                query = query.where(column.is_(None))
+            else:
+                query = query.where(OPERATORS[operator or 'eq'](column, value))
+        return query
+
+    def where(self, **conditions):
+        """Return query with additional conditions, given as column=value or column__operator=value.
+
+        Columns are those of the pdgdata table or, where the name does not exist there, of the pdgid table.
+        For the available operators see OPERATORS. All conditions must be fulfilled.
+        """
+        query = self._copy()
+        release = self.api.release
+        for key, value in conditions.items():
+            name, _, operator = key.partition('__')
+            if (operator or 'eq') not in OPERATORS:
+                raise PdgApiError('illegal operator %s' % operator)
+            self._column(name, release)
+            query.conditions.append((name, operator, value))
+        return query
+
+    def edition(self, *editions):
+        """Return query for summary values of the given edition(s) instead of the default edition."""
+        query = self._copy()
+        query.editions = [str(edition) for edition in editions]
+        return query
+
+    def limit(self, max_results):
+        """Return query returning at most max_results summary values."""
+        query = self._copy()
+        query.max_results = max_results
+        return query
+
+    def count(self, group_by=None):
+        """Return the number of summary values matching the query.
+
+        If group_by is set to a column name (e.g. 'data_type'), a dict with the number of summary values for each
+        value of this column is returned instead. The limit set with limit() is ignored.
+        """
+        release = self.api.release
+        if group_by is None:
+            with release.engine.connect() as conn:
+                return conn.execute(self._where(select(func.count()), release)).scalar()
+        column = self._column(group_by, release)
+        query = self._where(select(column, func.count()), release).group_by(column).order_by(column)
+        with release.engine.connect() as conn:
+            return dict((item[0], item[1]) for item in conn.execute(query))
+
+    def to_arrays(self, columns=ARRAY_COLUMNS, canonical=False):
+        """Return dict with a numpy array for each of the given columns of the summary values matching the query.
+
+        The arrays are filled from a single query without creating PdgSummaryValue objects. Floating point columns
+        are returned as float64 arrays with NaN for missing values, boolean columns as bool arrays, integer
+        columns as int64 arrays (or float64 if values are missing), and all other columns as object arrays.
+        In addition, the bool arrays is_limit, is_upper_limit and is_lower_limit are returned.
+
+        If canonical is True, the arrays value_canonical, error_positive_canonical and error_negative_canonical hold
+        the values converted into canonical units (GeV for energies and s for times, see pdg.units), which are given
+        by the array unit_canonical. Values in other units are not converted.
+
+        A pandas DataFrame can be created from the arrays without copying the data using
+        pandas.DataFrame(arrays, copy=False). This method requires numpy.
+        """
+        release = self.api.release
+        numpy = import_numpy()
+        # Columns needed for the limit flags and the conversion into canonical units
+        required = ('value', 'error_positive', 'error_negative', 'limit_type', 'confidence_level', 'unit_text')
+        names = list(columns) + [name for name in required if name not in columns]
+        selected = [self._column(name, release).label(name) for name in names]
+        pdgid_table = release.db.tables['pdgid']
+        pdgdata_table = release.db.tables['pdgdata']
+        query = self._where(select(*selected), release).order_by(pdgid_table.c.sort, pdgdata_table.c.sort)
+        if self.max_results is not None:
+            query = query.limit(self.max_results)
+        with release.engine.connect() as conn:
+            rows = conn.execute(query).fetchall()
+        data = list(zip(*rows)) if rows else [()] * len(names)
+        arrays = dict()
+        for name, column, values in zip(names, selected, data):
+            column_type = column.type
+            if isinstance(column_type, Float) or (isinstance(column_type, Integer) and None in values):
+                arrays[name] = numpy.array([numpy.nan if v is None else v for v in values], dtype=numpy.float64)
+            elif isinstance(column_type, Integer):
+                arrays[name] = numpy.array(values, dtype=numpy.int64)
+            elif isinstance(column_type, Boolean):
+                arrays[name] = numpy.array([bool(v) for v in values], dtype=bool)
+            else:
+                arrays[name] = numpy.empty(len(values), dtype=object)
+                arrays[name][:] = values
+        limit_type = arrays['limit_type']
+        arrays['is_upper_limit'] = limit_type == 'U'
+        arrays['is_lower_limit'] = limit_type == 'L'
+        arrays['is_limit'] = numpy.not_equal(limit_type, None) | ~numpy.isnan(arrays['confidence_level'])
+        if canonical:
+            units, inverse = numpy.unique(arrays['unit_text'].astype(str), return_inverse=True)
+            targets = numpy.empty(len(units), dtype=object)
+            factors = numpy.ones(len(units))
+            for i, unit in enumerate(units):
+                targets[i] = canonical_units(str(unit))
+                if targets[i] != unit:
+                    factors[i] = convert(1.0, unit, targets[i])
+            for name in ('value', 'error_positive', 'error_negative'):
+                arrays[name + '_canonical'] = arrays[name] * factors[inverse]
+            arrays['unit_canonical'] = numpy.where(numpy.equal(arrays['unit_text'], None), None, targets[inverse])
+        for name in required:
+            if name not in columns:
+                del arrays[name]
+        return arrays
@@ -0,0 +1,144 @@
+"""
+Full-text search over PDG Identifiers.
+
+The search index is a SQLite FTS5 table over the PDG Identifiers, their descriptions and the names of
+the corresponding particles. It is built from the database used by the API on first use and is either
+kept in memory or stored in a separate (sidecar) SQLite file that can be reused as long as the
+data release of the database does not change.
+
+Descriptions use charge suffixes such as '+-' (e.g. 'pi+- MASS'), which are indexed with each of their charge
+states as aliases, so that a search for 'pi+' or 'pi-' finds them. Results are ranked by their BM25 relevance,
+boosted by the fraction of the words of the description and particle names matched by the search text, so that
+e.g. 'pi+ mass' ranks 'pi+- MASS' above descriptions that mention the pion mass among other quantities.
+"""
+
+import re
+import sqlite3
+import threading
+from sqlalchemy import select
+from pdg.errors import PdgApiError
+
+
+class PdgSearchIndex(object):
+    """Full-text index over PDG Identifier descriptions and particle names."""
+
+    # Relative weights of the columns pdgid, description, names and aliases for ranking results
+    WEIGHTS = (10.0, 1.0, 5.0, 1.0)
+
+    # Version of the layout of the index, which is rebuilt if a stored index has a different version
+    FORMAT = '2'
+
+    # Tokens as split by the FTS5 tokenizer, which keeps the characters '+', '-' and '*' in tokens
+    TOKEN = re.compile(r'[\w+\-*]+', re.UNICODE)
+
+    # Tokens with a charge suffix standing for both charge states (e.g. 'pi+-')
+    CHARGE_SUFFIX = re.compile(r'^(.*\w)(\+-|-\+)$', re.UNICODE)
+
+    def __init__(self, api, filename=None):
+        """Open the search index for the data used by api.
+
+        If filename is None, the index is built in memory. Otherwise, the index is read from the SQLite file
+        filename, or (re)built and stored there if the file does not exist or was built for a different data release.
+        """
+        self.filename = filename
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(filename or ':memory:', check_same_thread=False)
+        self.conn.create_function('pdgsearch_coverage', 2, self.coverage)
+        if self.data_release != api.data_release or self._info('format') != self.FORMAT:
+            self.build(api)
+
+    def _info(self, name):
+        """Return value of name in the metadata of the index, or None if there is no index."""
+        try:
+            with self.lock:
+                return self.conn.execute("SELECT value FROM pdgsearch_info WHERE name = ?", (name,)).fetchone()[0]
+        except (sqlite3.OperationalError, TypeError):
+            return None
+
+    @property
+    def data_release(self):
+        """Data release from which the index was built, or None if there is no index."""
+        return self._info('data_release')
+
+    @classmethod
+    def variants(cls, token):
+        """Return list of token and, for tokens with a charge suffix such as '+-', the token for each charge state."""
+        match = cls.CHARGE_SUFFIX.match(token)
+        if match is None:
+            return [token]
+        return [token, match.group(1) + '+', match.group(1) + '-']
+
+    @classmethod
+    def aliases(cls, text):
+        """Return the charge states of all tokens with a charge suffix in text, separated by spaces."""
+        return ' '.join(variant for token in cls.TOKEN.findall(text or '') for variant in cls.variants(token)[1:])
+
+    @classmethod
+    def coverage(cls, text, query_text):
+        """Return fraction of the tokens in text (or in one of their charge states) starting with a word of query_text."""
+        tokens = cls.TOKEN.findall((text or '').lower())
+        words = (query_text or '').lower().split()
+        if not tokens:
+            return 0.0
+        matched = sum(1 for token in tokens if any(variant.startswith(word) for variant in cls.variants(token)
+                                                   for word in words))
+        return float(matched) / len(tokens)
+
+    def build(self, api):
+        """Build the search index from the database used by api."""
+        release = api.release
+        pdgid_table = release.db.tables['pdgid']
+        pdgparticle_table = release.db.tables['pdgparticle']
+        names = dict()
+        with release.engine.connect() as conn:
+            for item in conn.execute(select(pdgparticle_table.c.pdgid, pdgparticle_table.c.name)):
+                if item.name is not None:
+                    names.setdefault(item.pdgid, []).append(item.name)
+            query = select(pdgid_table.c.pdgid, pdgid_table.c.description, pdgid_table.c.data_type,
+                           pdgid_table.c.sort)
+            entries = []
+            for item in conn.execute(query):
+                particle_names = ' '.join(names.get(item.pdgid, []))
+                aliases = ' '.join([self.aliases(item.description), self.aliases(particle_names)]).strip()
+                entries.append((item.pdgid, item.description, particle_names, aliases, item.data_type, item.sort))
+        with self.lock:
+            try:
+                self.conn.executescript("""
+                    DROP TABLE IF EXISTS pdgsearch;
+                    DROP TABLE IF EXISTS pdgsearch_info;
+                    CREATE VIRTUAL TABLE pdgsearch USING fts5(pdgid, description, names, aliases,
+                        data_type UNINDEXED, sort UNINDEXED, tokenize = "unicode61 tokenchars '+-*'");
+                    CREATE TABLE pdgsearch_info (name TEXT PRIMARY KEY, value TEXT);
+                """)
+            except sqlite3.OperationalError as e:
+                raise PdgApiError('cannot build search index (SQLite FTS5 required): %s' % e)
+            self.conn.executemany('INSERT INTO pdgsearch VALUES (?, ?, ?, ?, ?, ?)', entries)
+            self.conn.execute("INSERT INTO pdgsearch_info VALUES ('data_release', ?)", (api.data_release,))
+            self.conn.execute("INSERT INTO pdgsearch_info VALUES ('format', ?)", (self.FORMAT,))
+            self.conn.commit()
+
+    @staticmethod
+    def make_query(text):
+        """Return FTS5 query matching all words in text, where each word may be a prefix (for autocompletion)."""
+        return ' '.join('"%s" *' % word.replace('"', '""') for word in text.split())
+
+    def search(self, text, data_type_key=None, limit=20):
+        """Return list of (pdgid, data_type) tuples for the PDG Identifiers best matching text.
+
+        data_type_key can be set to select specific data types (see PdgApi.doc_data_type_keys()). The SQL
+        wildcard character ('%') is allowed. Results are ranked by relevance (see the module documentation).
+        """
+        query = self.make_query(text)
+        if not query:
+            return []
+        sql = 'SELECT pdgid, data_type FROM pdgsearch WHERE pdgsearch MATCH ?'
+        params = [query]
+        if data_type_key is not None:
+            sql += ' AND data_type LIKE ?' if '%' in data_type_key else ' AND data_type = ?'
+            params.append(data_type_key)
+        # BM25 scores are negative, with lower scores for better matches
+        sql += " ORDER BY bm25(pdgsearch, %s, %s, %s, %s)" % self.WEIGHTS
+        sql += " * (1 + pdgsearch_coverage(description || ' ' || names, ?)), sort LIMIT ?"
+        params.extend([text, limit])
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
@@ -0,0 +1,358 @@
+"""
+Local lookup server for PDG data.
+
+The server keeps a single PdgApi with warm caches in memory and answers requests for PDG data in JSON
+format over HTTP on a local TCP port or unix socket, so that short-lived programs can look up data without
+importing SQLAlchemy and reading the database themselves. It is started from the command line with
+
+python -m pdg serve [--database database_url] [--port port | --socket path]
+
+and accessed with PdgClient from module pdg.client. The paths and the JSON documents returned are the same
+as for the PDG REST API (see restapi.md), with additional paths for particles and for batch requests:
+
+GET  /info                      Metadata of the database
+GET  /summaries/PDGID[/EDITION] Summary data for a PDG Identifier
+POST /summaries                 Summary data for a list of PDG Identifiers, {"pdgids": [...], "edition": ...}
+GET  /particles/MCID[/EDITION]  Basic data of the particle with the given MC ID (see pdg.table)
+POST /particles                 Basic data of the particles with a list of MC IDs, {"mcids": [...], "edition": ...}
+GET  /statistics                Number of requests, throughput and latency of the server
+
+Batch requests return a list "results" with one document per PDG Identifier or MC ID. Documents for items
+that could not be found or resolved have status_code 404 and a status_message describing the problem.
+Requests are handled concurrently by one thread per connection.
+"""
+
+import collections
+import json
+import numbers
+import socket
+import threading
+import time
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn, UnixStreamServer
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn, UnixStreamServer
+import pdg
+from pdg.bulk import load_particle_properties
+from pdg.collection import load_summaries
+from pdg.errors import PdgApiError
+from pdg.particle import PdgParticle
+from pdg.table import make_particle_row
+from pdg.utils import parse_id, make_id
+
+
+# Default TCP port of the server
+DEFAULT_PORT = 8765
+
+# Number of most recent requests from which latency percentiles are computed
+STATISTICS_WINDOW = 10000
+
+# Maximum number of PDG Identifiers or MC IDs in a batch request
+MAX_BATCH_ITEMS = 10000
+
+# HTTP status messages used by the server
+STATUS_MESSAGES = {200: 'OK', 400: 'Invalid path', 404: 'Not found', 500: 'Internal error'}
+
+
+class PdgRequestError(Exception):
+    """Error handling a request, resulting in the given HTTP status code."""
+
+    def __init__(self, status_code, message):
+        super(PdgRequestError, self).__init__(message)
+        self.status_code = status_code
+
+
+class PdgServerStatistics(object):
+    """Thread-safe request counters and latency statistics of a server."""
+
+    def __init__(self, window=STATISTICS_WINDOW):
+        self.start_time = time.time()
+        self.requests = collections.Counter()
+        self.errors = 0
+        self.items = 0
+        self.latencies = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, latency, status_code, items=1):
+        """Record a request for endpoint that took latency seconds and returned status_code."""
+        with self._lock:
+            self.requests[endpoint] += 1
+            self.items += items
+            if status_code != 200:
+                self.errors += 1
+            self.latencies.append(latency)
+
+    def report(self):
+        """Return dict with request counts, throughput and latency percentiles (in seconds)."""
+        with self._lock:
+            latencies = sorted(self.latencies)
+            requests = dict(self.requests)
+            errors = self.errors
+            items = self.items
+        uptime = time.time() - self.start_time
+        total = sum(requests.values())
+        latency = dict()
+        if latencies:
+            for name, fraction in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99)):
+                latency[name] = latencies[min(len(latencies) - 1, int(fraction * len(latencies)))]
+            latency['mean'] = sum(latencies) / len(latencies)
+            latency['max'] = latencies[-1]
+        return {'uptime': uptime,
+                'requests': total,
+                'requests_by_endpoint': requests,
+                'errors': errors,
+                'items': items,
+                'throughput': total / uptime if uptime > 0 else 0.0,
+                'latency': latency}
+
+
+def summary_value_document(summary):
+    """Return dict describing a summary value as in the PDG REST API."""
+    doc = {'value': summary.value,
+           'error_positive': summary.error_positive,
+           'error_negative': summary.error_negative,
+           'value_text': summary.display_value_text,
+           'unit': summary.units,
+           'confidence_level': summary.confidence_level,
+           'type': summary.value_type}
+    if summary['scale_factor'] is not None:
+        doc['scale_factor'] = summary.scale_factor
+    for flag in ('is_limit', 'is_upper_limit', 'is_lower_limit'):
+        if getattr(summary, flag):
+            doc[flag] = True
+    return doc
+
+
+def property_document(prop):
+    """Return dict describing a property or branching fraction as in the PDG REST API."""
+    doc = {'pdgid': prop.pdgid,
+           'description': prop.description,
+           'pdg_values': [summary_value_document(summary) for summary in prop.summary_values()]}
+    if prop.data_type.startswith('BF'):
+        doc['mode_number'] = prop._get_pdgid()['mode_number']
+    return doc
+
+
+class PdgService(object):
+    """Handles requests to the lookup server using a single PdgApi."""
+
+    def __init__(self, api):
+        """Create service for api and build the indexes it uses."""
+        self.api = api
+        self.statistics = PdgServerStatistics()
+        self.api.hierarchy_index()
+
+    def warm(self):
+        """Build the particle table of the default edition, so that particle requests are served from warm caches."""
+        self.api.particle_table(on_error='record')
+
+    def preamble(self, status_code, request_url, status_message=None):
+        """Return the general information included in all documents."""
+        return {'status_code': status_code,
+                'status_message': status_message or STATUS_MESSAGES.get(status_code, ''),
+                'request_timestamp': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()),
+                'request_url': request_url,
+                'edition': self.api.edition,
+                'about': 'PDG lookup server, PDG API version %s. For documentation see https://pdgapi.lbl.gov/doc' %
+                         pdg.__version__}
+
+    def handle(self, method, path, body=None):
+        """Handle request and return (status code, JSON-serializable document)."""
+        start = time.time()
+        parts = [part for part in path.split('?')[0].split('/') if part]
+        endpoint = '/' + (parts[0] if parts else '')
+        items = 1
+        try:
+            if method == 'POST':
+                try:
+                    request = json.loads(body or '{}')
+                except ValueError:
+                    raise PdgRequestError(400, 'Invalid JSON request')
+                if not isinstance(request, dict):
+                    raise PdgRequestError(400, 'Invalid JSON request')
+                if parts == ['summaries']:
+                    results = self.summaries(self._items(request, 'pdgids'), request.get('edition'))
+                elif parts == ['particles']:
+                    results = self.particles(self._items(request, 'mcids'), request.get('edition'))
+                else:
+                    raise PdgRequestError(400, 'Invalid path %s' % path)
+                items = len(results)
+                doc = {'results': results}
+            elif method == 'GET' and parts == ['info']:
+                doc = dict((key, self.api.info(key)) for key in ('data_release_timestamp', 'citation', 'license'))
+                doc['data_release'] = self.api.data_release
+            elif method == 'GET' and parts == ['statistics']:
+                doc = self.statistics.report()
+            elif method == 'GET' and len(parts) in (2, 3) and parts[0] == 'summaries':
+                doc = self._single(self.summaries([parts[1]], parts[2] if len(parts) == 3 else None)[0])
+            elif method == 'GET' and len(parts) in (2, 3) and parts[0] == 'particles':
+                try:
+                    mcid = int(parts[1])
+                except ValueError:
+                    raise PdgRequestError(400, 'Invalid MC ID %s' % parts[1])
+                doc = self._single(self.particles([mcid], parts[2] if len(parts) == 3 else None)[0])
+            else:
+                raise PdgRequestError(400, 'Invalid path %s' % path)
+            status_code = 200
+            message = None
+        except PdgRequestError as e:
+            status_code, message, doc = e.status_code, str(e), {}
+        except Exception as e:
+            status_code, message, doc = 500, 'Internal error: %s' % e, {}
+        result = self.preamble(status_code, path, message)
+        result.update(doc)
+        self.statistics.record(endpoint, time.time() - start, status_code, items)
+        return status_code, result
+
+    @staticmethod
+    def _items(request, key):
+        """Return the list of items given by key in a batch request."""
+        items = request.get(key)
+        if not isinstance(items, list):
+            raise PdgRequestError(400, 'Batch request requires a list %s' % key)
+        if len(items) > MAX_BATCH_ITEMS:
+            raise PdgRequestError(400, 'Batch request with more than %s items' % MAX_BATCH_ITEMS)
+        return items
+
+    @staticmethod
+    def _single(doc):
+        """Return document of a single item, raising PdgRequestError if the item could not be found."""
+        if doc.get('status_code', 200) != 200:
+            raise PdgRequestError(doc['status_code'], doc['status_message'])
+        return doc
+
+    def summaries(self, pdgids, edition=None):
+        """Return list of REST API summary documents for the given PDG Identifiers.
+
+        The summary values of all properties involved are loaded with a few bulk queries.
+        """
+        hierarchy = self.api.hierarchy_index()
+        documents = []
+        properties = []
+        for pdgid in pdgids:
+            baseid, pdgid_edition = parse_id(str(pdgid))
+            pdgid_edition = str(pdgid_edition or edition or self.api.edition)
+            if baseid not in hierarchy:
+                documents.append({'pdgid': pdgid, 'status_code': 404,
+                                  'status_message': 'PDG Identifier %s not found' % pdgid})
+                continue
+            if hierarchy.rows[baseid]['data_type'] == 'PART':
+                related = [baseid] + hierarchy.descendants(baseid)
+            else:
+                related = [baseid]
+            items = []
+            for related_id in related:
+                row = hierarchy.rows[related_id]
+                item = self.api.make(make_id(related_id, pdgid_edition), row['data_type'], pdgid_edition)
+                item.cache['pdgid'] = row
+                items.append(item)
+            documents.append(items)
+            properties.extend(items if len(items) == 1 else items[1:])
+        load_summaries(self.api, properties)
+        results = []
+        for items in documents:
+            if isinstance(items, dict):
+                results.append(items)
+            elif items[0].data_type != 'PART':
+                results.append(property_document(items[0]))
+            else:
+                summaries = {'properties': [], 'branching_fractions': []}
+                for prop in items[1:]:
+                    if prop.summary_values():
+                        key = 'branching_fractions' if prop.data_type.startswith('BF') else 'properties'
+                        summaries[key].append(property_document(prop))
+                results.append({'pdgid': items[0].pdgid, 'description': items[0].description,
+                                'summaries': summaries})
+        return results
+
+    def particles(self, mcids, edition=None):
+        """Return list of documents with the basic particle data (see pdg.table) for the given MC IDs.
+
+        MC IDs must be integers. For other items (including booleans, floats and strings), the document has
+        status_code 400.
+        """
+        # Valid MC IDs by position, since items of a JSON request need not be hashable
+        valid = dict()
+        for i, mcid in enumerate(mcids):
+            if isinstance(mcid, numbers.Integral) and not isinstance(mcid, bool):
+                valid[i] = int(mcid)
+        table = dict()
+        if edition is None or str(edition) == self.api.edition:
+            table = dict((row.mcid, row) for row in self.api.particle_table(on_error='record'))
+        missing = [mcid for mcid in set(valid.values()) if mcid not in table]
+        if missing:
+            particles = self.api.get_particles_by_mcids(missing, edition)
+            load_particle_properties(self.api, [p for p in particles if isinstance(p, PdgParticle)], ('M', 'G', 'T'))
+            for mcid, particle in zip(missing, particles):
+                table[mcid] = make_particle_row(particle, mcid, 'record')
+        results = []
+        for i, mcid in enumerate(mcids):
+            row = table.get(valid[i]) if i in valid else None
+            if row is None:
+                results.append({'mcid': mcid, 'status_code': 400, 'status_message': 'Invalid MC ID %s' % mcid})
+            elif row.pdgid is None:
+                results.append({'mcid': mcid, 'status_code': 404, 'status_message': row.error})
+            else:
+                results.append(row._asdict())
+        return results
+
+
+class PdgRequestHandler(BaseHTTPRequestHandler):
+    """HTTP request handler passing requests to the PdgService of the server."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def _respond(self, method, body=None):
+        status_code, doc = self.server.service.handle(method, self.path, body)
+        data = json.dumps(doc).encode('utf-8')
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._respond('GET')
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self._respond('POST', self.rfile.read(length).decode('utf-8'))
+
+    def address_string(self):
+        return str(self.client_address[0]) if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+
+class PdgTCPServer(ThreadingMixIn, HTTPServer):
+    """Lookup server listening on a TCP port."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class PdgUnixServer(ThreadingMixIn, UnixStreamServer):
+    """Lookup server listening on a unix socket."""
+
+    daemon_threads = True
+
+
+def make_server(api, host='127.0.0.1', port=DEFAULT_PORT, socket_path=None, verbose=False):
+    """Return server for api listening on host and port or, if socket_path is set, on a unix socket.
+
+    The server is started by calling its serve_forever() method. With port 0, a free port is chosen, which is
+    available from server.server_address.
+    """
+    if socket_path is not None:
+        if not hasattr(socket, 'AF_UNIX'):
+            raise PdgApiError('unix sockets are not supported on this platform')
+        server = PdgUnixServer(socket_path, PdgRequestHandler)
+    else:
+        server = PdgTCPServer((host, port), PdgRequestHandler)
+    server.service = PdgService(api)
+    server.verbose = verbose
+    return server
@@ -0,0 +1,120 @@
+"""
+Read-only snapshots of PDG databases.
+
+A snapshot is a copy of a PDG database stored as a SQLite file, with additional indexes for the lookups
+done by the API. Snapshots are opened read-only as immutable files and are accessed through memory mapping,
+so that many processes on the same machine using the same snapshot share a single copy of the data in the
+operating system page cache, and opening a snapshot requires neither reading nor converting the data.
+
+Snapshots are created from the command line with
+
+python -m pdg snapshot [--database database_url] filename
+
+and used by connecting with pdg.connect('snapshot:///filename'). As for SQLite database URLs, filename is
+relative to the current directory unless it starts with a slash (i.e. 'snapshot:////path/to/file' for an
+absolute path). A snapshot must not be modified while in use. Since a new snapshot is written to a temporary
+file and then moved to filename, a snapshot can be replaced by a new data release while in use, and running
+programs switch to it when calling PdgApi.reload().
+"""
+
+import os
+import sys
+import sqlalchemy
+from sqlalchemy import event, select, text
+
+
+# Scheme of database URLs referring to snapshots
+SNAPSHOT_SCHEME = 'snapshot://'
+
+# Maximum number of bytes of a snapshot accessed through memory mapping
+MMAP_SIZE = 1 << 31
+
+# Indexes created in snapshots, given as index name: (table name, column names)
+SNAPSHOT_INDEXES = {
+    'snapshot_pdgid_parent_pdgid': ('pdgid', ('parent_pdgid',)),
+    'snapshot_pdgid_data_type': ('pdgid', ('data_type', 'sort')),
+    'snapshot_pdgdata_pdgid_id': ('pdgdata', ('pdgid_id', 'edition')),
+    'snapshot_pdgdata_edition': ('pdgdata', ('edition',)),
+    'snapshot_pdgparticle_pdgid': ('pdgparticle', ('pdgid',)),
+    'snapshot_pdgparticle_pdgid_id': ('pdgparticle', ('pdgid_id',)),
+    'snapshot_pdgparticle_mcid': ('pdgparticle', ('mcid',)),
+    'snapshot_pdgparticle_name': ('pdgparticle', ('name',)),
+    'snapshot_pdgdecay_pdgid': ('pdgdecay', ('pdgid',)),
+}
+
+# Number of rows copied at a time when creating a snapshot
+COPY_CHUNK_SIZE = 10000
+
+
+def is_snapshot_url(database_url):
+    """Return True if database_url refers to a snapshot."""
+    return database_url.startswith(SNAPSHOT_SCHEME)
+
+
+def snapshot_filename(database_url):
+    """Return the file name of the snapshot referred to by database_url."""
+    return database_url[len(SNAPSHOT_SCHEME) + 1:]
+
+
+def create_engine(database_url, **kwargs):
+    """Return SQLAlchemy engine for database_url, which may refer to a snapshot.
+
+    Snapshots are opened read-only as immutable SQLite files, with memory mapping enabled for all connections.
+    On Python 2, whose sqlite3 module cannot open SQLite URIs, snapshots are opened as regular files in which
+    changes are disabled with PRAGMA query_only.
+    """
+    if not is_snapshot_url(database_url):
+        return sqlalchemy.create_engine(database_url, **kwargs)
+    filename = os.path.abspath(snapshot_filename(database_url))
+    if sys.version_info[0] < 3:
+        engine = sqlalchemy.create_engine('sqlite:///%s' % filename, **kwargs)
+    else:
+        engine = sqlalchemy.create_engine('sqlite:///file:%s?mode=ro&immutable=1&uri=true' % filename, **kwargs)
+
+    @event.listens_for(engine, 'connect')
+    def enable_mmap(dbapi_connection, connection_record):
+        dbapi_connection.execute('PRAGMA mmap_size = %d' % MMAP_SIZE)
+        if sys.version_info[0] < 3:
+            dbapi_connection.execute('PRAGMA query_only = ON')
+
+    return engine
+
+
+def write_snapshot(database_url, filename):
+    """Write snapshot of the database at database_url to filename, replacing any existing file.
+
+    The snapshot is first written to a temporary file, which is then renamed to filename, so that programs using
+    an existing snapshot at filename are not affected.
+    """
+    source = create_engine(database_url)
+    db = sqlalchemy.MetaData()
+    db.reflect(source)
+    tmp_filename = '%s.tmp%d' % (filename, os.getpid())
+    if os.path.exists(tmp_filename):
+        os.remove(tmp_filename)
+    target = sqlalchemy.create_engine('sqlite:///%s' % tmp_filename)
+    try:
+        with target.begin() as target_conn:
+            target_conn.exec_driver_sql('PRAGMA journal_mode = OFF')
+            db.create_all(target_conn)
+            with source.connect() as source_conn:
+                for table in db.sorted_tables:
+                    rows = source_conn.execution_options(yield_per=COPY_CHUNK_SIZE).execute(select(table))
+                    for chunk in rows.partitions():
+                        target_conn.execute(table.insert(), [row._mapping for row in chunk])
+            for name, (table_name, columns) in sorted(SNAPSHOT_INDEXES.items()):
+                if table_name in db.tables and all(c in db.tables[table_name].c for c in columns):
+                    target_conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS %s ON %s (%s)' %
+                                                (name, table_name, ', '.join(columns)))
+            target_conn.exec_driver_sql('ANALYZE')
+        with target.connect() as target_conn:
+            target_conn.execution_options(isolation_level='AUTOCOMMIT').execute(text('VACUUM'))
+    except BaseException:
+        target.dispose()
+        os.remove(tmp_filename)
+        raise
+    finally:
+        source.dispose()
+    target.dispose()
+    # os.replace() is not available on Python 2, where os.rename() replaces files on POSIX systems
+    getattr(os, 'replace', os.rename)(tmp_filename, filename)
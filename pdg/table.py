@@ -0,0 +1,138 @@
+"""
+Table of basic particle data.
+
+The particle table has one row for each particle charge state with an MC ID, giving its name, charge,
+quantum numbers, and PDG best mass, width and lifetime with errors. The table is built with a small number
+of bulk queries (see module pdg.bulk), and the best values are determined in exactly the same way as by
+PdgParticle.mass, PdgParticle.width, etc. Tables are kept in the release cache of the API and can be stored
+in a file, from which they are read as long as the data release of the database does not change.
+"""
+
+import collections
+import json
+import os
+from sqlalchemy import select
+import pdg
+from pdg.bulk import load_particle_properties
+from pdg.errors import PdgApiError, PdgNoDataError, PdgAmbiguousValueError
+from pdg.particle import PdgParticle
+from pdg.utils import best
+
+
+# Columns of the particle table
+PARTICLE_TABLE_COLUMNS = ('pdgid', 'name', 'mcid', 'charge',
+                          'quantum_I', 'quantum_G', 'quantum_J', 'quantum_P', 'quantum_C',
+                          'mass', 'mass_error', 'width', 'width_error', 'lifetime', 'lifetime_error',
+                          'is_generic', 'is_stable', 'error')
+
+# Columns filled from PdgParticle attributes of the same name
+PARTICLE_ATTRIBUTES = PARTICLE_TABLE_COLUMNS[1:-1]
+
+# Row of the particle table
+PdgParticleRow = collections.namedtuple('PdgParticleRow', PARTICLE_TABLE_COLUMNS)
+
+# Values of parameter on_error of particle_table()
+ON_ERROR_OPTIONS = ('skip', 'raise', 'record')
+
+
+def _lifetime_from_width(particle):
+    """Return True if the lifetime of particle is derived from its width (see PdgParticle.lifetime)."""
+    if particle.api.pedantic or not particle.has_width_entry:
+        return False
+    try:
+        best(particle.lifetimes(), False, is_generic=particle.is_generic)
+    except PdgNoDataError:
+        return True
+    except PdgAmbiguousValueError:
+        return False
+    return False
+
+
+def make_particle_row(particle, mcid, on_error='skip'):
+    """Return PdgParticleRow for particle with MC ID mcid, or None if it is skipped due to an error.
+
+    particle is a PdgParticle with its properties loaded (see pdg.bulk.load_particle_properties()), or the
+    exception raised when resolving mcid, as returned by PdgApi.get_particles_by_mcids(). on_error is handled as
+    in build_particle_table().
+    """
+    values = dict((column, None) for column in PARTICLE_TABLE_COLUMNS)
+    values['mcid'] = mcid
+    errors = []
+    if isinstance(particle, PdgParticle):
+        values['pdgid'] = particle.baseid
+        for attribute in PARTICLE_ATTRIBUTES:
+            # Lifetimes cannot be derived from a width that is unknown (or zero) or from an asymmetric width error,
+            # in which case they are left as None
+            if attribute in ('lifetime', 'lifetime_error') and _lifetime_from_width(particle):
+                if not values['width'] or (attribute == 'lifetime_error' and values['width_error'] is None):
+                    continue
+            try:
+                values[attribute] = getattr(particle, attribute)
+            except (PdgNoDataError, PdgAmbiguousValueError) as e:
+                if on_error == 'raise':
+                    raise
+                errors.append('%s: %s' % (attribute, e))
+    else:
+        if on_error == 'raise':
+            raise particle
+        errors.append(str(particle))
+    if errors:
+        if on_error == 'skip':
+            return None
+        values['error'] = '; '.join(errors)
+    return PdgParticleRow(**values)
+
+
+def build_particle_table(api, edition=None, on_error='skip'):
+    """Return particle table for the given (or the default) edition as a list of PdgParticleRow tuples.
+
+    on_error determines what happens if the particle for an MC ID cannot be resolved or one of its values
+    cannot be determined (e.g. because the best value is ambiguous in pedantic mode). With 'skip', the charge
+    state is omitted from the table, with 'raise', the exception is raised, and with 'record', the row is
+    included with None for the missing values and a description of the problem in column error.
+    Lifetimes that would be derived from an unknown width (or from an asymmetric width error) are None
+    without an error.
+    Rows are ordered by MC ID.
+    """
+    if on_error not in ON_ERROR_OPTIONS:
+        raise PdgApiError('illegal value %s for on_error' % on_error)
+    release = api.release
+    pdgparticle_table = release.db.tables['pdgparticle']
+    query = select(pdgparticle_table.c.mcid).distinct()
+    query = query.where(pdgparticle_table.c.entry_type == 'P')
+    query = query.where(pdgparticle_table.c.mcid.isnot(None))
+    query = query.order_by(pdgparticle_table.c.mcid)
+    with release.engine.connect() as conn:
+        mcids = [item[0] for item in conn.execute(query)]
+    particles = api.get_particles_by_mcids(mcids, edition)
+    load_particle_properties(api, [p for p in particles if isinstance(p, PdgParticle)], ('M', 'G', 'T'))
+    rows = [make_particle_row(particle, mcid, on_error) for mcid, particle in zip(mcids, particles)]
+    return [row for row in rows if row is not None]
+
+
+def _metadata(api, edition, on_error):
+    """Return metadata identifying the data and options from which a particle table was built."""
+    return {'data_release': api.data_release, 'edition': edition, 'pedantic': api.pedantic,
+            'on_error': on_error, 'api_version': pdg.__version__, 'columns': list(PARTICLE_TABLE_COLUMNS)}
+
+
+def read_particle_table(filename, api, edition, on_error):
+    """Return particle table stored in filename, or None if it was built for different data or options."""
+    try:
+        with open(filename) as f:
+            stored = json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+    if any(stored.get(key) != value for key, value in _metadata(api, edition, on_error).items()):
+        return None
+    return [PdgParticleRow(*row) for row in stored['rows']]
+
+
+def write_particle_table(filename, table, api, edition, on_error):
+    """Store particle table in filename, replacing the file at once so that readers never see a partial table."""
+    stored = dict(_metadata(api, edition, on_error), rows=[list(row) for row in table])
+    tmp_filename = '%s.tmp%d' % (filename, os.getpid())
+    with open(tmp_filename, 'w') as f:
+        json.dump(stored, f)
+    # os.replace() is not available on Python 2, where os.rename() replaces files on POSIX systems
+    getattr(os, 'replace', os.rename)(tmp_filename, filename)
@@ -0,0 +1,151 @@
+"""
+Recording of data accesses and prefetching of data that is usually accessed together.
+
+A PdgTraceRecorder writes the data accesses made through a PdgApi to a file in JSON lines format, with one
+event per line giving the time, the thread, the method, the identifier (PDG Identifier, particle name or
+MC ID) and the edition of the access. Events for the particle data of a specific charge state also give its
+MC ID (mcid). The methods recorded are
+
+get, get_particle_by_name, get_particle_by_mcid     calls of the PdgApi methods of the same name
+summary_values                                      loading of the summary values of a PDG Identifier
+particle_data                                       loading of the particle data of a PDG Identifier
+
+Recording is started with PdgApi.record_trace(filename).
+
+A PdgPrefetcher learns from recorded traces which summary values are usually loaded after a given access,
+e.g. the masses, widths and branching fractions of a particle after get_particle_by_mcid(). Once enabled with
+PdgApi.enable_prefetch(), each access for which such values are predicted loads all of them with a single
+query into the shared caches of the data release (see pdg.warm), from which they are then taken when they
+are actually requested. The number of events recorded and of prefetch queries and values are available
+from PdgApi.statistics().
+"""
+
+import collections
+import json
+import threading
+import time
+from pdg.utils import MAX_IN_CLAUSE_SIZE
+from pdg.warm import load_shared_summaries
+
+
+# Number of subsequent events of the same thread considered to be accessed together with an event
+DEFAULT_WINDOW = 50
+
+# Minimum fraction of the occurrences of an event after which a summary value must be loaded to be prefetched
+DEFAULT_MIN_SUPPORT = 0.5
+
+# Minimum number of occurrences of an event before predictions are made for it
+DEFAULT_MIN_COUNT = 2
+
+
+def read_trace(filename):
+    """Return iterator over the events (dicts) of a trace file written by PdgTraceRecorder."""
+    with open(filename) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class PdgTraceRecorder(object):
+    """Writes the data accesses made through a PdgApi to a trace file in JSON lines format."""
+
+    def __init__(self, filename):
+        """Create recorder appending events to filename."""
+        self.filename = filename
+        self.events = 0
+        self._file = open(filename, 'a')
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, self.filename)
+
+    def record(self, method, identifier, edition, mcid=None):
+        """Write event for an access by method to the data for identifier in edition (and charge state mcid)."""
+        event = {'time': time.time(), 'thread': threading.current_thread().ident,
+                 'method': method, 'id': identifier, 'edition': edition}
+        if mcid is not None:
+            event['mcid'] = mcid
+        line = json.dumps(event) + '\n'
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line)
+                self.events += 1
+
+    def close(self):
+        """Stop recording and close the trace file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class PdgPrefetcher(object):
+    """Prefetches the summary values that recorded traces show to be loaded after a given access."""
+
+    def __init__(self, api, window=DEFAULT_WINDOW, min_support=DEFAULT_MIN_SUPPORT, min_count=DEFAULT_MIN_COUNT):
+        """Create prefetcher for api, which has not learned anything yet (see learn()).
+
+        The summary values loaded within the next window events of the same thread after an event are considered
+        to be accessed together with it. They are prefetched when the event occurs again if they were loaded after
+        at least a fraction min_support of the at least min_count earlier occurrences of the event.
+        """
+        self.api = api
+        self.window = window
+        self.min_support = min_support
+        self.min_count = min_count
+        self.counts = collections.Counter()
+        self.follows = collections.defaultdict(collections.Counter)
+        self._predictions = dict()
+
+    def __repr__(self):
+        return '%s(%d events)' % (self.__class__.__name__, len(self.counts))
+
+    @staticmethod
+    def key(method, identifier, edition):
+        """Return the key under which an event is learned."""
+        return method, str(identifier), str(edition)
+
+    def learn(self, events):
+        """Learn co-access from an iterable of events (as returned by read_trace())."""
+        by_thread = collections.defaultdict(list)
+        for event in events:
+            by_thread[event.get('thread')].append(self.key(event['method'], event['id'], event['edition']))
+        for keys in by_thread.values():
+            for i, key in enumerate(keys):
+                self.counts[key] += 1
+                following = set(k for k in keys[i+1:i+1+self.window] if k[0] == 'summary_values' and k != key)
+                self.follows[key].update(following)
+        self._predictions = dict()
+
+    def learn_file(self, filename):
+        """Learn co-access from a trace file."""
+        self.learn(read_trace(filename))
+
+    def predictions(self, method, identifier, edition):
+        """Return list of (PDG Identifier, edition) of the summary values predicted to be loaded after an event."""
+        key = self.key(method, identifier, edition)
+        predictions = self._predictions.get(key)
+        if predictions is None:
+            count = self.counts.get(key, 0)
+            predictions = []
+            if count >= self.min_count:
+                predictions = sorted((k[1], k[2]) for k, n in self.follows.get(key, {}).items()
+                                     if float(n) / count >= self.min_support)
+            self._predictions[key] = predictions
+        return predictions
+
+    def on_access(self, method, identifier, edition):
+        """Prefetch the summary values predicted for an event that are not yet in the shared caches."""
+        release = self.api.release
+        by_edition = dict()
+        for pdgid, pdgid_edition in self.predictions(method, identifier, edition):
+            if pdgid not in release.cache.get(('summary', pdgid_edition), {}):
+                by_edition.setdefault(pdgid_edition, []).append(pdgid)
+        if not by_edition:
+            return
+        with release.engine.connect() as conn:
+            for pdgid_edition, pdgids in by_edition.items():
+                for i in range(0, len(pdgids), MAX_IN_CLAUSE_SIZE):
+                    load_shared_summaries(release, conn, pdgids[i:i+MAX_IN_CLAUSE_SIZE], pdgid_edition)
+                    self.api._count('prefetch.queries')
+                self.api._count('prefetch.values', len(pdgids))
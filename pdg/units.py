@@ -38,3 +38,18 @@ def convert(value, old_units=None, new_units=None):
         if old_factor[1] != new_factor[1]:
             raise PdgApiError('Illegal unit conversion from %s to %s', old_factor[1], new_factor[1])
         return value * old_factor[0] / new_factor[0]
+
+
+# Units in which the API returns energies (masses, widths) and times (lifetimes)
+CANONICAL_UNITS = {
+    'eV': 'GeV',
+    's': 's',
+}
+
+
+def canonical_units(units):
+    """Return the canonical units for quantities given in units, or units if they cannot be converted."""
+    try:
+        return CANONICAL_UNITS[UNIT_CONVERSION_FACTORS[units][1]]
+    except KeyError:
+        return units
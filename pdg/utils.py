@@ -2,8 +2,22 @@
 Utilities for PDG API.
 """
 
-from pdg.errors import PdgNoDataError, PdgAmbiguousValueError, PdgRoundingError
+from pdg.errors import PdgApiError, PdgNoDataError, PdgAmbiguousValueError, PdgRoundingError
 import math
+import re
+
+
+# Maximum number of values bound to a single SQL IN clause
+MAX_IN_CLAUSE_SIZE = 500
+
+
+def import_numpy():
+    """Return the numpy module, or raise PdgApiError if numpy is not installed."""
+    try:
+        import numpy
+    except ImportError:
+        raise PdgApiError('numpy is required for this feature - install with: python -m pip install pdg[numpy]')
+    return numpy
 
 
 def pdg_round(value, error):
@@ -87,3 +101,23 @@ def best(properties, pedantic=False, quantity=None, is_generic=False):
                 return props_best[0]
             else:
                 return props_without_alternates[0]
+
+
+def matches_data_type_key(data_type, data_type_key=None, omit_branching_ratios=False):
+    """Return True if data_type is selected by data_type_key, as described for PdgParticle.properties().
+
+    The SQL wildcard character ('%') is allowed in data_type_key, which is then matched case-insensitively
+    like the SQL LIKE operator. data_type_key None selects all data types except branching fractions and ratios.
+    """
+    def like(pattern):
+        return data_type is not None and re.match('^%s$' % '.*'.join(re.escape(part) for part in pattern.split('%')),
+                                                  data_type, re.IGNORECASE) is not None
+    if data_type_key is None:
+        return not (like('BF%') or like('BR%'))
+    if omit_branching_ratios and like('BR%'):
+        return False
+    if data_type_key == '%':
+        return True
+    if '%' in data_type_key:
+        return like(data_type_key)
+    return data_type == data_type_key
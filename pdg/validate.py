@@ -0,0 +1,164 @@
+"""
+Consistency checks over a whole PDG database.
+
+The checks verify that every particle resolves to a unique entry in the particle table, that every property with
+summary values has a PDG best summary value, and that mass, width and lifetime can be determined for every particle
+charge state. All checks are run both in pedantic and non-pedantic mode. The work is split into chunks that are
+processed in parallel by a pool of worker processes, each of which loads the data it needs using bulk queries.
+
+The checks can be run from the command line with
+
+python -m pdg validate [options]
+
+which writes a report in JSON format.
+"""
+
+import time
+import multiprocessing
+from sqlalchemy import select
+import pdg
+from pdg.bulk import load_properties, load_particle_properties
+from pdg.particle import PdgParticle, select_particle_data
+
+
+# Modes in which checks are run
+MODES = {'non-pedantic': False, 'pedantic': True}
+
+# Particle quantities checked for each particle charge state
+PARTICLE_QUANTITIES = ('mass', 'width', 'lifetime')
+
+# Validator used by the current worker process
+_validator = None
+
+
+def _error(check, pdgid, e, mcid=None):
+    """Return report entry for an error."""
+    entry = {'check': check, 'pdgid': pdgid, 'error': e.__class__.__name__, 'message': str(e)}
+    if mcid is not None:
+        entry['mcid'] = mcid
+    return entry
+
+
+class PdgValidator(object):
+    """Runs checks on chunks of data from a PDG database, after loading the data in bulk."""
+
+    def __init__(self, database_url, edition=None):
+        """Connect to database_url and load data for the given (or the default) edition."""
+        self.api = pdg.connect(database_url)
+        self.edition = edition or self.api.edition
+        self.properties = load_properties(self.api, None, self.edition)
+        self.properties_by_id = dict((prop.baseid, prop) for prop in self.properties)
+        pdgparticle_table = self.api.db.tables['pdgparticle']
+        query = select(pdgparticle_table).where(pdgparticle_table.c.entry_type == 'P')
+        self.particle_rows = dict()
+        with self.api.engine.connect() as conn:
+            for row in conn.execute(query):
+                self.particle_rows.setdefault(row.pdgid, []).append(row)
+
+    def check_particles(self, pdgids):
+        """Check that the particles with the given PDG Identifiers resolve to a unique particle entry."""
+        errors = []
+        for pdgid in pdgids:
+            try:
+                select_particle_data(self.particle_rows.get(pdgid, []), pdgid)
+            except Exception as e:
+                errors.append(_error('particle', pdgid, e))
+        return dict((mode, errors) for mode in MODES)
+
+    def check_charge_states(self, mcids):
+        """Check that particle charge states resolve and have mass, width and lifetime."""
+        particles = self.api.get_particles_by_mcids(mcids, self.edition)
+        resolved = [p for p in particles if isinstance(p, PdgParticle)]
+        load_particle_properties(self.api, resolved, ('M', 'G', 'T'), self.properties)
+        report = dict()
+        for mode, pedantic in MODES.items():
+            self.api.pedantic = pedantic
+            errors = report[mode] = []
+            for mcid, particle in zip(mcids, particles):
+                if not isinstance(particle, PdgParticle):
+                    errors.append(_error('charge_state', None, particle, mcid))
+                    continue
+                for quantity in PARTICLE_QUANTITIES:
+                    try:
+                        getattr(particle, quantity)
+                    except Exception as e:
+                        errors.append(_error(quantity, particle.pdgid, e, mcid))
+        return report
+
+    def check_properties(self, pdgids):
+        """Check that each property with summary values has a PDG best summary value."""
+        report = dict()
+        for mode, pedantic in MODES.items():
+            self.api.pedantic = pedantic
+            errors = report[mode] = []
+            for pdgid in pdgids:
+                prop = self.properties_by_id[pdgid]
+                try:
+                    if prop.best_summary() is None:
+                        errors.append({'check': 'best_summary', 'pdgid': prop.pdgid, 'error': None,
+                                       'message': 'No best summary value'})
+                except Exception as e:
+                    errors.append(_error('best_summary', prop.pdgid, e))
+        return report
+
+
+def _init_worker(database_url, edition):
+    """Initialize validator of worker process."""
+    global _validator
+    _validator = PdgValidator(database_url, edition)
+
+
+def _run_task(task):
+    """Run check on a chunk of data in a worker process."""
+    check, items = task
+    return check, len(items), getattr(_validator, check)(items)
+
+
+def validate(database_url=None, edition=None, processes=None, chunk_size=100):
+    """Run all checks on the given (or the default) database and return report as a dict.
+
+    processes sets the number of worker processes (default: number of CPUs). If processes is 1, all checks
+    are run in the current process. chunk_size is the number of items checked by a worker at a time.
+    """
+    start = time.time()
+    api = pdg.connect(database_url)
+    edition = edition or api.edition
+    pdgparticle_table = api.db.tables['pdgparticle']
+    with api.engine.connect() as conn:
+        query = select(pdgparticle_table.c.mcid).distinct()
+        query = query.where(pdgparticle_table.c.entry_type == 'P')
+        query = query.where(pdgparticle_table.c.mcid.isnot(None))
+        mcids = sorted(item.mcid for item in conn.execute(query))
+    pdgids = [p.baseid for p in api.get_particles(edition)]
+    properties = [p.baseid for p in load_properties(api, None, edition)]
+    tasks = []
+    for check, items in (('check_particles', pdgids), ('check_charge_states', mcids),
+                         ('check_properties', properties)):
+        tasks.extend((check, items[i:i+chunk_size]) for i in range(0, len(items), chunk_size))
+    if processes == 1:
+        _init_worker(api.database_url, edition)
+        results = [_run_task(task) for task in tasks]
+    else:
+        pool = multiprocessing.Pool(processes, initializer=_init_worker, initargs=(api.database_url, edition))
+        try:
+            results = pool.map(_run_task, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    report = {'database_url': api.database_url,
+              'data_release': api.data_release,
+              'edition': edition,
+              'api_version': pdg.__version__,
+              'n_checked': dict(),
+              'modes': dict((mode, {'n_errors': dict(), 'errors': []}) for mode in MODES)}
+    for check, n_items, errors in results:
+        check_name = check[len('check_'):]
+        report['n_checked'][check_name] = report['n_checked'].get(check_name, 0) + n_items
+        for mode in MODES:
+            report['modes'][mode]['errors'].extend(errors[mode])
+    for mode in MODES:
+        n_errors = report['modes'][mode]['n_errors']
+        for error in report['modes'][mode]['errors']:
+            n_errors[error['check']] = n_errors.get(error['check'], 0) + 1
+    report['elapsed_seconds'] = time.time() - start
+    return report
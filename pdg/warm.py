@@ -0,0 +1,192 @@
+"""
+Warming of the shared caches of a data release.
+
+PdgData objects load their data lazily with one or more queries per object (see module pdg.data). A service
+would therefore pay the cost of these queries when data is first requested. PdgApi.warm() instead loads the
+PDG Identifier information, summary values and particle data of many PDG Identifiers in bulk into caches
+shared by all PdgData objects of the current data release, which are used by PdgData._get_pdgid(),
+PdgData._get_summary_values(), PdgParticle._get_particle_data() and PdgParticle.properties() before querying
+the database.
+
+The shared caches are:
+
+release.cache['hierarchy_index']           PDG Identifier information of all PDG Identifiers (see PdgHierarchyIndex)
+release.cache[('summary', edition)]        dict of PDG Identifier: list of PdgSummaryValue objects for edition
+release.cache['pdgparticle']               dict of PDG Identifier: list of pdgparticle rows (entry_type 'P')
+release.cache[('ids_with_data', edition)]  frozenset of the pdgid table ids with summary values in edition
+
+The set of ids with summary values is used by PdgParticle.properties() to select the properties with data,
+and is only loaded for scopes 'particles' and 'all'.
+
+Warming is done in chunks, and the data of each chunk becomes visible to other threads as soon as it has
+been loaded. Lookups for data that has not yet been warmed are served by the database as usual, so that
+results never depend on the progress of warming. Since the shared caches are part of the release cache,
+they are discarded when switching to a new data release (see PdgApi.reload()).
+"""
+
+import threading
+from sqlalchemy import select, bindparam
+from pdg.data import PdgSummaryValue
+from pdg.errors import PdgApiError
+from pdg.utils import MAX_IN_CLAUSE_SIZE
+
+
+# Values of parameter scope of PdgApi.warm(), besides a list of PDG Identifiers
+WARM_SCOPES = ('particles', 'all')
+
+# Data types of the properties whose summary values are warmed with scope 'particles'
+PARTICLE_DATA_TYPES = ('M', 'G', 'T')
+
+
+def load_shared_summaries(release, conn, pdgids, edition):
+    """Load the summary values of the given PDG Identifiers (without edition) for edition into the shared cache.
+
+    The values are loaded with a single query using connection conn to the database of release. PDG Identifiers
+    without summary values are stored with an empty list. The list of PDG Identifiers must not be longer than
+    MAX_IN_CLAUSE_SIZE.
+    """
+    pdgid_table = release.db.tables['pdgid']
+    pdgdata_table = release.db.tables['pdgdata']
+    query = select(pdgdata_table, pdgid_table.c.description).join(pdgid_table)
+    query = query.where(pdgid_table.c.pdgid.in_(bindparam('pdgids', expanding=True)))
+    query = query.where(pdgdata_table.c.edition == bindparam('edition'))
+    query = query.order_by(pdgdata_table.c.sort)
+    values = dict((pdgid, []) for pdgid in pdgids)
+    for entry in conn.execute(query, {'pdgids': list(pdgids), 'edition': str(edition)}):
+        values[entry.pdgid].append(PdgSummaryValue(entry._mapping))
+    release.cache.setdefault(('summary', str(edition)), dict()).update(values)
+
+
+class PdgCacheWarmer(object):
+    """Handle for loading the shared caches of a data release, optionally on a background thread."""
+
+    def __init__(self, api, scope='particles', edition=None):
+        """Prepare warming of the shared caches of the current data release of api.
+
+        scope is 'particles' (particle data and the summary values of all masses, widths and lifetimes),
+        'all' (particle data and the summary values of all PDG Identifiers), or a list of PDG Identifiers,
+        for which the summary values of the identifiers and all their descendants, and any particle data,
+        are loaded. Summary values are loaded for the given (or the default) edition.
+        """
+        if not isinstance(scope, (list, tuple, set)) and scope not in WARM_SCOPES:
+            raise PdgApiError('illegal value %s for scope' % scope)
+        self.api = api
+        self.release = api.release
+        self.scope = scope
+        self.edition = str(edition or api.edition)
+        self.total = 0
+        self.done = 0
+        self.error = None
+        self._cancelled = False
+        self._finished = threading.Event()
+        self._thread = None
+
+    def __repr__(self):
+        return '%s(%r, edition=%r, progress=%.2f)' % (self.__class__.__name__, self.scope, self.edition,
+                                                       self.progress)
+
+    @property
+    def progress(self):
+        """Fraction of the chunks of data loaded so far (between 0 and 1)."""
+        if self._finished.is_set() and self.error is None:
+            return 1.0
+        return float(self.done) / self.total if self.total else 0.0
+
+    @property
+    def is_done(self):
+        """True once warming has completed, failed or been cancelled."""
+        return self._finished.is_set()
+
+    def start(self, background=True):
+        """Start warming on a background thread or, if background is False, warm before returning."""
+        if background:
+            self._thread = threading.Thread(target=self.run, name='pdg-cache-warmer')
+            self._thread.daemon = True
+            self._thread.start()
+        else:
+            self.run()
+            self.wait()
+        return self
+
+    def wait(self, timeout=None):
+        """Wait until warming has completed and return True, or False if timeout (in seconds) expired first.
+
+        Any exception raised while warming is raised again here.
+        """
+        if not self._finished.wait(timeout):
+            return False
+        if self.error is not None:
+            raise self.error
+        return True
+
+    def cancel(self):
+        """Stop warming after the current chunk. Data already loaded remains in the shared caches."""
+        self._cancelled = True
+
+    def _pdgids(self, hierarchy):
+        """Return the PDG Identifiers whose summary values are to be loaded, ordered as in the Summary Tables."""
+        if self.scope == 'all':
+            return sorted(hierarchy.rows, key=hierarchy.order.__getitem__)
+        if self.scope == 'particles':
+            return sorted((pdgid for pdgid, row in hierarchy.rows.items() if row['data_type'] in PARTICLE_DATA_TYPES),
+                          key=hierarchy.order.__getitem__)
+        pdgids = set()
+        for pdgid in self.scope:
+            baseid = pdgid.split('/')[0].upper()
+            if baseid in hierarchy:
+                pdgids.add(baseid)
+                pdgids.update(hierarchy.descendants(baseid))
+        return sorted(pdgids, key=hierarchy.order.__getitem__)
+
+    def run(self):
+        """Load the shared caches (called by start())."""
+        try:
+            hierarchy = self.api.hierarchy_index(self.release)
+            pdgids = self._pdgids(hierarchy)
+            if self.scope in WARM_SCOPES:
+                particle_ids = [pdgid for pdgid, row in hierarchy.rows.items() if row['data_type'] == 'PART']
+            else:
+                particle_ids = [pdgid for pdgid in pdgids if hierarchy.rows[pdgid]['data_type'] == 'PART']
+            chunks = [pdgids[i:i+MAX_IN_CLAUSE_SIZE] for i in range(0, len(pdgids), MAX_IN_CLAUSE_SIZE)]
+            particle_chunks = [particle_ids[i:i+MAX_IN_CLAUSE_SIZE]
+                               for i in range(0, len(particle_ids), MAX_IN_CLAUSE_SIZE)]
+            self.total = len(chunks) + len(particle_chunks) + (1 if self.scope in WARM_SCOPES else 0)
+            particle_rows = self.release.cache.setdefault('pdgparticle', dict())
+            with self.release.engine.connect() as conn:
+                for chunk in particle_chunks:
+                    if self._cancelled:
+                        break
+                    self._load_particle_rows(conn, chunk, particle_rows)
+                    self.done += 1
+                if self.scope in WARM_SCOPES and not self._cancelled:
+                    self._load_ids_with_data(conn)
+                    self.done += 1
+                for chunk in chunks:
+                    if self._cancelled:
+                        break
+                    load_shared_summaries(self.release, conn, chunk, self.edition)
+                    self.done += 1
+            self.api._count('warm.chunks', self.done)
+        except Exception as e:
+            self.error = e
+        finally:
+            self._finished.set()
+
+    def _load_ids_with_data(self, conn):
+        """Load the set of pdgid table ids with summary values in the edition being warmed."""
+        pdgdata_table = self.release.db.tables['pdgdata']
+        query = select(pdgdata_table.c.pdgid_id).distinct().where(pdgdata_table.c.edition == bindparam('edition'))
+        ids = frozenset(item.pdgid_id for item in conn.execute(query, {'edition': self.edition}))
+        self.release.cache[('ids_with_data', self.edition)] = ids
+
+    def _load_particle_rows(self, conn, pdgids, particle_rows):
+        """Load the particle data (pdgparticle rows with entry_type 'P') of the given PDG Identifiers."""
+        pdgparticle_table = self.release.db.tables['pdgparticle']
+        query = select(pdgparticle_table)
+        query = query.where(pdgparticle_table.c.pdgid.in_(bindparam('pdgids', expanding=True)))
+        query = query.where(pdgparticle_table.c.entry_type == 'P')
+        rows = dict((pdgid, []) for pdgid in pdgids)
+        for row in conn.execute(query, {'pdgids': pdgids}):
+            rows[row.pdgid].append(row)
+        particle_rows.update(rows)
+
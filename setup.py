@@ -30,6 +30,7 @@ setup(
     packages = find_packages(),
     package_data={"pdg": ["pdg.sqlite"]},
     install_requires = ['SQLAlchemy>=1.4'],
+    extras_require = {'numpy': ['numpy']},
     classifiers = [
         'Development Status :: 4 - Beta',
         'Environment :: Console',
@@ -43,6 +43,16 @@ class TestData(unittest.TestCase):
         self.assertEqual(self.api.get_particle_by_mcid(-30323).name, 'K^*(1680)-')
         self.assertEqual(self.api.get_particle_by_mcid(-30323).mcid, -30323)
 
+    def test_mcids(self):
+        mcids = [5, -5, 11, -11, 39, 100211, -30323, 323, -323, 313, 0]
+        particles = self.api.get_particles_by_mcids(mcids)
+        self.assertEqual(len(particles), len(mcids))
+        for mcid, p in zip(mcids[:-1], particles):
+            self.assertIn('pdgparticle', p.cache)
+            self.assertEqual(p.mcid, mcid)
+            self.assertEqual(p.name, self.api.get_particle_by_mcid(mcid).name)
+        self.assertIsInstance(particles[-1], ValueError)
+
     def test_quantum_P(self):
         self.assertEqual(self.api.get_particle_by_name('u').quantum_P, '+')
         self.assertEqual(self.api.get_particle_by_name('ubar').quantum_P, '-')
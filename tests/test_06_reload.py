@@ -0,0 +1,82 @@
+"""
+Test cases for switching to a new data release.
+"""
+from __future__ import print_function
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+import pdg
+
+
+class TestReload(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, pdg.SQLITE_FILENAME)
+        shutil.copy(os.path.join(os.path.dirname(pdg.__file__), pdg.SQLITE_FILENAME), self.filename)
+        self.api = pdg.connect('sqlite:///%s' % self.filename)
+
+    def tearDown(self):
+        self.api.engine.dispose()
+        shutil.rmtree(self.tmpdir)
+
+    def new_data_release(self):
+        conn = sqlite3.connect(self.filename)
+        conn.execute("UPDATE pdginfo SET value = value || '.1' WHERE name = 'data_release'")
+        conn.commit()
+        conn.close()
+
+    def test_no_new_release(self):
+        data_release = self.api.data_release
+        self.assertFalse(self.api.reload())
+        self.assertEqual(self.api.data_release, data_release)
+
+    def test_force(self):
+        engine = self.api.engine
+        self.assertTrue(self.api.reload(force=True))
+        self.assertIsNot(self.api.engine, engine)
+
+    def test_new_release(self):
+        old_release = self.api.data_release
+        pion = self.api.get('S008')
+        pion.description
+        self.assertFalse(pion.is_stale)
+        self.new_data_release()
+        self.assertTrue(self.api.reload())
+        self.assertNotEqual(self.api.data_release, old_release)
+        self.assertTrue(pion.is_stale)
+        pion.refresh()
+        self.assertFalse(pion.is_stale)
+        self.assertFalse(self.api.get('S008').is_stale)
+
+    def test_prewarm(self):
+        pion = self.api.get_particle_by_mcid(211)
+        mass = self.api.get('S008M')
+        pion.name
+        mass.best_summary()
+        self.new_data_release()
+        self.assertTrue(self.api.reload(prewarm=[pion, mass]))
+        self.assertFalse(pion.is_stale)
+        self.assertFalse(mass.is_stale)
+        self.assertIn('pdgparticle', pion.cache)
+        self.assertIn('summary', mass.cache)
+        self.assertEqual(pion.name, 'pi+')
+
+    def test_query(self):
+        # Queries built before a reload are executed with the tables of the new data release only
+        query = self.api.summary_values().where(pdgid='S008M', data_type='M')
+        count = query.count()
+        values = [str(s) for s in query]
+        self.new_data_release()
+        self.assertTrue(self.api.reload())
+        self.assertEqual(query.count(), count)
+        self.assertEqual(query.count('data_type'), {'M': count})
+        self.assertEqual([str(s) for s in query], values)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+Test cases for accessing several databases through a PdgApiFederation.
+"""
+from __future__ import print_function
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+import pdg
+
+
+class TestFederation(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.api = pdg.connect()
+        cls.tmpdir = tempfile.mkdtemp()
+        filenames = []
+        # Split the default database into one file for the default edition and one for all other editions
+        for i, condition in enumerate(('edition != ?', 'edition = ?')):
+            filename = os.path.join(cls.tmpdir, 'pdg-%i.sqlite' % i)
+            shutil.copy(os.path.join(os.path.dirname(pdg.__file__), pdg.SQLITE_FILENAME), filename)
+            conn = sqlite3.connect(filename)
+            conn.execute('DELETE FROM pdgdata WHERE %s' % condition, (cls.api.default_edition,))
+            conn.commit()
+            conn.close()
+            filenames.append(filename)
+        cls.federation = pdg.connect_many(['sqlite:///%s' % f for f in filenames])
+
+    @classmethod
+    def tearDownClass(cls):
+        for api in cls.federation.apis:
+            api.engine.dispose()
+        shutil.rmtree(cls.tmpdir)
+
+    def test_editions(self):
+        self.assertEqual(self.federation.editions, self.api.editions)
+        self.assertEqual(self.federation.default_edition, self.api.default_edition)
+
+    def test_routing(self):
+        current, previous = self.federation.apis
+        self.assertIs(self.federation.get('S008M').api, current)
+        self.assertEqual(self.federation.get('S008M').best_summary().value,
+                         self.api.get('S008M').best_summary().value)
+        for edition in self.api.editions[1:]:
+            mass = self.federation.get('S008M/%s' % edition)
+            self.assertIs(mass.api, previous)
+            self.assertEqual(mass.summary_values(), self.api.get('S008M/%s' % edition).summary_values())
+            mass.edition = self.api.default_edition
+            self.assertIs(mass.api, current)
+
+    def test_get_all(self):
+        n = sum(1 for _ in self.api.get_all('M'))
+        routed = set(self.federation.api_for_edition(edition) for edition in self.federation.editions)
+        items = list(self.federation.get_all('M'))
+        self.assertEqual(len(items), len(routed)*n)
+        for item in items:
+            self.assertIn(item.edition, item.api.editions)
+        self.assertEqual(sum(1 for _ in self.federation.get_all('M', self.api.default_edition)), n)
+
+    def test_reload(self):
+        filenames = []
+        for i in range(2):
+            filename = os.path.join(self.tmpdir, 'pdg-reload-%i.sqlite' % i)
+            shutil.copy(os.path.join(os.path.dirname(pdg.__file__), pdg.SQLITE_FILENAME), filename)
+            filenames.append(filename)
+        federation = pdg.connect_many(['sqlite:///%s' % f for f in filenames])
+        first, second = federation.apis
+        self.assertIs(federation.api_for_edition(self.api.default_edition), first)
+        conn = sqlite3.connect(filenames[0])
+        conn.execute('DELETE FROM pdgdata')
+        conn.commit()
+        conn.close()
+        self.assertTrue(federation.reload(force=True))
+        self.assertIs(federation.api_for_edition(self.api.default_edition), second)
+        self.assertEqual(federation.editions, self.api.editions)
+        for api in federation.apis:
+            api.engine.dispose()
+
+    def test_particles(self):
+        self.assertEqual(self.federation.get_particle_by_mcid(211).mass, self.api.get_particle_by_mcid(211).mass)
+        self.assertEqual(self.federation.get_particle_by_name('pi+').mcid, 211)
+
+
+if __name__ == '__main__':
+    unittest.main()
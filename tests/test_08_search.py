@@ -0,0 +1,56 @@
+"""
+Test cases for full-text search.
+"""
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import pdg
+from pdg.data import PdgMass
+from pdg.search import PdgSearchIndex
+
+
+class TestSearch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.api = pdg.connect()
+
+    def test_search(self):
+        results = self.api.search('pi+ mass')
+        self.assertEqual(results[0].pdgid, 'S008M/%s' % self.api.default_edition)
+        self.assertIsInstance(results[0], PdgMass)
+
+    def test_prefix(self):
+        self.assertIn('S008M', [r.baseid for r in self.api.search('pi+ mas')])
+
+    def test_data_type_key(self):
+        for r in self.api.search('pi', data_type_key='BF%'):
+            self.assertEqual(r.data_type[0:2], 'BF')
+        self.assertEqual(len(self.api.search('pi', limit=3)), 3)
+
+    def test_particle_names(self):
+        self.assertIn('S016', [r.baseid for r in self.api.search('pbar', data_type_key='PART')])
+
+    def test_no_match(self):
+        self.assertEqual(self.api.search('"no such thing'), [])
+        self.assertEqual(self.api.search(''), [])
+
+    def test_sidecar(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmpdir, 'pdg-search.sqlite')
+            self.api.search_index(filename)
+            index = PdgSearchIndex(self.api, filename)
+            self.assertEqual(index.data_release, self.api.data_release)
+            self.assertEqual(index.search('pi+ mass')[0][0], 'S008M')
+            index.conn.close()
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    unittest.main()
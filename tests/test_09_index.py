@@ -0,0 +1,200 @@
+"""
+Test cases for in-memory indexes.
+"""
+from __future__ import print_function
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+import pdg
+from pdg.errors import PdgApiError
+
+
+class TestHierarchyIndex(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.api = pdg.connect(pedantic=False)
+
+    def test_consistency(self):
+        index = self.api.hierarchy_index()
+        for p in self.api.get_particles():
+            for child in p.children():
+                self.assertEqual(child.get_parent_pdgid(False), p.baseid)
+            descendants = [d.baseid for d in p.descendants()]
+            for prop in p.properties('%', require_summary_data=False):
+                self.assertIn(prop.baseid, descendants)
+                self.assertEqual(prop.get_particle().baseid, p.baseid)
+                self.assertEqual(index.ancestors(prop.baseid)[-1], p.baseid)
+                self.assertEqual(index.particle_ancestor(prop.baseid), p.baseid)
+                self.assertTrue(prop.baseid.startswith(p.baseid))
+            self.assertEqual(p.get_particle(), p)
+            self.assertEqual(p.ancestors(), [])
+
+    def test_ancestors(self):
+        bf = self.api.get('S008.3')
+        ancestors = [a.baseid for a in bf.ancestors()]
+        self.assertEqual(ancestors[0], bf.get_parent_pdgid(False))
+        self.assertEqual(ancestors[-1], 'S008')
+        self.assertEqual(bf.get_particle().baseid, 'S008')
+        self.assertEqual(self.api.hierarchy_index().particle_ancestor('S008.3'), 'S008')
+        self.assertIsNone(self.api.hierarchy_index().particle_ancestor('S008'))
+
+    def test_prefix(self):
+        # Identifiers of another particle starting with 'S008' (as matched by LIKE 'S008%') must not be included
+        tmpdir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmpdir, 'pdg.sqlite')
+            shutil.copy(os.path.join(os.path.dirname(pdg.__file__), pdg.SQLITE_FILENAME), filename)
+            conn = sqlite3.connect(filename)
+            next_id, next_sort = conn.execute('SELECT max(id) + 1, max(sort) + 1 FROM pdgid').fetchone()
+            columns = [c[1] for c in conn.execute('PRAGMA table_info(pdgdata)')
+                       if c[1] not in ('id', 'pdgid_id', 'pdgid')]
+            for i, (pdgid, parent, data_type, description, source) in enumerate((
+                    ('S0089', None, 'PART', 'X', None),
+                    ('S0089M', 'S0089', 'M', 'X MASS', 'S008M'),
+                    ('S0089.1', 'S0089', 'BFX', 'X --> mu+ nu_mu', 'S008.1'))):
+                conn.execute('INSERT INTO pdgid (id, pdgid, parent_pdgid, description, data_type, flags, sort) '
+                             'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                             (next_id + i, pdgid, parent, description, data_type, '', next_sort + i))
+                if source is not None:
+                    conn.execute('INSERT INTO pdgdata (pdgid_id, pdgid, %s) SELECT ?, ?, %s FROM pdgdata '
+                                 'WHERE pdgid = ?' % (', '.join(columns), ', '.join(columns)),
+                                 (next_id + i, pdgid, source))
+            conn.commit()
+            conn.close()
+            api = pdg.connect('sqlite:///%s' % filename, pedantic=False)
+            p = api.get('S008')
+            for prop in p.properties('%'):
+                self.assertFalse(prop.baseid.startswith('S0089'))
+            for node in p.decay_mode_tree().walk():
+                self.assertFalse(node.branching_fraction.baseid.startswith('S0089'))
+            self.assertEqual([prop.baseid for prop in api.get('S0089').properties('%')], ['S0089M', 'S0089.1'])
+            self.assertEqual(api.get('S0089M').get_particle().baseid, 'S0089')
+            api.engine.dispose()
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+class TestMassIndex(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.api = pdg.connect(pedantic=False)
+
+    def test_consistency(self):
+        index = self.api.mass_index()
+        self.assertEqual(index.masses, sorted(index.masses))
+        for mcid in (211, -211, 111, 2212, 323, 313):
+            p = self.api.get_particle_by_mcid(mcid)
+            i = [q.mcid for q in index.particles].index(mcid)
+            self.assertEqual(index.masses[i], p.mass)
+            self.assertEqual(index.widths[i], p.width)
+
+    def test_mass_range(self):
+        names = [p.name for p in self.api.particles_in_mass_range(0.13, 0.14)]
+        self.assertIn('pi+', names)
+        self.assertIn('pi-', names)
+        self.assertIn('pi0', names)
+        self.assertNotIn('K+', names)
+        self.assertEqual(self.api.particles_in_mass_range(130, 140, units='MeV'),
+                         self.api.particles_in_mass_range(0.13, 0.14))
+
+    def test_widths(self):
+        names = [p.name for p in self.api.particles_in_mass_range(0.95, 1.0)]
+        self.assertNotIn('K^*(892)+', names)
+        names = [p.name for p in self.api.particles_in_mass_range(0.95, 1.0, n_widths=2)]
+        self.assertIn('K^*(892)+', names)
+
+    def test_vectorized(self):
+        lo = [0.13, 0.9, 80.]
+        hi = [0.14, 1.0, 81.]
+        results = self.api.particles_in_mass_ranges(lo, hi)
+        for l, h, particles in zip(lo, hi, results):
+            self.assertEqual(particles, self.api.particles_in_mass_range(l, h))
+        results = self.api.particles_in_mass_ranges(lo, hi, n_widths=3)
+        for l, h, particles in zip(lo, hi, results):
+            self.assertEqual(particles, self.api.particles_in_mass_range(l, h, n_widths=3))
+
+
+class TestDecayIndex(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.api = pdg.connect(pedantic=False)
+
+    def test_parse(self):
+        parent, final_states = pdg.index.PdgDecayIndex.parse('pi0 --> 2gamma')
+        self.assertEqual(parent, 'pi0')
+        self.assertEqual(final_states, [{'gamma': 2}])
+        parent, final_states = pdg.index.PdgDecayIndex.parse('D+ --> anti-K*(892)0 pi+ pi0, anti-K*(892)0 --> K- pi+')
+        self.assertEqual(final_states[-1], {'K-': 1, 'pi+': 2, 'pi0': 1})
+
+    def test_consistency(self):
+        modes = [m for p in self.api.get_particles() for m in p.branching_fractions()]
+        for mode in self.api.find_decays(['mu+', 'mu-']):
+            self.assertIn(mode.pdgid, [m.pdgid for m in modes])
+            self.assertIn('mu+', mode.description)
+            self.assertIn('mu-', mode.description)
+        expected = [m.pdgid for m in modes if m.description.split('-->')[1].split() in (['mu+', 'mu-'],
+                                                                                      ['mu-', 'mu+'])]
+        found = [m.pdgid for m in self.api.find_decays(['mu+', 'mu-'], exact=True)]
+        self.assertEqual(sorted(found), sorted(expected))
+
+    def test_parent(self):
+        for mode in self.api.find_decays(['pi+'], parent='D+'):
+            self.assertEqual(mode.description.split('-->')[0].strip(), 'D+')
+        self.assertEqual([m.pdgid for m in self.api.find_decays(['pi+'], parent='D+')],
+                         [m.pdgid for m in self.api.find_decays(['pi+'], parent='S031')])
+        self.assertEqual(self.api.find_decays(['no-such-particle']), [])
+
+
+class TestParticleIndex(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.api = pdg.connect(pedantic=False)
+        cls.particles = [cls.api.get_particle_by_mcid(mcid) for mcid in cls.api.particle_index().columns['mcid'].tolist()]
+
+    def assertSelection(self, selected, predicate):
+        expected = [p.mcid for p in self.particles if predicate(p)]
+        self.assertEqual([p.mcid for p in selected], expected)
+
+    def test_quantum_numbers(self):
+        self.assertSelection(self.api.select_particles(is_meson=True, quantum_J=1, quantum_P=-1, quantum_C=-1),
+                             lambda p: p.is_meson and p.quantum_J == '1' and p.quantum_P == '-' and p.quantum_C == '-')
+        self.assertSelection(self.api.select_particles(quantum_J='1/2', is_baryon=True),
+                             lambda p: p.is_baryon and p.quantum_J == '1/2')
+        self.assertEqual([p.mcid for p in self.api.select_particles(quantum_J=(0.5, 1), quantum_P='+')],
+                         [p.mcid for p in self.api.select_particles(quantum_J=[0.5, 1], quantum_P=1)])
+
+    def test_charge(self):
+        self.assertSelection(self.api.select_particles(is_lepton=True, charge=lambda q: q != 0),
+                             lambda p: p.is_lepton and p.charge != 0)
+        self.assertSelection(self.api.select_particles(charge=(0.5, None)),
+                             lambda p: p.charge is not None and p.charge >= 0.5)
+        self.assertSelection(self.api.select_particles(charge=2/3.),
+                             lambda p: p.charge is not None and abs(p.charge - 2/3.) < 1e-6)
+
+    def test_flags(self):
+        self.assertSelection(self.api.select_particles(data_flags='L'), lambda p: p.is_lepton)
+        self.assertSelection(self.api.select_particles(is_meson=False, is_generic=False),
+                             lambda p: not p.is_meson and not p.is_generic)
+        self.assertEqual(self.api.select_particles(data_flags='X'), [])
+        self.assertEqual(len(self.api.select_particles()), len(self.particles))
+
+    def test_loaded(self):
+        selected = self.api.select_particles(name=['pi+', 'pi-'])
+        self.assertEqual(sorted(p.name for p in selected), ['pi+', 'pi-'])
+        for p in selected:
+            self.assertIn('pdgparticle', p.cache)
+            self.assertIn('pdgid', p.cache)
+        self.assertRaises(PdgApiError, self.api.select_particles, no_such_column=1)
+        self.assertRaises(PdgApiError, self.api.select_particles, charge=(0, 1, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Test cases for error propagation.
+"""
+from __future__ import print_function
+
+import unittest
+
+import pdg
+from pdg.errors import PdgApiError
+from pdg.data import PdgSummaryValue
+from pdg.propagate import propagate, propagate_many
+from pdg.utils import best
+
+
+def summary_value(value, error_positive, error_negative, limit_type=None):
+    return PdgSummaryValue(pdgid='TEST', description='test value', value=value, unit_text='GeV',
+                           error_positive=error_positive, error_negative=error_negative,
+                           limit_type=limit_type, confidence_level=0.9 if limit_type else None)
+
+
+class TestPropagate(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.api = pdg.connect(pedantic=False)
+
+    def test_dm(self):
+        n = self.api.get_particle_by_name('n')
+        p = self.api.get_particle_by_name('p')
+        inputs = [best(n.masses()), best(p.masses())]
+        dm = propagate(lambda x: x[0] - x[1], inputs, units='GeV')
+        self.assertEqual(round(dm.value, 5), 0.00129)
+        self.assertAlmostEqual(dm.value, n.mass - p.mass)
+        self.assertAlmostEqual(dm.error, (n.mass_error**2 + p.mass_error**2)**0.5)
+        dm_mc = propagate(lambda x: x[0] - x[1], inputs, method='mc', units='GeV', seed=1)
+        self.assertAlmostEqual(dm_mc.value, dm.value, delta=0.05*dm.error)
+        self.assertAlmostEqual(dm_mc.error, dm.error, delta=0.05*dm.error)
+
+    def test_asymmetric(self):
+        x = summary_value(10., 2., 1.)
+        self.assertEqual((propagate(lambda x: x[0], [x]).error_positive,
+                          propagate(lambda x: x[0], [x]).error_negative), (2., 1.))
+        y = propagate(lambda x: -x[0], [x])
+        self.assertEqual((y.error_positive, y.error_negative), (1., 2.))
+        self.assertIsNone(y.error)
+        y = propagate(lambda x: -x[0], [x], method='mc', seed=2)
+        self.assertAlmostEqual(y.error_positive, 1., delta=0.02)
+        self.assertAlmostEqual(y.error_negative, 2., delta=0.04)
+
+    def test_many(self):
+        inputs = [summary_value(3., 0.3, 0.3), summary_value(4., 0.4, 0.4), 2.]
+        results = propagate_many([lambda x: x[0] + x[1], lambda x: x[0] * x[2], lambda x: 1.], inputs)
+        self.assertAlmostEqual(results[0].value, 7.)
+        self.assertAlmostEqual(results[0].error, 0.5)
+        self.assertAlmostEqual(results[1].error, 0.6)
+        self.assertEqual(results[2].error, 0.)
+        results = propagate_many([lambda x: x[0] + x[1], lambda x: x[0] + x[1]], inputs, method='mc', seed=3,
+                                 n_samples=1000)
+        self.assertEqual(list(results[0].samples), list(results[1].samples))
+
+    def test_limits(self):
+        limit = summary_value(1e-6, None, None, limit_type='U')
+        self.assertRaises(PdgApiError, propagate, lambda x: x[0], [limit])
+        self.assertRaises(PdgApiError, propagate, lambda x: x[0], [limit], limits='uniform')
+        y = propagate(lambda x: x[0], [limit], method='mc', limits='uniform', seed=4)
+        self.assertTrue(all(0 <= s <= 1e-6 for s in y.samples))
+        self.assertAlmostEqual(y.value, 0.5e-6, delta=0.01e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
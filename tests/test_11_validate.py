@@ -0,0 +1,35 @@
+"""
+Test cases for database validation.
+"""
+from __future__ import print_function
+
+import unittest
+
+import pdg
+from pdg.validate import validate, MODES
+
+
+class TestValidate(unittest.TestCase):
+
+    def test_report(self):
+        api = pdg.connect()
+        report = validate(processes=1, chunk_size=10)
+        self.assertEqual(report['data_release'], api.data_release)
+        self.assertEqual(report['edition'], api.edition)
+        self.assertEqual(report['n_checked']['particles'], len(list(api.get_particles())))
+        self.assertGreater(report['n_checked']['charge_states'], 0)
+        self.assertGreater(report['n_checked']['properties'], 0)
+        for mode in MODES:
+            errors = report['modes'][mode]['errors']
+            self.assertEqual(sum(report['modes'][mode]['n_errors'].values()), len(errors))
+
+    def test_parallel(self):
+        serial = validate(processes=1)
+        parallel = validate(processes=2, chunk_size=5)
+        self.assertEqual(serial['n_checked'], parallel['n_checked'])
+        for mode in MODES:
+            self.assertEqual(serial['modes'][mode]['n_errors'], parallel['modes'][mode]['n_errors'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Test cases for differences between editions.
+"""
+from __future__ import print_function
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+import pdg
+
+
+class TestDiffEditions(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = None
+        cls.api = pdg.connect(pedantic=False)
+        if len(cls.api.editions) < 2:
+            # Add a previous edition to a copy of the database, with the values of the default edition,
+            # except for S008M (shifted by several standard deviations) and S008T (removed)
+            edition = cls.api.default_edition
+            cls.tmpdir = tempfile.mkdtemp()
+            filename = os.path.join(cls.tmpdir, 'pdg.sqlite')
+            shutil.copy(os.path.join(os.path.dirname(pdg.__file__), pdg.SQLITE_FILENAME), filename)
+            conn = sqlite3.connect(filename)
+            columns = [c[1] for c in conn.execute('PRAGMA table_info(pdgdata)') if c[1] != 'id']
+            values = ', '.join('? AS edition' if c == 'edition' else c for c in columns)
+            conn.execute('INSERT INTO pdgdata (%s) SELECT %s FROM pdgdata WHERE edition = ?'
+                         % (', '.join(columns), values), (str(int(edition) - 1), edition))
+            conn.execute('UPDATE pdgdata SET value = value + 10*error_positive '
+                         'WHERE pdgid = ? AND edition = ?', ('S008M', str(int(edition) - 1)))
+            conn.execute('DELETE FROM pdgdata WHERE pdgid = ? AND edition = ?', ('S008T', str(int(edition) - 1)))
+            conn.commit()
+            conn.close()
+            cls.api = pdg.connect('sqlite:///%s' % filename, pedantic=False)
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.tmpdir is not None:
+            cls.api.engine.dispose()
+            shutil.rmtree(cls.tmpdir)
+
+    def test_same_edition(self):
+        self.assertEqual(list(self.api.diff_editions(self.api.edition, self.api.edition)), [])
+
+    def test_consistency(self):
+        old, new = self.api.editions[1], self.api.editions[0]
+        for change in self.api.diff_editions(old, new):
+            self.assertIn(change.status, ('added', 'removed', 'changed'))
+            old_summaries = [str(s) for s in self.api.get(change.pdgid, old).summary_values()]
+            new_summaries = [str(s) for s in self.api.get(change.pdgid, new).summary_values()]
+            if change.old is not None:
+                self.assertIn(str(change.old), old_summaries)
+            if change.new is not None:
+                self.assertIn(str(change.new), new_summaries)
+            if change.status == 'changed' and change.shift is not None:
+                self.assertAlmostEqual(change.shift, change.new.get_value(change.old['unit_text'] or None) - change.old.value)
+
+    def test_min_sigma(self):
+        old, new = self.api.editions[1], self.api.editions[0]
+        changes = list(self.api.diff_editions(old, new, min_sigma=1.0))
+        for change in changes:
+            self.assertEqual(change.status, 'changed')
+            self.assertGreaterEqual(change.shift_sigma, 1.0)
+        self.assertLessEqual(len(changes), len(list(self.api.diff_editions(old, new))))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Test cases for summary value queries.
+"""
+from __future__ import print_function
+
+import unittest
+
+import pdg
+from pdg.errors import PdgApiError
+from pdg.utils import import_numpy
+
+
+class TestSummaryQuery(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.api = pdg.connect(pedantic=False)
+
+    def test_consistency(self):
+        summaries = [str(s) for p in self.api.get_all('M') for s in p.summary_values()]
+        query = self.api.summary_values().where(data_type='M')
+        self.assertEqual([str(s) for s in query], summaries)
+        self.assertEqual(query.count(), len(summaries))
+
+    def test_conditions(self):
+        for s in self.api.summary_values().where(limit_type='U', confidence_level=0.9):
+            self.assertTrue(s.is_upper_limit)
+            self.assertEqual(s.confidence_level, 0.9)
+        for s in self.api.summary_values().where(scale_factor__gt=1.0):
+            self.assertGreater(s.scale_factor, 1.0)
+        self.assertEqual(self.api.summary_values().where(data_type__in=['M', 'G']).count(),
+                         self.api.summary_values().where(data_type='M').count() +
+                         self.api.summary_values().where(data_type='G').count())
+        self.assertRaises(PdgApiError, self.api.summary_values().where, no_such_column=1)
+        self.assertRaises(PdgApiError, self.api.summary_values().where, value__approx=1)
+
+    def test_edition(self):
+        query = self.api.summary_values()
+        counts = [query.edition(edition).count() for edition in self.api.editions]
+        self.assertEqual(query.edition(*self.api.editions).count(), sum(counts))
+        self.assertEqual(query.count(), query.edition(self.api.edition).count())
+
+    def test_group_by(self):
+        query = self.api.summary_values()
+        counts = query.count(group_by='data_type')
+        self.assertEqual(sum(counts.values()), query.count())
+        self.assertEqual(counts['M'], query.where(data_type='M').count())
+        self.assertEqual(len(list(query.limit(2))), 2)
+
+
+    def test_arrays(self):
+        numpy = import_numpy()
+        arrays = self.api.to_arrays(canonical=True)
+        summaries = list(self.api.summary_values())
+        self.assertEqual(len(arrays['pdgid']), len(summaries))
+        for i, s in enumerate(summaries):
+            self.assertEqual(arrays['pdgid'][i], s.pdgid)
+            self.assertEqual(arrays['is_limit'][i], s.is_limit)
+            self.assertEqual(arrays['is_upper_limit'][i], s.is_upper_limit)
+            if s.value is None:
+                self.assertTrue(numpy.isnan(arrays['value'][i]))
+                self.assertTrue(numpy.isnan(arrays['value_canonical'][i]))
+                continue
+            self.assertEqual(arrays['value'][i], s.value)
+            if s.units in ('MeV', 'GeV', 'keV', 'eV'):
+                self.assertAlmostEqual(arrays['value_canonical'][i], s.get_value('GeV'))
+        arrays = self.api.to_arrays(self.api.editions, columns=['pdgid', 'edition'])
+        self.assertEqual(sorted(arrays), ['edition', 'is_limit', 'is_lower_limit', 'is_upper_limit', 'pdgid'])
+        self.assertEqual(len(arrays['pdgid']), self.api.summary_values().edition(*self.api.editions).count())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+Test cases for database snapshots.
+"""
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import pdg
+from pdg.snapshot import write_snapshot
+
+
+class TestSnapshot(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.api = pdg.connect(pedantic=False)
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.filename = os.path.join(cls.tmpdir, 'pdg-snapshot.sqlite')
+        write_snapshot(cls.api.database_url, cls.filename)
+        cls.snapshot = pdg.connect('snapshot:///%s' % cls.filename)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.snapshot.engine.dispose()
+        shutil.rmtree(cls.tmpdir)
+
+    def test_info(self):
+        self.assertEqual(self.snapshot.info_keys(), self.api.info_keys())
+        self.assertEqual(self.snapshot.data_release, self.api.data_release)
+        self.assertEqual(self.snapshot.editions, self.api.editions)
+
+    def test_lookups(self):
+        for mcid in (211, -211, 111, 2212, 11):
+            p = self.api.get_particle_by_mcid(mcid)
+            q = self.snapshot.get_particle_by_mcid(mcid)
+            self.assertEqual(q.pdgid, p.pdgid)
+            self.assertEqual(q.mass, p.mass)
+        for pdgid in ('S003M', 'S008M', 'S009M', 'S016M'):
+            self.assertEqual(str(self.snapshot.get(pdgid).best_summary()), str(self.api.get(pdgid).best_summary()))
+        self.assertEqual([str(s) for s in self.snapshot.summary_values().edition(*self.api.editions)],
+                         [str(s) for s in self.api.summary_values().edition(*self.api.editions)])
+
+    def test_read_only(self):
+        pdginfo_table = self.snapshot.db.tables['pdginfo']
+        with self.assertRaises(Exception):
+            with self.snapshot.engine.begin() as conn:
+                conn.execute(pdginfo_table.insert(), {'name': 'test', 'value': 'test'})
+
+    def test_replace(self):
+        self.assertFalse(self.snapshot.reload())
+        write_snapshot(self.api.database_url, self.filename)
+        self.assertTrue(self.snapshot.reload(force=True))
+        self.assertEqual(self.snapshot.data_release, self.api.data_release)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+"""
+Test cases for the particle table.
+"""
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import pdg
+from pdg.errors import PdgApiError
+
+
+class TestParticleTable(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.api = pdg.connect(pedantic=False)
+
+    def test_consistency(self):
+        table = self.api.particle_table()
+        self.assertGreater(len(table), 0)
+        for row in table:
+            p = self.api.get_particle_by_mcid(row.mcid)
+            self.assertEqual(row.pdgid, p.baseid)
+            self.assertEqual(row.name, p.name)
+            self.assertEqual(row.charge, p.charge)
+            self.assertEqual(row.quantum_J, p.quantum_J)
+            self.assertEqual(row.mass, p.mass)
+            self.assertEqual(row.mass_error, p.mass_error)
+            self.assertEqual(row.width, p.width)
+            if row.width is None and not p.has_lifetime_entry:
+                # Lifetime cannot be derived from an unknown width
+                self.assertIsNone(row.lifetime)
+                self.assertRaises(TypeError, lambda: p.lifetime)
+            else:
+                self.assertEqual(row.lifetime, p.lifetime)
+            self.assertEqual(row.is_stable, p.is_stable)
+            self.assertIsNone(row.error)
+        self.assertIs(self.api.particle_table(), table)
+
+    def test_on_error(self):
+        api = pdg.connect(pedantic=True)
+        recorded = api.particle_table(on_error='record')
+        skipped = api.particle_table(on_error='skip')
+        self.assertEqual(len(skipped), len([row for row in recorded if row.error is None]))
+        if len(skipped) < len(recorded):
+            self.assertRaises(Exception, api.particle_table, on_error='raise')
+        self.assertRaises(PdgApiError, api.particle_table, on_error='ignore')
+
+    def test_file(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmpdir, 'particles.json')
+            table = self.api.particle_table(filename=filename)
+            self.assertTrue(os.path.exists(filename))
+            api = pdg.connect(pedantic=False)
+            self.assertEqual(api.particle_table(filename=filename), table)
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    unittest.main()
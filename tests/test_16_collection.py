@@ -0,0 +1,90 @@
+"""
+Test cases for property collections.
+"""
+from __future__ import print_function
+
+import math
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+import pdg
+from pdg.collection import PdgPropertyCollection
+from pdg.errors import PdgAmbiguousValueError
+
+
+class TestPropertyCollection(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.api = pdg.connect(pedantic=False)
+
+    def test_consistency(self):
+        for mcid in (211, 111, 2212):
+            p = self.api.get_particle_by_mcid(mcid)
+            for method in ('properties', 'branching_fractions', 'exclusive_branching_fractions'):
+                props = list(getattr(p, method)())
+                c = getattr(p, method)(collection=True)
+                self.assertIsInstance(c, PdgPropertyCollection)
+                self.assertEqual(list(c.pdgids()), [prop.pdgid for prop in props])
+                values = c.values()
+                errors = c.errors()
+                is_limit = c.is_limit()
+                for i, prop in enumerate(props):
+                    summary = prop.best_summary()
+                    if summary is None or summary.value is None:
+                        self.assertTrue(math.isnan(values[i]))
+                    else:
+                        self.assertEqual(values[i], summary.value)
+                        self.assertEqual(is_limit[i], summary.is_limit)
+                    if summary is not None and summary.get_error() is not None:
+                        self.assertEqual(errors[i], summary.get_error())
+
+    def test_sum(self):
+        p = self.api.get_particle_by_mcid(211)
+        c = p.exclusive_branching_fractions(collection=True)
+        total = sum(bf.value for bf in p.exclusive_branching_fractions() if not bf.is_limit)
+        self.assertAlmostEqual(c[~c.is_limit()].values().sum(), total)
+
+    def test_indexing(self):
+        c = self.api.get_particle_by_mcid(211).exclusive_branching_fractions(collection=True)
+        self.assertEqual(c[0].pdgid, c.pdgids()[0])
+        self.assertEqual(list(c[::-1].pdgids()), list(c.pdgids())[::-1])
+        self.assertEqual(len(c[c.values() > 0.5]), len([v for v in c.values() if v > 0.5]))
+        self.assertEqual(list(c.sorted().values()), sorted(c.values()))
+        self.assertEqual(len(c.filter(lambda prop: prop.is_limit)), sum(c.is_limit()))
+
+    def test_pedantic(self):
+        # Duplicate the summary values of the pi+- mass in a copy of the database, which makes its best value
+        # ambiguous in pedantic mode
+        tmpdir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmpdir, 'pdg.sqlite')
+            shutil.copy(os.path.join(os.path.dirname(pdg.__file__), pdg.SQLITE_FILENAME), filename)
+            conn = sqlite3.connect(filename)
+            columns = ', '.join(c[1] for c in conn.execute('PRAGMA table_info(pdgdata)') if c[1] != 'id')
+            conn.execute('INSERT INTO pdgdata (%s) SELECT %s FROM pdgdata WHERE pdgid = ? AND in_summary_table'
+                         % (columns, columns), ('S008M',))
+            conn.commit()
+            conn.close()
+            api = pdg.connect('sqlite:///%s' % filename, pedantic=True)
+            c = api.get('S008').properties(collection=True)
+            self.assertRaises(PdgAmbiguousValueError, api.get('S008M').best_summary)
+            values = c.values()
+            for i, prop in enumerate(c):
+                if prop.baseid == 'S008M':
+                    self.assertIsNone(c.best_summaries()[i])
+                    self.assertTrue(math.isnan(values[i]))
+                    self.assertTrue(math.isnan(c.errors()[i]))
+                elif prop.best_summary() is not None and prop.best_summary().value is not None:
+                    self.assertEqual(values[i], prop.best_summary().value)
+            self.assertIn('S008M', [prop.baseid for prop in c])
+            api.engine.dispose()
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    unittest.main()
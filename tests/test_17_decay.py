@@ -0,0 +1,78 @@
+"""
+Test cases for decay data structures.
+"""
+from __future__ import print_function
+
+import math
+import unittest
+
+import pdg
+
+
+class TestBranchingFractionMatrix(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.api = pdg.connect(pedantic=False)
+        cls.matrix = cls.api.branching_fraction_matrix()
+
+    def test_consistency(self):
+        m = self.matrix
+        self.assertEqual(m.indptr[-1], len(m.modes))
+        for i, particle in enumerate(m.particles):
+            p = self.api.get(particle)
+            modes = [bf.baseid for bf in p.exclusive_branching_fractions(include_subdecays=True)]
+            self.assertEqual(list(m.modes[m.indptr[i]:m.indptr[i+1]]), modes)
+            for j in range(m.indptr[i], m.indptr[i+1]):
+                bf = self.api.get(m.modes[j])
+                self.assertEqual(m.subdecay_level[j], bf.subdecay_level)
+                self.assertEqual(m.is_limit[j], bf.is_limit)
+                if bf.value is None:
+                    self.assertTrue(math.isnan(m.values[j]))
+                else:
+                    self.assertEqual(m.values[j], bf.value)
+
+    def test_row_sums(self):
+        m = self.matrix
+        sums = m.row_sums()
+        for i, particle in enumerate(m.particles):
+            p = self.api.get(particle)
+            total = sum(bf.value for bf in p.exclusive_branching_fractions() if not bf.is_limit and bf.value)
+            self.assertAlmostEqual(sums[i], total)
+        self.assertEqual(len(m.is_overnormalized()), len(m.particles))
+        self.assertIs(self.api.branching_fraction_matrix(), m)
+        self.assertGreaterEqual(self.api.branching_fraction_matrix(exclusive_only=False).shape[1], m.shape[1])
+
+
+class TestDecayModeTree(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.api = pdg.connect(pedantic=False)
+
+    def test_consistency(self):
+        for mcid in (211, 111, 13):
+            p = self.api.get_particle_by_mcid(mcid)
+            tree = p.decay_mode_tree()
+            nodes = list(tree.walk())
+            bfs = list(p.branching_fractions())
+            self.assertEqual([node.branching_fraction.pdgid for node in nodes], [bf.pdgid for bf in bfs])
+            for node, bf in zip(nodes, bfs):
+                self.assertEqual(node.level, bf.subdecay_level)
+                self.assertEqual([str(s) for s in node.branching_fraction.summary_values()],
+                                 [str(s) for s in bf.summary_values()])
+                self.assertEqual(node.parent.level, node.level - 1)
+
+    def test_nesting(self):
+        p = self.api.get_particle_by_mcid(211)
+        tree = p.decay_mode_tree()
+        self.assertIsNone(tree.branching_fraction)
+        for node in tree.children:
+            self.assertEqual(node.level, 0)
+            for child in node.walk():
+                self.assertGreater(child.level, 0)
+        self.assertEqual(len(str(tree).splitlines()), len(list(tree.walk())))
+
+
+if __name__ == '__main__':
+    unittest.main()
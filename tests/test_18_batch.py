@@ -0,0 +1,109 @@
+"""
+Test cases for coalescing lookups into batched queries.
+"""
+from __future__ import print_function
+
+import threading
+import unittest
+
+import pdg
+from pdg.batch import PdgBatcher
+from pdg.errors import PdgInvalidPdgIdError, PdgBatcherClosedError
+
+
+class TestBatcher(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.api = pdg.connect(pedantic=False)
+
+    def setUp(self):
+        self.batcher = PdgBatcher(self.api, max_batch_size=50, max_wait=0.05)
+
+    def tearDown(self):
+        self.batcher.close()
+
+    def test_get(self):
+        pdgids = [p.pdgid for p in self.api.get_all()][:40]
+        futures = [self.batcher.submit_get(pdgid) for pdgid in pdgids]
+        for pdgid, future in zip(pdgids, futures):
+            item = future.result()
+            expected = self.api.get(pdgid)
+            self.assertIs(type(item), type(expected))
+            self.assertEqual(item.pdgid, expected.pdgid)
+            self.assertEqual(item.description, expected.description)
+        stats = self.batcher.statistics()
+        self.assertEqual(stats['requests'], len(pdgids))
+        self.assertEqual(stats['queries'], 1)
+        self.assertEqual(stats['max_batch_size'], len(pdgids))
+
+    def test_max_batch_size(self):
+        pdgids = [p.pdgid for p in self.api.get_all()][:120]
+        futures = [self.batcher.submit_pdgid(pdgid) for pdgid in pdgids]
+        for pdgid, future in zip(pdgids, futures):
+            self.assertEqual(future.result()['pdgid'], pdgid.split('/')[0])
+        stats = self.batcher.statistics()
+        self.assertEqual(stats['max_batch_size'], 50)
+        self.assertEqual(sum(size * n for size, n in stats['batch_sizes'].items()), len(pdgids))
+
+    def test_errors(self):
+        good = self.batcher.submit_get('S008')
+        bad = self.batcher.submit_get('XXXX')
+        missing = self.batcher.submit_particle_by_mcid(123456789)
+        self.assertEqual(good.result().baseid, 'S008')
+        self.assertRaises(PdgInvalidPdgIdError, bad.result)
+        self.assertRaises(ValueError, missing.result)
+
+    def test_particle_by_mcid(self):
+        for mcid in (211, -211, 13, 2212):
+            p = self.batcher.get_particle_by_mcid(mcid)
+            expected = self.api.get_particle_by_mcid(mcid)
+            self.assertEqual(p.pdgid, expected.pdgid)
+            self.assertEqual(p.mcid, expected.mcid)
+            self.assertEqual(p.mass, expected.mass)
+
+    def test_threads(self):
+        mcids = [211, -211, 13, -13, 2212, 11, 111]
+        results = dict()
+
+        def lookup(mcid):
+            results[mcid] = self.batcher.get_particle_by_mcid(mcid).name
+        threads = [threading.Thread(target=lookup, args=(mcid,)) for mcid in mcids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for mcid in mcids:
+            self.assertEqual(results[mcid], self.api.get_particle_by_mcid(mcid).name)
+        self.assertLess(self.batcher.statistics()['queries'], len(mcids))
+
+
+class TestApiBatching(unittest.TestCase):
+
+    def test_enable_batching(self):
+        api = pdg.connect(pedantic=False)
+        batcher = api.enable_batching(max_wait=0.001)
+        try:
+            self.assertEqual(api.get('S008').description, pdg.connect().get('S008').description)
+            self.assertEqual(api.get_particle_by_mcid(211).mass, pdg.connect().get_particle_by_mcid(211).mass)
+            self.assertRaises(PdgInvalidPdgIdError, api.get, 'XXXX')
+            self.assertGreater(batcher.statistics()['requests'], 2)
+        finally:
+            api.disable_batching()
+        self.assertIsNone(api.batcher)
+        self.assertEqual(api.get('S008').baseid, 'S008')
+
+    def test_closed_batcher(self):
+        # Lookups racing with disable_batching() may still find the closed batcher
+        api = pdg.connect(pedantic=False)
+        batcher = api.enable_batching(max_wait=0.001)
+        batcher.close()
+        self.assertRaises(PdgBatcherClosedError, batcher.get, 'S008')
+        self.assertEqual(api.get('S008').description, pdg.connect().get('S008').description)
+        self.assertEqual(api.get_particle_by_mcid(211).baseid, 'S008')
+        self.assertEqual(pdg.data.PdgData(api, 'S008M').data_type, 'M')
+        api.disable_batching()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+"""
+Test cases for the local lookup server and its client.
+"""
+from __future__ import print_function
+
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+
+import pdg
+from pdg.client import PdgClient
+from pdg.errors import PdgInvalidPdgIdError, PdgNoDataError
+from pdg.server import make_server
+
+
+class TestServer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.api = pdg.connect(pedantic=False)
+        cls.server = make_server(pdg.connect(pedantic=False), port=0)
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.daemon = True
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.client = PdgClient(port=self.server.server_address[1])
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_info(self):
+        info = self.client.info()
+        self.assertEqual(info['status_code'], 200)
+        self.assertEqual(info['edition'], self.api.edition)
+        self.assertEqual(info['data_release'], self.api.data_release)
+
+    def test_summaries(self):
+        doc = self.client.summaries('S008M')
+        prop = self.api.get('S008M')
+        self.assertEqual(doc['pdgid'], prop.pdgid)
+        self.assertEqual(doc['description'], prop.description)
+        self.assertEqual([v['value'] for v in doc['pdg_values']], [v.value for v in prop.summary_values()])
+        self.assertRaises(PdgInvalidPdgIdError, self.client.summaries, 'XXXX')
+
+    def test_particle_summaries(self):
+        doc = self.client.summaries('S008')
+        pdgids = [d['pdgid'] for d in doc['summaries']['properties'] + doc['summaries']['branching_fractions']]
+        expected = [p.pdgid for p in self.api.get('S008').properties('%')]
+        self.assertEqual(sorted(pdgids), sorted(expected))
+
+    def test_summaries_many(self):
+        docs = self.client.summaries_many(['S008M', 'XXXX', 'S008M/2022'])
+        self.assertEqual(len(docs), 3)
+        self.assertEqual(docs[0]['pdg_values'], self.client.summaries('S008M')['pdg_values'])
+        self.assertEqual(docs[1]['status_code'], 404)
+        self.assertEqual(docs[2]['pdgid'], 'S008M/2022')
+
+    def test_particles(self):
+        doc = self.client.particle(211)
+        p = self.api.get_particle_by_mcid(211)
+        self.assertEqual(doc['name'], p.name)
+        self.assertEqual(doc['mass'], p.mass)
+        self.assertEqual(doc['lifetime'], p.lifetime)
+        self.assertRaises(PdgNoDataError, self.client.particle, 123456789)
+        docs = self.client.particles([211, 123456789, -13])
+        self.assertEqual([d.get('mcid') for d in docs], [211, 123456789, -13])
+        self.assertEqual(docs[1]['status_code'], 404)
+        self.assertEqual(docs[2]['name'], self.api.get_particle_by_mcid(-13).name)
+
+    def test_invalid_mcids(self):
+        items = [211, 2.7, True, '211', [211], {'mcid': 211}, None]
+        status_code, doc = self.server.service.handle('POST', '/particles', json.dumps({'mcids': items}))
+        self.assertEqual(status_code, 200)
+        results = doc['results']
+        self.assertEqual(results[0]['name'], 'pi+')
+        for item, result in zip(items[1:], results[1:]):
+            self.assertEqual(result['mcid'], item)
+            self.assertEqual(result['status_code'], 400)
+
+    def test_concurrent_clients(self):
+        errors = []
+
+        def lookup():
+            with PdgClient(port=self.server.server_address[1]) as client:
+                for _ in range(10):
+                    if client.particle(211)['name'] != 'pi+':
+                        errors.append('wrong particle')
+        threads = [threading.Thread(target=lookup) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        stats = self.client.statistics()
+        self.assertGreaterEqual(stats['requests'], 40)
+        self.assertIn('p99', stats['latency'])
+
+    def test_invalid_path(self):
+        status_code, doc = self.server.service.handle('GET', '/nothing')
+        self.assertEqual(status_code, 400)
+        self.assertEqual(doc['status_code'], 400)
+
+
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX'), 'unix sockets not supported')
+class TestUnixSocketServer(unittest.TestCase):
+
+    def test_unix_socket(self):
+        tmpdir = tempfile.mkdtemp()
+        socket_path = os.path.join(tmpdir, 'pdg.sock')
+        server = make_server(pdg.connect(pedantic=False), socket_path=socket_path)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        try:
+            with PdgClient(socket_path=socket_path) as client:
+                self.assertEqual(client.particle(211)['name'], 'pi+')
+                self.assertEqual(len(client.summaries_many(['S008M', 'S008W'])), 2)
+        finally:
+            server.shutdown()
+            server.server_close()
+            shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+Test cases for using the API in forked worker processes.
+"""
+from __future__ import print_function
+
+import gc
+import os
+import unittest
+
+import pdg
+from pdg.bench import memory_benchmark, SMAPS_ROLLUP
+
+
+@unittest.skipUnless(hasattr(os, 'register_at_fork'), 'os.register_at_fork not available')
+class TestFork(unittest.TestCase):
+
+    def _in_child(self, function):
+        """Run function in a forked child process and return its exit status."""
+        pid = os.fork()
+        if pid == 0:
+            try:
+                os._exit(0 if function() else 1)
+            except BaseException:
+                os._exit(2)
+        return os.waitpid(pid, 0)[1]
+
+    def test_connections_reset_after_fork(self):
+        api = pdg.connect(pedantic=False)
+        mass = api.get_particle_by_mcid(211).mass
+        with api.engine.connect():
+            pass
+        self.assertGreater(api.engine.pool.checkedin(), 0)
+
+        def child():
+            return api.engine.pool.checkedin() == 0 and api.get_particle_by_mcid(211).mass == mass
+        self.assertEqual(self._in_child(child), 0)
+        self.assertEqual(api.get_particle_by_mcid(211).mass, mass)
+
+    def test_preload(self):
+        api = pdg.connect(pedantic=False)
+        api.preload(freeze=False)
+        self.assertEqual(api.engine.pool.checkedin(), 0)
+        table = api.particle_table(on_error='record')
+
+        def child():
+            return api.particle_table(on_error='record') is table and len(api.mass_index()) > 0
+        self.assertEqual(self._in_child(child), 0)
+
+    def test_batcher_after_fork(self):
+        api = pdg.connect(pedantic=False)
+        api.enable_batching(max_wait=0.001)
+        try:
+            self.assertEqual(api.get('S008').baseid, 'S008')
+            self.assertEqual(self._in_child(lambda: api.get('S008M').baseid == 'S008M'), 0)
+        finally:
+            api.disable_batching()
+
+    @unittest.skipUnless(os.path.exists(SMAPS_ROLLUP), 'memory statistics not available')
+    def test_memory_benchmark(self):
+        report = memory_benchmark(workers=2, preload=True)
+        if hasattr(gc, 'get_freeze_count'):
+            # Objects of the calling process are not left in the permanent generation
+            self.assertEqual(gc.get_freeze_count(), 0)
+        self.assertEqual(len(report['per_worker']), 2)
+        self.assertGreater(report['mean_rss'], 0)
+        self.assertLessEqual(report['mean_private'], report['mean_rss'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+Test cases for warming the shared caches of a data release.
+"""
+from __future__ import print_function
+
+import unittest
+
+import pdg
+from pdg.errors import PdgApiError
+
+
+def particle_values(particle):
+    """Return tuple of basic particle data, with exceptions replaced by their class."""
+    values = []
+    for attribute in ('name', 'charge', 'mass', 'mass_error', 'width', 'lifetime', 'quantum_J'):
+        try:
+            values.append(getattr(particle, attribute))
+        except Exception as e:
+            values.append(e.__class__)
+    return tuple(values)
+
+
+class TestWarm(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.cold = pdg.connect(pedantic=False)
+        # MC IDs that resolve to a particle (i.e. that do not match several particles)
+        cls.mcids = [row.mcid for row in cls.cold.particle_table(on_error='record') if row.pdgid is not None]
+
+    def test_foreground(self):
+        api = pdg.connect(pedantic=False)
+        warmer = api.warm('particles', background=False)
+        self.assertTrue(warmer.is_done)
+        self.assertEqual(warmer.progress, 1.0)
+        for mcid in self.mcids:
+            self.assertEqual(particle_values(api.get_particle_by_mcid(mcid)),
+                             particle_values(self.cold.get_particle_by_mcid(mcid)))
+        stats = api.statistics()
+        self.assertGreater(stats['shared.pdgparticle'], 0)
+        self.assertGreater(stats['shared.summary'], 0)
+        self.assertNotIn('query.pdgparticle', stats)
+
+    def test_properties(self):
+        api = pdg.connect(pedantic=False)
+        api.warm('particles', background=False)
+        pion = api.get_particle_by_mcid(211)
+        self.assertEqual([p.pdgid for p in pion.properties()],
+                         [p.pdgid for p in self.cold.get_particle_by_mcid(211).properties()])
+        stats = api.statistics()
+        self.assertGreater(stats['shared.ids_with_data'], 0)
+        self.assertNotIn('query.ids_with_data', stats)
+
+    def test_background(self):
+        api = pdg.connect(pedantic=False)
+        warmer = api.warm('all')
+        # Lookups while warming must give the same results as without warming
+        for mcid in self.mcids:
+            self.assertEqual(particle_values(api.get_particle_by_mcid(mcid)),
+                             particle_values(self.cold.get_particle_by_mcid(mcid)))
+        self.assertTrue(warmer.wait(10))
+        for item in self.cold.get_all():
+            if item.data_type != 'PART':
+                self.assertEqual(api.get(item.pdgid).summary_values(), item.summary_values())
+
+    def test_pdgids(self):
+        api = pdg.connect(pedantic=False)
+        api.warm(['S008'], edition=2022, background=False)
+        summaries = api.release.cache[('summary', '2022')]
+        self.assertIn('S008M', summaries)
+        self.assertNotIn('S004M', summaries)
+        self.assertEqual(api.get('S008M/2022').summary_values(), self.cold.get('S008M/2022').summary_values())
+        self.assertEqual(api.get('S008M').summary_values(), self.cold.get('S008M').summary_values())
+
+    def test_invalid_scope(self):
+        self.assertRaises(PdgApiError, self.cold.warm, 'nothing')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+Test cases for access traces and prefetching.
+"""
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import pdg
+from pdg.trace import read_trace, PdgPrefetcher
+
+
+def workload(api):
+    """Look up particles and the data usually read for them, and return the values read."""
+    values = []
+    for mcid in (211, -211, 13):
+        p = api.get_particle_by_mcid(mcid)
+        values.append((p.mass, p.width))
+        values.append([str(bf.best_summary()) for bf in p.exclusive_branching_fractions()])
+    return values
+
+
+class TestTrace(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, 'trace.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def record(self, repeat=2):
+        for _ in range(repeat):
+            api = pdg.connect(pedantic=False)
+            recorder = api.record_trace(self.filename)
+            workload(api)
+            api.stop_trace()
+        return recorder
+
+    def test_record(self):
+        recorder = self.record(1)
+        events = list(read_trace(self.filename))
+        self.assertEqual(len(events), recorder.events)
+        self.assertEqual(events[0]['method'], 'get_particle_by_mcid')
+        self.assertEqual(events[0]['id'], 211)
+        self.assertIn(('summary_values', 'S008M'), [(e['method'], e['id']) for e in events])
+        self.assertEqual(set(e['edition'] for e in events), set([pdg.connect().edition]))
+
+    def test_predictions(self):
+        self.record()
+        prefetcher = PdgPrefetcher(pdg.connect(), window=20)
+        prefetcher.learn_file(self.filename)
+        predicted = [pdgid for pdgid, edition in prefetcher.predictions('get_particle_by_mcid', 211,
+                                                                        pdg.connect().edition)]
+        self.assertIn('S008M', predicted)
+        self.assertEqual(prefetcher.predictions('get_particle_by_mcid', 999, pdg.connect().edition), [])
+
+    def test_prefetch(self):
+        self.record()
+        cold = pdg.connect(pedantic=False)
+        expected = workload(cold)
+        api = pdg.connect(pedantic=False)
+        api.enable_prefetch([self.filename])
+        self.assertEqual(workload(api), expected)
+        stats = api.statistics()
+        self.assertGreater(stats['prefetch.values'], 0)
+        self.assertLess(stats['prefetch.queries'] + stats.get('query.summary', 0),
+                        cold.statistics()['query.summary'])
+        api.disable_prefetch()
+        self.assertIsNone(api.prefetcher)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+Test cases for the workload replay benchmark.
+"""
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import pdg
+from pdg.bench import synthetic_trace, replay_benchmark, main, SYNTHETIC_MIX, REPLAY_METHODS
+from pdg.trace import read_trace
+
+
+class TestReplay(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.api = pdg.connect(pedantic=False)
+
+    def test_synthetic_trace(self):
+        events = synthetic_trace(self.api, 200, seed=1)
+        self.assertEqual(len(events), 200)
+        self.assertEqual(events, synthetic_trace(self.api, 200, seed=1))
+        self.assertTrue(set(e['method'] for e in events) <= set(SYNTHETIC_MIX))
+
+    def test_replay_threads(self):
+        events = synthetic_trace(self.api, 100)
+        report = replay_benchmark(events, threads=3)
+        self.assertEqual(report['events'], 100)
+        self.assertEqual(report['errors'], 0)
+        self.assertGreater(report['throughput'], 0)
+        self.assertLessEqual(report['latency']['p50'], report['latency']['p99'])
+        self.assertEqual(sum(m['events'] for m in report['methods'].values()), 100)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'os.fork not available')
+    def test_replay_processes(self):
+        events = synthetic_trace(self.api, 60)
+        report = replay_benchmark(events, {'warm': 'particles', 'batch': True}, threads=2, processes=2, preload=True)
+        self.assertEqual(report['events'], 60)
+        self.assertEqual(report['errors'], 0)
+
+    def test_replay_recorded_trace(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            trace = os.path.join(tmpdir, 'trace.jsonl')
+            api = pdg.connect(pedantic=False)
+            api.record_trace(trace)
+            api.get_particle_by_mcid(211).mass
+            api.get('S008M').summary_values()
+            api.stop_trace()
+            output = os.path.join(tmpdir, 'report.json')
+            self.assertEqual(main(['replay', trace, '--threads', '2', '--output', output]), 0)
+            self.assertTrue(os.path.exists(output))
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_replay_charge_state(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            trace = os.path.join(tmpdir, 'trace.jsonl')
+            api = pdg.connect(pedantic=False)
+            api.record_trace(trace)
+            name = api.get_particle_by_mcid(-211).name
+            api.stop_trace()
+            events = [e for e in read_trace(trace) if e['method'] == 'particle_data']
+            self.assertEqual([e['mcid'] for e in events], [-211])
+        finally:
+            shutil.rmtree(tmpdir)
+        event = events[0]
+        self.assertEqual(REPLAY_METHODS['particle_data'](self.api, event['id'], event['edition'], event['mcid']), name)
+        # Summary values are also loaded for particles, which have no summary_values() method
+        events = [dict(event, method='summary_values')]
+        self.assertEqual(replay_benchmark(events)['errors'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
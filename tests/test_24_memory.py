@@ -0,0 +1,78 @@
+"""
+Test cases for memory accounting of API caches and objects.
+"""
+from __future__ import print_function
+
+import gc
+import unittest
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+import pdg
+from pdg.data import PdgConvertedValue
+from pdg.errors import PdgNoDataError, PdgAmbiguousValueError
+from pdg.memory import MEMORY_CATEGORIES
+
+
+class TestMemoryReport(unittest.TestCase):
+
+    def test_categories(self):
+        api = pdg.connect(pedantic=False)
+        report = api.memory_report()
+        self.assertEqual(sorted(report['categories']), sorted(MEMORY_CATEGORIES))
+        self.assertEqual(report['total'], sum(report['categories'].values()))
+        self.assertGreater(report['categories']['schema'], 0)
+        self.assertEqual(report['categories']['summary'], 0)
+        self.assertEqual(report['live_pdgdata'], 0)
+
+    def test_objects(self):
+        api = pdg.connect(pedantic=False)
+        pion = api.get_particle_by_mcid(211)
+        self.assertEqual(pion.charge, 1.0)
+        mass = list(pion.masses())[0]
+        summary = mass.best_summary()
+        converted = PdgConvertedValue(summary, 'GeV')
+        report = api.memory_report()
+        self.assertEqual(report['live_pdgdata'], 2)
+        self.assertEqual(report['classes']['PdgParticle']['count'], 1)
+        self.assertEqual(report['classes']['PdgMass']['count'], 1)
+        self.assertEqual(report['classes']['PdgConvertedValue']['count'], 1)
+        for category in ('pdgid', 'summary', 'pdgparticle', 'converted', 'objects'):
+            self.assertGreater(report['categories'][category], 0)
+        del pion, mass
+        gc.collect()
+        self.assertEqual(api.memory_report()['live_pdgdata'], 0)
+        self.assertEqual(converted.units, 'GeV')
+
+    @unittest.skipIf(tracemalloc is None, 'tracemalloc not available')
+    def test_tracemalloc(self):
+        tracemalloc.start()
+        try:
+            api = pdg.connect(pedantic=False)
+            api.hierarchy_index()
+            gc.collect()
+            traced_before = tracemalloc.get_traced_memory()[0]
+            report_before = api.memory_report()
+            api.warm('all', background=False)
+            particles = list(api.get_particles())
+            for particle in particles:
+                try:
+                    particle.mass
+                except (PdgNoDataError, PdgAmbiguousValueError):
+                    pass
+            gc.collect()
+            traced = tracemalloc.get_traced_memory()[0] - traced_before
+            report_after = api.memory_report()
+        finally:
+            tracemalloc.stop()
+        estimated = report_after['total'] - report_before['total']
+        # Estimates are approximate, but must be of the size of the memory actually allocated
+        self.assertGreater(estimated, 0.5*traced)
+        self.assertLess(estimated, 2*traced)
+        self.assertEqual(report_after['live_pdgdata'], len(particles))
+
+
+if __name__ == '__main__':
+    unittest.main()